@@ -0,0 +1,133 @@
+"""
+Spendsignal.ai - Budget reallocation
+Spreads the budget plus the spend freed by STOP keywords across INVEST / FIX keywords by
+marginal return, with diminishing returns as each keyword is scaled.
+
+    python allocation.py results.json [--budget 5000] [--out allocation.csv]
+"""
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+# Revenue grows as spend ** ELASTICITY past a keyword's current spend: doubling spend
+# multiplies revenue by 2 ** 0.6 ≈ 1.5, so each extra dollar returns less than the last
+ELASTICITY = 0.6
+# No keyword is scaled past this multiple of its current spend (its curve is unproven there)
+MAX_SCALE = 3.0
+# Dollars that would return less than this per dollar are left unallocated
+MIN_RETURN = 1.0
+ALLOCATION_COLUMNS = ['keyword', 'action', 'spend', 'roi', 'allocation', 'new_spend', 'projected_return',
+                      'marginal_return']
+
+
+def allocate_budget(units, budget, elasticity=ELASTICITY, max_scale=MAX_SCALE, min_return=MIN_RETURN):
+    """(allocation frame, summary) for `budget` plus the STOP keywords' savings.
+
+    units needs keyword, action, ads_spend, roi and savings columns: classified engine units
+    or frames.units_frame(). A keyword's marginal return at spend S is
+    elasticity * roi * (S / spend) ** (elasticity - 1). Giving each next dollar to the
+    highest marginal return (the greedy heap, in the limit of small steps) ends with every
+    funded keyword at the same marginal return, so that level is found by bisection over
+    all keywords at once instead of popping a heap dollar by dollar.
+    """
+    if not 0 < elasticity < 1:
+        raise ValueError(f"elasticity must be between 0 and 1, got {elasticity}")
+    if max_scale < 1:
+        raise ValueError(f"max_scale must be at least 1, got {max_scale}")
+    action = units['action'].to_numpy()
+    spend = units['ads_spend'].fillna(0).to_numpy(dtype=float)
+    roi = units['roi'].fillna(0).to_numpy(dtype=float)
+    freed = float(units['savings'].fillna(0).to_numpy(dtype=float)[action == 'STOP'].sum())
+    pool = max(float(budget), 0.0) + freed
+
+    # Only keywords with spend and revenue to extrapolate from can be scaled
+    candidates = np.flatnonzero(np.isin(action, ['INVEST', 'FIX']) & (spend > 0) & (roi > 0))
+    base_spend, base_roi = spend[candidates], roi[candidates]
+    first_return = elasticity * base_roi
+
+    def scale_at(level):
+        # Spend multiple at which a keyword's marginal return has fallen to `level`
+        return np.clip((first_return / level) ** (1 / (1 - elasticity)), 1, max_scale)
+
+    def extra_at(level):
+        return base_spend * (scale_at(level) - 1)
+
+    level = float(min_return)
+    if len(candidates) and extra_at(level).sum() > pool:
+        # Total spend falls as the level rises; bisect in log space between the floor and the best first dollar
+        low, high = np.log(level), np.log(first_return.max())
+        for _ in range(60):
+            middle = (low + high) / 2
+            if extra_at(np.exp(middle)).sum() > pool:
+                low = middle
+            else:
+                high = middle
+        level = float(np.exp(high))
+
+    scale = scale_at(level) if len(candidates) else np.zeros(0)
+    extra = base_spend * (scale - 1)
+    funded = extra > 0.005
+    rows = candidates[funded]
+    scale, extra = scale[funded], extra[funded]
+    revenue = base_roi[funded] * base_spend[funded]
+    allocation = pd.DataFrame({
+        'keyword': units['keyword'].to_numpy()[rows],
+        'action': action[rows],
+        'spend': spend[rows],
+        'roi': roi[rows],
+        'allocation': extra,
+        'new_spend': spend[rows] + extra,
+        'projected_return': revenue * (scale ** elasticity - 1),
+        'marginal_return': first_return[funded] * scale ** (elasticity - 1),
+    }, columns=ALLOCATION_COLUMNS).sort_values('allocation', ascending=False, kind='stable').reset_index(drop=True)
+
+    allocated = float(allocation['allocation'].sum())
+    projected = float(allocation['projected_return'].sum())
+    summary = {
+        'budget': float(budget),
+        'freed_savings': freed,
+        'pool': pool,
+        'allocated': allocated,
+        'unallocated': max(pool - allocated, 0.0),
+        'keywords': int(len(allocation)),
+        'candidates': int(len(candidates)),
+        'projected_return': projected,
+        'projected_roi': projected / allocated if allocated else 0.0,
+        # What the last dollar in returns; keywords at max_scale may still be above it
+        'marginal_return': level if allocated else 0.0,
+    }
+    return allocation, summary
+
+
+def main(argv=None):
+    from frames import units_frame
+
+    parser = argparse.ArgumentParser(description="Reallocate budget and STOP savings across INVEST / FIX keywords.")
+    parser.add_argument('results', help="an analysis response (batch.py's results.json, incremental.py --out)")
+    parser.add_argument('--budget', type=float, help="extra budget on top of the STOP savings (default: the response's)")
+    parser.add_argument('--elasticity', type=float, default=ELASTICITY)
+    parser.add_argument('--max-scale', type=float, default=MAX_SCALE)
+    parser.add_argument('--min-return', type=float, default=MIN_RETURN)
+    parser.add_argument('--out', help="write the per-keyword allocation CSV here")
+    args = parser.parse_args(argv)
+
+    with open(args.results, encoding='utf-8') as f:
+        results = json.load(f)
+    budget = results.get('budget', 0) if args.budget is None else args.budget
+    try:
+        allocation, summary = allocate_budget(units_frame(results.get('recommendations', {})), budget,
+                                              args.elasticity, args.max_scale, args.min_return)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"${summary['pool']:,.0f} to place (${summary['budget']:,.0f} budget + ${summary['freed_savings']:,.0f} "
+          f"freed by STOP): ${summary['allocated']:,.0f} across {summary['keywords']:,} keywords, "
+          f"projected +${summary['projected_return']:,.0f} ({summary['projected_roi']:.2f}x)")
+    if args.out:
+        allocation.round(2).to_csv(args.out, index=False)
+        print(f"Allocation written to {args.out}")
+
+if __name__ == '__main__':
+    main()
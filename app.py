@@ -4,15 +4,17 @@ Stop wasting. Start knowing.
 """
 
 import streamlit as st
-import pandas as pd
-import requests
 import json
 import time
-import base64
 from datetime import datetime
-from io import BytesIO
 import os
 
+# Only what the landing page needs is imported here. pandas, requests, reportlab and the
+# analysis modules are imported by the functions that use them, so a cold start paints first
+from assets import LOGO_URI, THEME_STYLE
+from instrument import StageTimer, append_log, log_record, prometheus_text, write_prometheus
+from jobs import DONE, JobManager
+
 st.set_page_config(
     page_title="Spendsignal.ai - Marketing Intelligence",
     page_icon="📡",
@@ -21,373 +23,13 @@ st.set_page_config(
 )
 
 # ===== DARK THEME CSS =====
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=DM+Sans:ital,opsz,wght@0,9..40,400;0,9..40,500;0,9..40,600;0,9..40,700&family=JetBrains+Mono:wght@400;500&display=swap');
-
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-
-    /* ── Dark base ── */
-    .stApp, .main, .block-container,
-    [data-testid="stAppViewContainer"],
-    section[data-testid="stSidebar"] {
-        background-color: #0b1120 !important;
-    }
-
-    .main { padding: 0rem 1rem; }
-    .block-container { padding-top: 1.5rem; max-width: 1200px; }
-    * { font-family: 'DM Sans', sans-serif !important; }
-    code, pre, .stCode { font-family: 'JetBrains Mono', monospace !important; }
-
-    /* ── Global text → light ── */
-    .stMarkdown, .stMarkdown p, .stMarkdown li, .stMarkdown span,
-    .stText, p, span, li, label, h1, h2, h3, h4, h5, h6,
-    div[data-testid="stText"],
-    [data-testid="stWidgetLabel"] label,
-    [data-testid="stWidgetLabel"] p,
-    .stRadio label, .stCheckbox label {
-        color: #e2e8f0 !important;
-    }
-
-    /* ── Expander ── */
-    [data-testid="stExpander"] { border-color: #1e293b !important; background: transparent !important; }
-    [data-testid="stExpander"] details { border: 1px solid #1e293b !important; border-radius: 8px !important; background: #111827 !important; }
-    [data-testid="stExpander"] summary { color: #94a3b8 !important; background: #111827 !important; border-radius: 8px !important; }
-    [data-testid="stExpander"] summary span { color: #94a3b8 !important; font-size: 0.85rem !important; }
-    [data-testid="stExpander"] summary svg { color: #64748b !important; }
-    [data-testid="stExpander"] div[data-testid="stExpanderDetails"] { background: #111827 !important; }
-    [data-testid="stExpander"] div[data-testid="stExpanderDetails"] p,
-    [data-testid="stExpander"] div[data-testid="stExpanderDetails"] li { color: #94a3b8 !important; font-size: 0.83rem !important; }
-    [data-testid="stExpander"] div[data-testid="stExpanderDetails"] code { color: #60a5fa !important; background: rgba(59,130,246,0.1) !important; padding: 1px 5px; border-radius: 3px; }
-
-    /* ── Alert boxes ── */
-    .stAlert p { color: inherit !important; }
-
-    /* ── Color tokens ── */
-    :root {
-        --bg-base: #0b1120;
-        --bg-card: #111827;
-        --bg-elevated: #1a2332;
-        --bg-input: #1e293b;
-        --border: #1e293b;
-        --border-hover: #334155;
-        --text-primary: #f1f5f9;
-        --text-secondary: #cbd5e1;
-        --text-muted: #64748b;
-        --brand-500: #3b82f6;
-        --brand-400: #60a5fa;
-        --brand-300: #93c5fd;
-        --brand-200: #bfdbfe;
-        --brand-glow: rgba(59,130,246,0.15);
-        --accent: #f59e0b;
-        --success: #34d399;
-        --success-dim: rgba(52,211,153,0.12);
-        --danger: #f87171;
-        --danger-dim: rgba(248,113,113,0.12);
-        --warning: #fbbf24;
-        --warning-dim: rgba(251,191,36,0.12);
-        --radius-sm: 8px;
-        --radius-md: 12px;
-        --radius-lg: 16px;
-        --shadow-sm: 0 1px 3px rgba(0,0,0,0.3);
-        --shadow-md: 0 4px 16px rgba(0,0,0,0.4);
-        --shadow-glow: 0 0 20px rgba(59,130,246,0.08);
-    }
-
-    /* ── Navbar ── */
-    .spendsignal-nav {
-        display: flex; align-items: center; justify-content: space-between;
-        padding: 1rem 2rem;
-        background: linear-gradient(135deg, #0f172a 0%, #1e293b 100%);
-        border: 1px solid #1e293b;
-        border-radius: var(--radius-lg);
-        margin-bottom: 1.5rem;
-        box-shadow: var(--shadow-md), var(--shadow-glow);
-        position: relative; overflow: hidden;
-    }
-    .spendsignal-nav::before {
-        content: ''; position: absolute; top: -60%; right: -5%;
-        width: 350px; height: 350px;
-        background: radial-gradient(circle, rgba(59,130,246,0.1) 0%, transparent 70%);
-        pointer-events: none;
-    }
-    .spendsignal-nav .brand { display: flex; align-items: center; gap: 12px; }
-    .spendsignal-nav .brand-logo {
-        height: 48px; width: auto; display: block;
-        filter: drop-shadow(0 2px 10px rgba(59,130,246,0.35));
-        flex-shrink: 0;
-    }
-    .spendsignal-nav .brand-name { font-size: 1.5rem; font-weight: 700; color: #ffffff !important; letter-spacing: -0.5px; }
-    .spendsignal-nav .tagline { color: #94a3b8 !important; font-size: 0.85rem; font-weight: 500; }
-
-    /* ── Tabs ── */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 4px; background: var(--bg-card); padding: 5px;
-        border-radius: var(--radius-md); border: 1px solid var(--border);
-    }
-    .stTabs [data-baseweb="tab"] {
-        padding: 10px 20px; border-radius: var(--radius-sm); font-weight: 600;
-        font-size: 0.85rem; color: #64748b !important; background: transparent; border: none;
-    }
-    .stTabs [data-baseweb="tab"]:hover { color: #cbd5e1 !important; background: rgba(255,255,255,0.03); }
-    .stTabs [aria-selected="true"] {
-        background: var(--bg-elevated) !important; color: #60a5fa !important;
-        box-shadow: var(--shadow-sm); border: 1px solid var(--border) !important;
-    }
-    .stTabs [data-baseweb="tab-highlight"], .stTabs [data-baseweb="tab-border"] { display: none; }
-
-    /* ── Demo cards ── */
-    .demo-card {
-        background: var(--bg-card); border: 1px solid var(--border);
-        border-radius: var(--radius-lg); padding: 2rem; height: 100%;
-        transition: all 0.3s ease; overflow: hidden;
-    }
-    .demo-card:hover { box-shadow: var(--shadow-md); border-color: var(--border-hover); transform: translateY(-2px); }
-    .demo-card.quick { border-top: 3px solid var(--brand-500); }
-    .demo-card.live { border-top: 3px solid var(--success); }
-    .demo-card .card-badge {
-        display: inline-flex; align-items: center; gap: 6px; padding: 5px 12px;
-        border-radius: 20px; font-size: 0.72rem; font-weight: 600;
-        letter-spacing: 0.5px; text-transform: uppercase; margin-bottom: 1rem;
-    }
-    .demo-card.quick .card-badge { background: rgba(59,130,246,0.12); color: #60a5fa !important; }
-    .demo-card.live .card-badge { background: var(--success-dim); color: var(--success) !important; }
-    .demo-card h3 { font-size: 1.25rem; font-weight: 700; color: #f1f5f9 !important; margin: 0 0 0.5rem 0; }
-    .demo-card .card-desc { color: #94a3b8 !important; font-size: 0.9rem; line-height: 1.5; margin-bottom: 1.25rem; }
-    .demo-card .specs { display: flex; flex-direction: column; gap: 8px; margin-bottom: 1rem; }
-    .demo-card .spec-item { display: flex; align-items: center; gap: 10px; font-size: 0.85rem; color: #cbd5e1 !important; }
-    .demo-card .spec-icon {
-        width: 28px; height: 28px; border-radius: 8px;
-        display: flex; align-items: center; justify-content: center; font-size: 0.75rem; flex-shrink: 0;
-    }
-    .demo-card.quick .spec-icon { background: rgba(59,130,246,0.1); }
-    .demo-card.live .spec-icon { background: var(--success-dim); }
-    .demo-card .card-footer {
-        font-size: 0.78rem; color: #475569 !important; font-style: italic;
-        padding-top: 0.75rem; border-top: 1px solid #1e293b;
-    }
-
-    /* ── Section headers ── */
-    .section-header { display: flex; align-items: center; gap: 10px; margin-bottom: 0.25rem; }
-    .section-header .icon-box {
-        width: 36px; height: 36px; border-radius: 10px;
-        display: flex; align-items: center; justify-content: center; font-size: 1.1rem; flex-shrink: 0;
-    }
-    .section-header h2 { font-size: 1.4rem; font-weight: 700; color: #f1f5f9 !important; margin: 0; }
-    .section-subtitle { color: #94a3b8 !important; font-size: 0.9rem; margin-bottom: 1.5rem; line-height: 1.5; }
-
-    /* ── AI insight box ── */
-    .ai-insight-box-pro {
-        background: linear-gradient(135deg, rgba(59,130,246,0.06) 0%, rgba(59,130,246,0.02) 100%);
-        border: 1px solid rgba(59,130,246,0.2); border-radius: var(--radius-lg);
-        padding: 1.5rem 2rem; margin: 1.5rem 0; position: relative;
-    }
-    .ai-insight-box-pro::before {
-        content: ''; position: absolute; top: 0; left: 0; right: 0; height: 3px;
-        background: linear-gradient(90deg, #3b82f6, #60a5fa, #fbbf24);
-        border-radius: var(--radius-lg) var(--radius-lg) 0 0;
-    }
-    .ai-insight-box-pro .insight-header {
-        display: flex; align-items: center; gap: 8px; font-size: 0.85rem; font-weight: 600;
-        color: #60a5fa !important; margin-bottom: 0.75rem; text-transform: uppercase; letter-spacing: 0.5px;
-    }
-
-    /* ── Rec headers ── */
-    .rec-header {
-        display: flex; align-items: center; gap: 10px; padding: 0.75rem 1rem;
-        border-radius: var(--radius-sm); margin-bottom: 1rem; font-weight: 600; font-size: 0.85rem;
-    }
-    .rec-header.stop { background: var(--danger-dim); color: var(--danger) !important; }
-    .rec-header.fix { background: var(--warning-dim); color: var(--warning) !important; }
-    .rec-header.invest { background: var(--success-dim); color: var(--success) !important; }
-    .rec-header.observe { background: rgba(100,116,139,0.1); color: #94a3b8 !important; }
-
-    /* ── Integration cards ── */
-    .int-card {
-        background: var(--bg-card); border: 1px solid var(--border);
-        border-radius: var(--radius-md); padding: 1.5rem 1rem; text-align: center;
-        transition: all 0.2s ease;
-    }
-    .int-card:hover { border-color: var(--border-hover); box-shadow: var(--shadow-sm); }
-    .int-card .int-icon { font-size: 2rem; margin-bottom: 0.5rem; }
-    .int-card .int-name { font-weight: 600; font-size: 0.9rem; color: #e2e8f0 !important; margin-bottom: 0.5rem; }
-    .int-card .int-badge {
-        display: inline-block; background: rgba(100,116,139,0.12); color: #64748b !important;
-        padding: 3px 10px; border-radius: 20px; font-size: 0.7rem; font-weight: 600;
-    }
-
-    /* ── Coming soon ── */
-    .coming-soon-banner {
-        background: linear-gradient(135deg, rgba(59,130,246,0.08), rgba(59,130,246,0.03));
-        border: 1px solid rgba(59,130,246,0.2); border-radius: var(--radius-lg);
-        padding: 2rem; text-align: center; margin-bottom: 2rem;
-    }
-    .coming-soon-banner .cs-icon { font-size: 2.5rem; margin-bottom: 0.75rem; }
-    .coming-soon-banner h3 { font-size: 1.3rem; font-weight: 700; color: #e2e8f0 !important; margin: 0 0 0.5rem 0; }
-    .coming-soon-banner p { color: #94a3b8 !important; font-size: 0.9rem; max-width: 500px; margin: 0 auto; line-height: 1.5; }
-
-    /* ── Upload headers ── */
-    .upload-header { display: flex; align-items: center; gap: 6px; font-weight: 600; font-size: 0.9rem; color: #e2e8f0 !important; margin-bottom: 0.25rem; }
-    .upload-header .req-badge { font-size: 0.65rem; background: var(--danger-dim); color: var(--danger) !important; padding: 2px 8px; border-radius: 4px; font-weight: 600; text-transform: uppercase; }
-    .upload-header .opt-badge { font-size: 0.65rem; background: rgba(100,116,139,0.12); color: #64748b !important; padding: 2px 8px; border-radius: 4px; font-weight: 600; text-transform: uppercase; }
-    .upload-source { font-size: 0.8rem; color: #64748b !important; margin-bottom: 0.75rem; }
-
-    /* ── Info box ── */
-    .info-box {
-        display: flex; align-items: center; gap: 10px;
-        background: rgba(59,130,246,0.06); border: 1px solid rgba(59,130,246,0.15);
-        border-radius: var(--radius-sm); padding: 0.75rem 1rem;
-        font-size: 0.85rem; color: #93c5fd !important; margin-bottom: 1.5rem;
-    }
-
-    /* ── About cards ── */
-    .about-card {
-        background: var(--bg-card); border: 1px solid var(--border);
-        border-radius: var(--radius-lg); padding: 2rem; height: 100%;
-    }
-    .about-card h4 { font-size: 1.1rem; font-weight: 700; color: #f1f5f9 !important; margin: 0 0 1rem 0; }
-    .about-card p, .about-card li { color: #94a3b8 !important; font-size: 0.9rem; line-height: 1.7; }
-    .about-card strong { color: #cbd5e1 !important; }
-    .about-card hr { border-color: #1e293b !important; }
-
-    /* ── Author card ── */
-    .author-card {
-        background: linear-gradient(135deg, #0f172a, #1a2332);
-        border: 1px solid var(--border); border-radius: var(--radius-lg);
-        padding: 2rem; display: flex; align-items: center; gap: 1.5rem;
-    }
-    .author-card .avatar {
-        width: 72px; height: 72px;
-        background: linear-gradient(135deg, #3b82f6, #60a5fa);
-        border-radius: 16px; display: flex; align-items: center; justify-content: center;
-        font-size: 1.5rem; font-weight: 700; color: white !important;
-        flex-shrink: 0; box-shadow: 0 4px 16px rgba(59,130,246,0.3);
-    }
-    .author-card .author-info h4 { color: #f1f5f9 !important; font-size: 1.1rem; margin: 0 0 4px 0; }
-    .author-card .author-info p { color: #94a3b8 !important; font-size: 0.85rem; margin: 0; line-height: 1.5; }
-    .author-card .author-info a { color: #60a5fa !important; text-decoration: underline; }
-
-    /* ── Buttons ── */
-    .stButton>button {
-        border-radius: var(--radius-sm); font-weight: 600; padding: 0.6rem 1.5rem;
-        font-size: 0.85rem; border: 1px solid var(--border); transition: all 0.2s ease;
-        color: #e2e8f0 !important; background: var(--bg-elevated);
-    }
-    .stButton>button:hover { box-shadow: var(--shadow-md); transform: translateY(-1px); border-color: var(--border-hover); background: #243044; }
-    .stButton>button[kind="primary"] {
-        background: linear-gradient(135deg, #2563eb, #3b82f6) !important;
-        color: white !important; border: none !important;
-        box-shadow: 0 2px 12px rgba(59,130,246,0.3);
-    }
-    .stButton>button[kind="primary"]:hover { box-shadow: 0 4px 20px rgba(59,130,246,0.4); }
-
-    /* ── Pills ── */
-    .status-pill { display: inline-flex; align-items: center; gap: 6px; padding: 4px 12px; border-radius: 20px; font-size: 0.8rem; font-weight: 500; }
-    .status-pill.ok { background: var(--success-dim); color: var(--success) !important; }
-    .status-pill.pending { background: rgba(100,116,139,0.1); color: #64748b !important; }
-
-    /* ── Misc ── */
-    .divider { border: none; border-top: 1px solid #1e293b; margin: 1.5rem 0; }
-    .settings-label { font-size: 0.75rem; font-weight: 600; color: #64748b !important; text-transform: uppercase; letter-spacing: 0.5px; margin-bottom: 0.5rem; }
-    .app-footer { text-align: center; padding: 2rem 0 1rem; color: #475569 !important; font-size: 0.78rem; border-top: 1px solid #1e293b; margin-top: 2rem; }
-
-    /* ── Streamlit widget overrides for dark ── */
-    .stSelectbox label, .stNumberInput label, .stTextInput label, .stTextArea label {
-        font-size: 0.85rem !important; font-weight: 600 !important; color: #cbd5e1 !important;
-    }
-    .stDataFrame { border-radius: var(--radius-md); overflow: hidden; }
-
-    div[data-testid="stMetric"] {
-        background: var(--bg-card) !important; border: 1px solid var(--border);
-        border-radius: var(--radius-md); padding: 1rem; box-shadow: var(--shadow-sm);
-    }
-    div[data-testid="stMetric"] label { font-size: 0.75rem !important; text-transform: uppercase; letter-spacing: 0.3px; color: #64748b !important; }
-    div[data-testid="stMetric"] [data-testid="stMetricValue"] { color: #f1f5f9 !important; }
-    .stDownloadButton>button { width: 100%; }
-
-    /* Inputs */
-    [data-baseweb="select"] > div { background-color: var(--bg-input) !important; border-color: var(--border) !important; color: #e2e8f0 !important; }
-    [data-baseweb="input"] { background-color: var(--bg-input) !important; border-color: var(--border) !important; }
-    [data-baseweb="input"] input { color: #e2e8f0 !important; }
-    [data-baseweb="textarea"] textarea { background-color: var(--bg-input) !important; color: #e2e8f0 !important; border-color: var(--border) !important; }
-
-    /* File uploader — hide default text completely, overlay custom label */
-    [data-testid="stFileUploader"] section,
-    [data-testid="stFileUploaderDropzone"] {
-        position: relative !important;
-        background-color: var(--bg-card) !important;
-        border: 1px dashed var(--border) !important;
-        border-radius: var(--radius-sm) !important;
-        padding: 0 !important;
-        min-height: 56px !important;
-        overflow: hidden !important;
-    }
-    /* Nuke all visible text inside the dropzone */
-    [data-testid="stFileUploader"] section *,
-    [data-testid="stFileUploaderDropzone"] * {
-        color: transparent !important;
-        font-size: 0 !important;
-        background: transparent !important;
-        box-shadow: none !important;
-        border: none !important;
-    }
-    /* Make the native button fill the entire dropzone and stay clickable (but invisible) */
-    [data-testid="stFileUploader"] section button,
-    [data-testid="stFileUploaderDropzone"] button,
-    [data-testid="stFileUploader"] [data-testid="stBaseButton-secondary"] {
-        position: absolute !important;
-        inset: 0 !important;
-        width: 100% !important;
-        height: 100% !important;
-        margin: 0 !important;
-        padding: 0 !important;
-        opacity: 0 !important;
-        z-index: 2 !important;
-        cursor: pointer !important;
-    }
-    /* Overlay our own label — non-interactive so clicks hit the button below */
-    [data-testid="stFileUploader"] section::after,
-    [data-testid="stFileUploaderDropzone"]::after {
-        content: "📎 Choose CSV file";
-        position: absolute !important;
-        inset: 0 !important;
-        display: flex !important;
-        align-items: center !important;
-        justify-content: center !important;
-        color: #e2e8f0 !important;
-        font-size: 0.85rem !important;
-        font-weight: 600 !important;
-        z-index: 1 !important;
-        pointer-events: none !important;
-        white-space: nowrap !important;
-    }
-    /* Uploaded-file row lives outside the dropzone — restore visibility there */
-    [data-testid="stFileUploader"] [data-testid="stFileUploaderFile"],
-    [data-testid="stFileUploader"] [data-testid="stFileUploaderFileData"],
-    [data-testid="stFileUploader"] [data-testid="stFileUploaderFileName"],
-    [data-testid="stFileUploader"] [data-testid="stFileUploaderDeleteBtn"] {
-        color: #e2e8f0 !important;
-        font-size: 0.8rem !important;
-        background: transparent !important;
-    }
-
-    /* Dataframe */
-    .stDataFrame [data-testid="stDataFrameResizable"] { background: var(--bg-card) !important; }
-
-    /* Empty state */
-    .empty-state {
-        text-align: center; padding: 4rem 2rem;
-    }
-    .empty-state .es-icon { font-size: 3rem; margin-bottom: 1rem; opacity: 0.6; }
-    .empty-state h3 { color: #cbd5e1 !important; margin-bottom: 0.5rem; }
-    .empty-state p { color: #64748b !important; font-size: 0.9rem; }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(THEME_STYLE, unsafe_allow_html=True)
 
 # ===== DATA & API FUNCTIONS =====
 
+# UI label → rules.json goal
+GOALS = {"Maximize ROAS": "roas", "Increase Conversions": "conversions", "Reduce CPA": "cpa", "Scale Traffic": "traffic"}
+
 @st.cache_data
 def load_synthetic_data():
     try:
@@ -403,164 +45,146 @@ def load_synthetic_data():
         st.error(f"Error loading synthetic data: {e}")
         return None
 
-def call_n8n_webhook(mode, data=None, goal="roas", budget=10000):
+def call_n8n_webhook(mode, data=None, goal="roas", budget=10000, job=None):
+    import requests
+    from http_client import RETRY_STATUSES
+    from transport import build_request
+
     webhook_url = st.secrets.get("N8N_WEBHOOK_URL", "")
     if not webhook_url:
-        st.error("N8N_WEBHOOK_URL not configured. Please add it to your Streamlit secrets.")
-        return None
-    payload = {"mode": mode, "goal": goal, "budget": budget, "data": data if data else {}}
+        raise RuntimeError("N8N_WEBHOOK_URL not configured. Please add it to your Streamlit secrets.")
+    transport = st.secrets.get("WEBHOOK_TRANSPORT", "json")
+    response_format = st.secrets.get("RESPONSE_FORMAT", "rows")
+    insight, insight_timeout = st.secrets.get("INSIGHT_MODE", "llm"), float(st.secrets.get("INSIGHT_TIMEOUT", 20))
+    if insight == "llm" and st.secrets.get("N8N_INSIGHT_URL"):
+        # Respond as soon as the actions are classified; the summary is fetched afterwards
+        insight = "deferred"
+    headers = build_request(transport, mode, goal, budget, {})[1]
+
+    def body_factory():
+        # Rebuilt per attempt: a streamed body can only be sent once
+        body = build_request(transport, mode, goal, budget, data, response_format, insight, insight_timeout)[0]
+        if job is not None and not isinstance(body.get("data"), (bytes, type(None))):
+            body["data"] = _track_upload(body["data"], job)
+        elif job is not None:
+            job.update(50, "🧠 Running AI analysis (this may take 30-60 seconds)...")
+        return body
+
     try:
-        response = requests.post(webhook_url, json=payload, headers={"Content-Type": "application/json"}, timeout=120)
+        # Not idempotent: each run calls the model (cost, varying text) and rewrites the workflow's
+        # insight cache, so a read timeout is final. Cold starts (connect timeouts) and gateway
+        # errors from the proxy in front of n8n are retried.
+        response = get_http_client().post(webhook_url, body_factory=body_factory, retry_statuses=RETRY_STATUSES,
+                                          headers=headers, timeout=(10, 120))
         response.raise_for_status()
         return response.json()
     except requests.exceptions.Timeout:
-        st.error("Analysis timed out. Please try again.")
-        return None
+        raise RuntimeError("Analysis timed out. Please try again.")
     except requests.exceptions.RequestException as e:
-        st.error(f"Error connecting to analysis engine: {str(e)}")
-        return None
-
-def generate_pdf_report(results):
-    from reportlab.lib.pagesizes import letter
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.units import inch
-
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.75*inch, bottomMargin=0.75*inch)
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24, textColor=colors.HexColor('#1e3a5f'), spaceAfter=20)
-    heading_style = ParagraphStyle('CustomHeading', parent=styles['Heading2'], fontSize=14, textColor=colors.HexColor('#1e3a5f'), spaceBefore=20, spaceAfter=10)
-
-    story = []
-    story.append(Paragraph("SPENDSIGNAL.AI", title_style))
-    story.append(Paragraph("Marketing Intelligence Report", styles['Heading2']))
-    story.append(Spacer(1, 12))
-    story.append(Paragraph(f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", styles['Normal']))
-    story.append(Spacer(1, 20))
-    story.append(Paragraph("EXECUTIVE SUMMARY", heading_style))
-
-    stats = results.get('stats', {})
-    summary = results.get('summary', {})
-    summary_data = [
-        ['Metric', 'Value'],
-        ['Monthly Savings Identified', f"${stats.get('total_savings', 0):,}"],
-        ['Annual Impact', f"${stats.get('annual_savings', 0):,}"],
-        ['Keywords Analyzed', str(stats.get('total_units', 0))],
-        ['Average Confidence', f"{stats.get('avg_confidence', 0)}%"],
-        ['Actions Required', str(summary.get('stop', 0) + summary.get('fix', 0) + summary.get('invest', 0))]
-    ]
-    summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a5f')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f9fafb')),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('PADDING', (0, 0), (-1, -1), 8),
-    ]))
-    story.append(summary_table)
-    story.append(Spacer(1, 20))
-
-    ai_insight = results.get('ai_insight', '')
-    if ai_insight:
-        story.append(Paragraph("AI INSIGHT", heading_style))
-        story.append(Paragraph(ai_insight, styles['Normal']))
-        story.append(Spacer(1, 20))
-
-    recommendations = results.get('recommendations', {})
-    for action, data_list in [
-        ('STOP - PAUSE IMMEDIATELY', recommendations.get('stop', [])),
-        ('FIX - OPTIMIZE THESE', recommendations.get('fix', [])),
-        ('INVEST - SCALE UP', recommendations.get('invest', [])),
-    ]:
-        if data_list:
-            story.append(Paragraph(action, heading_style))
-            table_data = [['Keyword', 'Spend', 'Reason', 'Confidence']]
-            for item in data_list[:10]:
-                table_data.append([
-                    item.get('keyword', '')[:30],
-                    f"${item.get('ads', {}).get('spend', 0):,.0f}",
-                    item.get('classification', {}).get('reason', '')[:40],
-                    f"{item.get('confidence', {}).get('score', 0)}%"
-                ])
-            rec_table = Table(table_data, colWidths=[1.5*inch, 0.8*inch, 2.7*inch, 0.8*inch])
-            rec_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#374151')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e5e7eb')),
-                ('PADDING', (0, 0), (-1, -1), 6),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ]))
-            story.append(rec_table)
-            story.append(Spacer(1, 15))
-
-    story.append(Spacer(1, 30))
-    story.append(Paragraph("Generated by Spendsignal.ai | spendsignal.ai | Built by Rupam Patra",
-                          ParagraphStyle('Footer', parent=styles['Normal'], fontSize=8, textColor=colors.gray)))
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
+        raise RuntimeError(f"Error connecting to analysis engine: {str(e)}")
+
+def fetch_n8n_insight(results):
+    """Poll the insight webhook for a deferred summary. Returns (insight, source); the template on failure."""
+    import requests
+
+    url, key = st.secrets["N8N_INSIGHT_URL"], results.get('insight_key')
+    deadline = time.monotonic() + float(st.secrets.get("INSIGHT_TIMEOUT", 20)) + 10
+    delay = 0.5
+    while key and time.monotonic() < deadline:
+        try:
+            response = get_http_client().request("GET", url, params={"key": key}, idempotent=True, timeout=10)
+            response.raise_for_status()
+            answer = response.json()
+        except (requests.exceptions.RequestException, ValueError):
+            break
+        if answer.get('status') == 'ready' and answer.get('ai_insight'):
+            return answer['ai_insight'], "llm"
+        if answer.get('status') == 'failed':
+            break
+        time.sleep(delay)
+        delay = min(delay * 1.5, 3.0)
+    return results.get('ai_insight'), "template"
+
+def _track_upload(chunks, job):
+    sent = 0
+    for chunk in chunks:
+        sent += len(chunk)
+        job.update(40, f"📤 Uploading data ({sent / 1e6:.1f} MB compressed)...")
+        yield chunk
+    job.update(50, "🧠 Running AI analysis (this may take 30-60 seconds)...")
+
+@st.cache_data(max_entries=32, show_spinner="📄 Building PDF report...")
+def build_pdf_report(results_key, _results):
+    # Keyed by the result hash alone; _results is not hashed. Returns (pdf bytes, stage timing)
+    from report import generate_pdf_report
+
+    timer = StageTimer(trace_memory=bool(st.secrets.get("TRACE_MEMORY", False)))
+    with timer.stage("pdf"):
+        pdf_bytes = generate_pdf_report(_results).getvalue()
+    return pdf_bytes, timer.stages[0]
 
 def parse_csv_file(uploaded_file, data_type):
+    import pandas as pd
+    from ingest import read_csv_source
+
     try:
-        df = pd.read_csv(uploaded_file)
-        df.columns = df.columns.str.lower().str.strip()
-        column_maps = {
-            'ads': {'keyword': ['keyword','keywords','search_term','query'], 'spend': ['spend','cost','amount','ad_spend'], 'clicks': ['clicks','click'], 'impressions': ['impressions','impr'], 'conversions': ['conversions','conv','conversion'], 'revenue': ['revenue','value','sale_amount']},
-            'seo': {'keyword': ['keyword','keywords','text','query'], 'volume': ['volume','vol','search_volume','searches'], 'cpc': ['cpc','cost_per_click'], 'competition': ['competition','comp','difficulty']},
-            'crm': {'origin': ['origin','source','keyword','utm_source'], 'leads': ['leads','lead_count'], 'qualified_leads': ['qualified_leads','qualified','sql'], 'revenue': ['revenue','value','deal_value']}
-        }
-        mapped_data = []
-        for _, row in df.iterrows():
-            item = {}
-            for target_col, source_cols in column_maps.get(data_type, {}).items():
-                for src in source_cols:
-                    if src in df.columns:
-                        item[target_col] = row[src]
-                        break
-            if item:
-                mapped_data.append(item)
-        return mapped_data
+        return read_csv_source(uploaded_file, data_type)
     except Exception as e:
         st.error(f"Error parsing {data_type} file: {e}")
-        return []
+        return pd.DataFrame()
 
-# ===== RENDER FUNCTIONS =====
+@st.cache_resource
+def get_result_cache():
+    # Shared by every session in this process; entries on disk also survive restarts
+    from cache import DEFAULT_CACHE_DIR, DiskCache
 
-@st.cache_data
-def _brand_logo_data_uri():
-    base_path = os.path.dirname(os.path.abspath(__file__))
-    for name in ("spendsignal-logo.png", "spendsignal-logo.jpg", "spendsignal-logo.svg"):
-        path = os.path.join(base_path, name)
-        if not os.path.exists(path):
-            continue
-        with open(path, "rb") as f:
-            encoded = base64.b64encode(f.read()).decode("ascii")
-        ext = name.rsplit(".", 1)[-1].lower()
-        mime = "image/svg+xml" if ext == "svg" else ("image/png" if ext == "png" else "image/jpeg")
-        # The file committed to the repo is actually a JPEG regardless of extension
-        if ext == "png":
-            with open(path, "rb") as f:
-                header = f.read(4)
-            if header[:3] == b"\xff\xd8\xff":
-                mime = "image/jpeg"
-        return f"data:{mime};base64,{encoded}"
-    return None
+    cache_dir = st.secrets.get("CACHE_DIR", DEFAULT_CACHE_DIR)
+    return DiskCache(os.path.join(cache_dir, "results"), ttl_seconds=int(st.secrets.get("RESULT_CACHE_TTL", 24 * 3600)))
+
+@st.cache_resource
+def get_dataset_cache():
+    from cache import DEFAULT_CACHE_DIR
+    from kaggle import DatasetCache
+
+    cache_dir = st.secrets.get("CACHE_DIR", DEFAULT_CACHE_DIR)
+    return DatasetCache(os.path.join(cache_dir, "kaggle"),
+                        max_bytes=int(st.secrets.get("KAGGLE_CACHE_MB", 512)) * 1024 * 1024,
+                        revalidate_seconds=int(st.secrets.get("KAGGLE_REVALIDATE", 3600)))
+
+@st.cache_resource
+def get_insight_cache():
+    from cache import DEFAULT_CACHE_DIR, DiskCache
+
+    cache_dir = st.secrets.get("CACHE_DIR", DEFAULT_CACHE_DIR)
+    return DiskCache(os.path.join(cache_dir, "insights"), max_entries=1000, max_bytes=16 * 1024 * 1024,
+                     ttl_seconds=int(st.secrets.get("INSIGHT_CACHE_TTL", 24 * 3600)))
+
+@st.cache_resource
+def get_insight_client():
+    # Separate from the engine client so OpenAI failures don't trip the n8n circuit breaker
+    from http_client import HttpClient
+
+    return HttpClient(retries=1, backoff_base=float(st.secrets.get("HTTP_BACKOFF", 0.5)))
+
+@st.cache_resource
+def get_http_client():
+    from http_client import CircuitBreaker, HttpClient
+
+    breaker = CircuitBreaker(failure_threshold=int(st.secrets.get("CIRCUIT_BREAKER_THRESHOLD", 5)),
+                             reset_seconds=float(st.secrets.get("CIRCUIT_BREAKER_RESET", 60)))
+    return HttpClient(retries=int(st.secrets.get("HTTP_RETRIES", 3)),
+                      backoff_base=float(st.secrets.get("HTTP_BACKOFF", 0.5)), breaker=breaker)
+
+@st.cache_resource
+def get_job_manager():
+    return JobManager(max_workers=int(st.secrets.get("JOB_WORKERS", 4)))
+
+# ===== RENDER FUNCTIONS =====
 
 def render_hero():
-    logo_uri = _brand_logo_data_uri()
     logo_html = (
-        f'<img class="brand-logo" src="{logo_uri}" alt="Spendsignal.ai"/>'
-        if logo_uri else
+        f'<img class="brand-logo" src="{LOGO_URI}" alt="Spendsignal.ai"/>'
+        if LOGO_URI else
         '<span class="brand-name">Spendsignal.ai</span>'
     )
     st.markdown(f"""
@@ -572,6 +196,13 @@ def render_hero():
     </div>
     """, unsafe_allow_html=True)
 
+def select_goal(key):
+    # Only the local engine reads rules.json; the n8n workflow's Score & Classify is the ROAS rule set
+    local = st.secrets.get("ANALYSIS_ENGINE", "n8n") == "local"
+    return st.selectbox("Optimization goal", list(GOALS), key=key, disabled=not local,
+                        help=None if local else 'The n8n workflow always applies the Maximize ROAS rules. '
+                                                'Set ANALYSIS_ENGINE = "local" to analyze for another goal.')
+
 def render_demo_tab():
     st.markdown("""
     <div class="section-header">
@@ -581,6 +212,7 @@ def render_demo_tab():
     <p class="section-subtitle">Experience the full power of Spendsignal.ai. No signup required — pick a demo mode and see AI-powered recommendations in action.</p>
     """, unsafe_allow_html=True)
 
+    goal = select_goal("demo_goal")
     col1, col2 = st.columns(2)
 
     with col1:
@@ -607,7 +239,7 @@ def render_demo_tab():
             <h3>Real-time External Data</h3>
             <p class="card-desc">Real-time data pulled from Kaggle public datasets. Demonstrates actual external data integration capabilities.</p>
             <div class="specs">
-                <div class="spec-item"><div class="spec-icon">⏱</div><span>~45–60 seconds to complete</span></div>
+                <div class="spec-item"><div class="spec-icon">⏱</div><span>Time depends on the dataset download</span></div>
                 <div class="spec-item"><div class="spec-icon">📢</div><span>Google Ads dataset</span></div>
                 <div class="spec-item"><div class="spec-icon">🔍</div><span>SEO keyword research data</span></div>
                 <div class="spec-item"><div class="spec-icon">👥</div><span>Marketing funnel records</span></div>
@@ -618,9 +250,9 @@ def render_demo_tab():
         live_demo = st.button("🌐 Run Live Demo", key="live_demo", use_container_width=True)
 
     if quick_demo:
-        run_analysis("synthetic", "Maximize ROAS", 10000)
+        run_analysis("synthetic", goal, 10000)
     elif live_demo:
-        run_analysis("kaggle", "Maximize ROAS", 10000)
+        run_analysis("kaggle", goal, 10000)
 
 def render_upload_tab():
     st.markdown("""
@@ -701,13 +333,16 @@ def render_upload_tab():
     st.markdown(' &nbsp; '.join(status_items), unsafe_allow_html=True)
     st.markdown("")
 
+    goal = select_goal("upload_goal")
     if st.button("🚀 Analyze My Data", use_container_width=True, type="primary", disabled=not ads_file):
-        data = {
-            'ads': parse_csv_file(ads_file, 'ads') if ads_file else [],
-            'seo': parse_csv_file(seo_file, 'seo') if seo_file else [],
-            'crm': parse_csv_file(crm_file, 'crm') if crm_file else []
-        }
-        run_analysis("upload", "Maximize ROAS", 5000, data)
+        timer = new_stage_timer()
+        with timer.stage("csv_parse"):
+            data = {
+                'ads': parse_csv_file(ads_file, 'ads') if ads_file else [],
+                'seo': parse_csv_file(seo_file, 'seo') if seo_file else [],
+                'crm': parse_csv_file(crm_file, 'crm') if crm_file else []
+            }
+        run_analysis("upload", goal, 5000, data, timer=timer)
 
 def render_connect_tab():
     st.markdown("""
@@ -756,6 +391,8 @@ def render_results_tab():
         </div>
         """, unsafe_allow_html=True)
         return
+    from cache import content_key
+    from frames import bucket_length
 
     results = st.session_state.analysis_results
 
@@ -766,6 +403,25 @@ def render_results_tab():
     </div>
     """, unsafe_allow_html=True)
     st.markdown(f"📅 Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')} &nbsp;·&nbsp; 📊 Sources: Ads + SEO + CRM")
+    cache_stats = get_result_cache().stats()
+    http_stats = get_http_client().latency_stats()
+    backend_note = (f" · Engine calls: {http_stats['calls']} (first {http_stats['first']:.1f}s, median {http_stats['median']:.1f}s)"
+                    if http_stats['calls'] else "")
+    st.caption(f"Result cache: {cache_stats['hits']} hits · {cache_stats['misses']} misses · {cache_stats['entries']} stored{backend_note}")
+    source_timings = results.get('source_timings')
+    if source_timings:
+        branches = " · ".join(f"{source.upper()} {branch['total_s']:.1f}s ({branch['cache']})"
+                              for source, branch in source_timings['branches'].items())
+        st.caption(f"Sources loaded in {source_timings['wall_s']:.1f}s, critical path "
+                   f"{source_timings['critical_path'].upper()} (sequential would be {source_timings['sum_s']:.1f}s): {branches}")
+        for source, branch in source_timings['branches'].items():
+            if branch.get('error'):
+                fallback = "the last cached copy" if branch['cache'] == 'stale' else "no rows"
+                st.warning(f"{source.upper()} dataset couldn't be loaded ({branch['error']}), so this report uses {fallback} for it.")
+    matching = results.get('matching')
+    if matching and matching['canonical'] < matching['keywords']:
+        st.caption(f"Keyword matching: {matching['keywords']:,} keywords across sources → {matching['canonical']:,} decision units "
+                   f"({matching['aliased']:,} aliased, {matching['fuzzy']:,} near-duplicate spellings)")
     st.markdown("")
 
     stats = results.get('stats', {})
@@ -782,18 +438,26 @@ def render_results_tab():
 
     st.markdown('<hr class="divider">', unsafe_allow_html=True)
 
+    pending = results.get('ai_insight_source') == "pending"
     ai_insight = results.get('ai_insight', '')
     if ai_insight:
         st.markdown('<div class="ai-insight-box-pro"><div class="insight-header">🤖 AI Executive Summary</div></div>', unsafe_allow_html=True)
-        st.markdown(ai_insight)
+        if pending:
+            render_pending_insight(ai_insight)
+        else:
+            st.markdown(ai_insight)
+        source_note = {"cache": "Reused from an earlier identical analysis.",
+                       "template": "Written from the analysis without the AI model."}.get(results.get('ai_insight_source'))
+        if source_note:
+            st.caption(source_note)
 
     st.markdown('<hr class="divider">', unsafe_allow_html=True)
 
     recommendations = results.get('recommendations', {})
-    stop_count = len(recommendations.get('stop', []))
-    fix_count = len(recommendations.get('fix', []))
-    invest_count = len(recommendations.get('invest', []))
-    observe_count = len(recommendations.get('observe', []))
+    stop_count = bucket_length(recommendations.get('stop', []))
+    fix_count = bucket_length(recommendations.get('fix', []))
+    invest_count = bucket_length(recommendations.get('invest', []))
+    observe_count = bucket_length(recommendations.get('observe', []))
 
     tabs = st.tabs([f"🛑 STOP ({stop_count})", f"🔧 FIX ({fix_count})", f"💰 INVEST ({invest_count})", f"👁 OBSERVE ({observe_count})"])
     with tabs[0]:
@@ -809,30 +473,212 @@ def render_results_tab():
         st.markdown('<div class="rec-header observe">👁 Keep monitoring — not enough data for a confident call yet.</div>', unsafe_allow_html=True)
         render_recommendations_table(recommendations.get('observe', []), "observe")
 
+    results_key = st.session_state.get('results_key') or content_key(results)
+    render_what_if(results, results_key)
+    render_budget_allocation(results, results_key)
+
     st.markdown('<hr class="divider">', unsafe_allow_html=True)
+    if pending:
+        st.caption("📄 The PDF report can be prepared once the AI summary is in.")
+        return
+    pdf_timing = render_pdf_report(results, results_key)
+    render_diagnostics(results, pdf_timing)
+
+@st.fragment(run_every=2)
+def render_pending_insight(template):
+    # Reruns on its own until the job finishes, then reruns the page to swap in the final results
+    job_id = st.session_state.get("job_id") or st.query_params.get("job")
+    job = get_job_manager().get(job_id) if job_id else None
+    if job is not None and not job.active:
+        st.rerun()
+    st.markdown(template)
+    st.caption("⏳ The AI summary is on its way — this is a quick summary of the same numbers until it arrives.")
+
+def render_pdf_report(results, results_key):
+    # Built only once asked for, then reused by every rerun that shows the same results
+    if st.session_state.get('pdf_key') != results_key and not st.button("📄 Prepare PDF Report", use_container_width=True):
+        return None
+    st.session_state.pdf_key = results_key
     try:
-        pdf_buffer = generate_pdf_report(results)
-        st.download_button(label="📥 Download Full PDF Report", data=pdf_buffer, file_name=f"spendsignal_report_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf", mime="application/pdf", use_container_width=True)
+        pdf_bytes, pdf_timing = build_pdf_report(results_key, results)
+        st.download_button(label="📥 Download Full PDF Report", data=pdf_bytes, file_name=f"spendsignal_report_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf", mime="application/pdf", use_container_width=True)
+        return pdf_timing
     except Exception as e:
         st.error(f"Error generating PDF: {e}")
+        return None
+
+def render_diagnostics(results, pdf_timing=None):
+    timings = results.get('timings')
+    if not timings:
+        return
+    timings = dict(timings, stages=timings['stages'] + ([pdf_timing] if pdf_timing else []))
+    with st.expander("⏱ Diagnostics"):
+        if timings.get('cached'):
+            st.caption("Served from the result cache — these are this request's stages, not the original analysis.")
+        total = sum(stage['seconds'] for stage in timings['stages'] if stage['component'] != 'n8n') or 1
+        st.dataframe([{
+            'Stage': stage['stage'],
+            'Where': stage['component'],
+            'Seconds': round(stage['seconds'], 3),
+            'Share': f"{stage['seconds'] / total:.0%}" if stage['component'] != 'n8n' else "",
+            'Peak MB': stage['peak_mb'],
+            'RSS MB': stage['rss_mb'],
+        } for stage in timings['stages']], use_container_width=True, hide_index=True)
+        notes = [f"Total {timings['total_s']:.2f}s"]
+        if any(stage['component'] == 'n8n' for stage in timings['stages']):
+            notes.append("n8n stages run inside the webhook call")
+        if not timings.get('memory_traced'):
+            notes.append("set TRACE_MEMORY = true for per-stage peak memory")
+        st.caption(" · ".join(notes))
+        labels = {"mode": results.get('mode', ''), "goal": results.get('goal', '')}
+        col1, col2 = st.columns(2)
+        col1.download_button("Download JSON log", log_record(timings, **labels) + "\n", file_name="spendsignal_timings.jsonl",
+                             mime="application/json", use_container_width=True)
+        col2.download_button("Download Prometheus metrics", prometheus_text(timings, **labels), file_name="spendsignal_timings.prom",
+                             mime="text/plain", use_container_width=True)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def get_units_frame(results_key, _recommendations):
+    # Shared by the what-if sweep and the budget allocation of the same result set
+    from frames import units_frame
+
+    return units_frame(_recommendations)
+
+@st.cache_data(max_entries=32, show_spinner="🔬 Sweeping thresholds...")
+def get_threshold_sweep(results_key, goal, param, values, _recommendations):
+    # The whole grid is one broadcast pass over the units; moving the slider back is a cache hit
+    from engine import sweep_thresholds
+    from rules import load_rules
+
+    return sweep_thresholds(get_units_frame(results_key, _recommendations), param, values, load_rules(goal))
+
+@st.cache_data(max_entries=32, show_spinner="💸 Allocating budget...")
+def get_budget_allocation(results_key, budget, elasticity, max_scale, _recommendations):
+    from allocation import allocate_budget
+
+    return allocate_budget(get_units_frame(results_key, _recommendations), budget, elasticity, max_scale)
+
+def render_what_if(results, results_key):
+    import numpy as np
+    from rules import load_rules
+
+    with st.expander("🔬 What-if: rule thresholds"):
+        # n8n's Score & Classify always applies the roas rules
+        goal = (results.get('goal') or "roas") if st.secrets.get("ANALYSIS_ENGINE", "n8n") == "local" else "roas"
+        rules = load_rules(goal)
+        params = rules.params
+        col1, col2 = st.columns([2, 3])
+        param = col1.selectbox("Threshold", rules.thresholds, key="whatif_param", format_func=lambda name: name.replace('_', ' '))
+        current = float(params[param])
+        upper = current * 4 or 100.0
+        low, high = col2.slider("Range", 0.0, upper, (0.0, min(current * 2, upper) or upper / 2), key=f"whatif_range_{param}")
+        values = np.linspace(low, high, 41)
+        if low <= current <= high:
+            values = np.union1d(values, [current])
+        sweep = get_threshold_sweep(results_key, goal, param, tuple(values), results.get('recommendations', {}))
+        sweep = sweep.set_index(param)
+        col1, col2 = st.columns(2)
+        col1.caption("Keywords per action")
+        col1.line_chart(sweep[['stop', 'fix', 'invest', 'observe']].rename(columns=str.upper),
+                        color=["#f87171", "#fbbf24", "#34d399", "#94a3b8"])
+        col2.caption("Monthly savings and potential ($)")
+        col2.line_chart(sweep[['total_savings', 'total_potential']].rename(columns={'total_savings': 'Savings', 'total_potential': 'Potential'}))
+        if current in sweep.index:
+            row = sweep.loc[current]
+            st.caption(f"Current {param.replace('_', ' ')} = {current:g}: {row['stop']:,} STOP · {row['fix']:,} FIX · "
+                       f"{row['invest']:,} INVEST · ${row['total_savings']:,} savings. Each point re-scores and "
+                       f"re-classifies every keyword with only this threshold changed.")
+
+def render_budget_allocation(results, results_key):
+    from allocation import ELASTICITY, MAX_SCALE, MIN_RETURN
+
+    with st.expander("💸 Budget reallocation"):
+        col1, col2, col3 = st.columns(3)
+        budget = col1.number_input("Extra budget ($)", min_value=0, value=int(results.get('budget') or 0), step=1000,
+                                   key="alloc_budget")
+        elasticity = col2.slider("Returns curve", 0.3, 0.9, ELASTICITY, 0.05, key="alloc_elasticity",
+                                 help="Revenue grows as spend ^ this: lower means returns fall off faster as a keyword scales")
+        max_scale = col3.slider("Max scale", 1.5, 5.0, MAX_SCALE, 0.5, key="alloc_max_scale",
+                                help="No keyword goes past this multiple of its current spend")
+        allocation, summary = get_budget_allocation(results_key, budget, elasticity, max_scale,
+                                                    results.get('recommendations', {}))
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("To place", f"${summary['pool']:,.0f}", f"${summary['freed_savings']:,.0f} freed by STOP", delta_color="off")
+        col2.metric("Allocated", f"${summary['allocated']:,.0f}", f"{summary['keywords']:,} keywords", delta_color="off")
+        col3.metric("Projected return", f"${summary['projected_return']:,.0f}")
+        col4.metric("Return on moved spend", f"{summary['projected_roi']:.2f}x")
+        if summary['unallocated'] >= 1:
+            st.caption(f"${summary['unallocated']:,.0f} left unplaced: every candidate is at {max_scale:g}x its spend "
+                       f"or would return under ${MIN_RETURN:g} per extra dollar.")
+        if allocation.empty:
+            st.info("No INVEST or FIX keywords with spend and revenue to scale.")
+            return
+        shown = allocation.head(500)
+        st.dataframe(shown, use_container_width=True, hide_index=True, column_config={
+            'keyword': "Keyword", 'action': "Action",
+            'spend': st.column_config.NumberColumn("Spend", format="$%.0f"),
+            'roi': st.column_config.NumberColumn("ROI", format="%.2fx"),
+            'allocation': st.column_config.NumberColumn("Add", format="$%.0f"),
+            'new_spend': st.column_config.NumberColumn("New spend", format="$%.0f"),
+            'projected_return': st.column_config.NumberColumn("Projected return", format="$%.0f"),
+            'marginal_return': st.column_config.NumberColumn("Last $ returns", format="%.2fx"),
+        })
+        shown_note = f"Showing the {len(shown):,} largest of {len(allocation):,} allocations. " if len(shown) < len(allocation) else ""
+        st.caption(f"{shown_note}Dollars go to the highest marginal return first; the last dollar placed returns "
+                   f"{summary['marginal_return']:.2f}x.")
+        st.download_button("Download allocation CSV", allocation.to_csv(index=False), file_name="spendsignal_allocation.csv",
+                           mime="text/csv", use_container_width=True)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def get_recommendations_frame(results_key, action_type, _bucket):
+    # Converted once per result set and bucket; reruns only filter, sort and slice it
+    from frames import recommendations_frame
+
+    return recommendations_frame(_bucket)
 
 def render_recommendations_table(data, action_type):
-    if not data:
+    from cache import content_key
+    from frames import PAGE_SIZES, SORTABLE, bucket_length, confidence_notes, filter_frame, page_frame, row_confidence
+
+    if not bucket_length(data):
         st.info(f"No {action_type.upper()} recommendations in this analysis.")
         return
-    table_data = []
-    for item in data:
-        table_data.append({
-            'Priority': f"P{item.get('classification', {}).get('priority', '-')}",
-            'Keyword': item.get('keyword', ''),
-            'Spend': f"${item.get('ads', {}).get('spend', 0):,.0f}",
-            'Conversions': item.get('ads', {}).get('conversions', 0),
-            'Reason': item.get('classification', {}).get('reason', ''),
-            'Confidence': f"{item.get('confidence', {}).get('score', 0)}%",
-            'Impact': f"${item.get('classification', {}).get('savings', 0) or item.get('classification', {}).get('potential', 0):,.0f}"
-        })
-    df = pd.DataFrame(table_data)
-    st.dataframe(df, use_container_width=True, hide_index=True)
+    results_key = st.session_state.get('results_key') or content_key(st.session_state.analysis_results)
+    frame = get_recommendations_frame(results_key, action_type, data)
+
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    query = col1.text_input("Filter keywords", key=f"rec_query_{action_type}", placeholder="Filter keywords...", label_visibility="collapsed")
+    sort_by = col2.selectbox("Sort by", ["Priority (default)"] + SORTABLE[1:], key=f"rec_sort_{action_type}", label_visibility="collapsed")
+    descending = col3.toggle("Desc", value=True, key=f"rec_desc_{action_type}")
+    page_size = col4.selectbox("Rows", PAGE_SIZES, key=f"rec_rows_{action_type}", label_visibility="collapsed")
+
+    matching = filter_frame(frame, query)
+    pages = max(1, -(-len(matching) // page_size))
+    page = 1
+    if pages > 1:
+        page = min(int(st.number_input(f"Page (of {pages:,})", min_value=1, value=1, key=f"rec_page_{action_type}")), pages)
+    rows = page_frame(matching, None if sort_by.endswith("(default)") else sort_by, descending, page, page_size)
+
+    table = st.dataframe(rows, use_container_width=True, hide_index=True, key=f"rec_table_{action_type}",
+                         on_select="rerun", selection_mode="single-row", column_config={
+        'Priority': st.column_config.NumberColumn(format="P%d"),
+        'Spend': st.column_config.NumberColumn(format="$%d"),
+        'Conversions': st.column_config.NumberColumn(format="%g"),
+        'Confidence': st.column_config.NumberColumn(format="%d%%"),
+        'Impact': st.column_config.NumberColumn(format="$%d"),
+    })
+    first = (page - 1) * page_size + 1 if len(matching) else 0
+    st.caption(f"Showing {first:,}–{min(page * page_size, len(matching)):,} of {len(matching):,} keywords"
+               " · select a row to see what its confidence is based on")
+
+    selected = [i for i in table.selection.rows if i < len(rows)]
+    if selected:
+        # Frame index labels are bucket positions, so only the selected row's flags are expanded
+        confidence = row_confidence(data, int(rows.index[selected[0]]))
+        factors, warnings = confidence_notes(confidence, st.session_state.analysis_results.get('confidence_flags'))
+        st.markdown(f"**{rows['Keyword'].iloc[selected[0]]}** · {confidence.get('score', 0)}% confidence "
+                    f"({confidence.get('level', 'INSUFFICIENT')})")
+        st.caption(" · ".join([f"✓ {factor}" for factor in factors] + [f"⚠ {warning}" for warning in warnings]))
 
 def render_about_tab():
     st.markdown('<div class="section-header"><div class="icon-box" style="background: rgba(59,130,246,0.1);">ℹ️</div><h2>About Spendsignal.ai</h2></div>', unsafe_allow_html=True)
@@ -902,45 +748,177 @@ def render_about_tab():
 
     st.markdown('<div class="app-footer">Version 0.1.0 · © 2026 Spendsignal.ai · All rights reserved</div>', unsafe_allow_html=True)
 
-def run_analysis(mode, goal, budget, data=None):
-    goal_map = {"Maximize ROAS": "roas", "Increase Conversions": "conversions", "Reduce CPA": "cpa", "Scale Traffic": "traffic"}
-    goal_code = goal_map.get(goal, "roas")
+def new_keyword_matcher():
+    # Local engine only: the n8n workflow joins sources on the trimmed, lower-cased keyword
+    mode = st.secrets.get("KEYWORD_MATCHING", "off")
+    if mode == "off":
+        return None
+    from matching import KeywordMatcher
+
+    return KeywordMatcher(mode, aliases=st.secrets.get("KEYWORD_ALIASES"),
+                          threshold=float(st.secrets.get("MATCH_THRESHOLD", 0.7)))
 
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+def new_stage_timer():
+    return StageTimer(trace_memory=bool(st.secrets.get("TRACE_MEMORY", False)))
+
+def export_timings(timings, **labels):
+    # Optional sinks: an appended JSON-lines log and a Prometheus textfile-collector file
+    try:
+        if st.secrets.get("TIMINGS_LOG"):
+            append_log(st.secrets["TIMINGS_LOG"], timings, **labels)
+        if st.secrets.get("TIMINGS_PROM"):
+            write_prometheus(st.secrets["TIMINGS_PROM"], timings, **labels)
+    except OSError:
+        pass
+
+def _analysis_job(job, mode, goal_code, budget, data, use_local, result_cache, cache_key, timer, matcher=None):
+    from engine import run_local_analysis
+    from insights import cached_insight, generate_insight
+    from kaggle import load_kaggle_sources
+
+    response_format = st.secrets.get("RESPONSE_FORMAT", "rows")
+    if use_local and mode == "kaggle":
+        auth = (st.secrets.get("KAGGLE_USERNAME"), st.secrets.get("KAGGLE_KEY"))
+        with timer.stage("kaggle_sources"):
+            sources, timings = load_kaggle_sources(get_http_client(), auth, progress=job.update, store=get_dataset_cache())
+        results = run_local_analysis(None, mode, goal_code, budget, progress=job.update,
+                                     sources=(sources['ads'], sources['seo'], sources['crm']),
+                                     response_format=response_format, timer=timer, matcher=matcher)
+        results['source_timings'] = timings
+        # The sources are current now, so the result can be keyed by their versions
+        cache_key = analysis_cache_key(mode, goal_code, budget, data, use_local, matcher)
+    elif use_local:
+        results = run_local_analysis(data, mode, goal_code, budget, progress=job.update, response_format=response_format,
+                                     timer=timer, matcher=matcher)
+    else:
+        job.update(30, "🔄 Connecting to Spendsignal.ai engine...")
+        with timer.stage("webhook"):
+            results = call_n8n_webhook(mode, data, goal_code, budget, job=job)
+        if results:
+            timer.extend((results.get('timings') or {}).get('stages'))
+    if not results:
+        raise RuntimeError("Analysis failed. Please try again.")
+    if use_local:
+        # n8n writes its own summary; locally the engine's template stands until the model answers
+        insight_mode, api_key, insight_cache = st.secrets.get("INSIGHT_MODE", "llm"), st.secrets.get("OPENAI_API_KEY"), get_insight_cache()
+        if insight_mode == "llm" and api_key and cached_insight(results, insight_cache) is None:
+            job.publish((dict(results, ai_insight_source="pending", timings=timer.as_dict()), cache_key))
+        job.update(90, "🤖 Writing executive summary...")
+        with timer.stage("ai_insight"):
+            results['ai_insight'], results['ai_insight_source'] = generate_insight(
+                results, api_key=api_key, cache=insight_cache, client=get_insight_client(),
+                timeout=float(st.secrets.get("INSIGHT_TIMEOUT", 20)), mode=insight_mode)
+    elif results.get('ai_insight_source') == "pending":
+        # n8n answered with the template and is still asking the model
+        job.publish((dict(results, timings=timer.as_dict()), cache_key))
+        job.update(90, "🤖 Writing executive summary...")
+        with timer.stage("ai_insight"):
+            results['ai_insight'], results['ai_insight_source'] = fetch_n8n_insight(results)
+    results['timings'] = timer.as_dict()
+    export_timings(results['timings'], mode=mode, goal=goal_code, engine="local" if use_local else "n8n")
+    job.update(95, "💾 Saving results...")
+    if results.get('success', True) and cache_key:
+        result_cache.set(cache_key, results)
+    return results, cache_key
+
+def analysis_cache_key(mode, goal_code, budget, data, use_local, matcher=None):
+    """Result-cache key for a run, or None when a cached result can't be trusted yet."""
+    from cache import content_key
+    from rules import load_rules
+
+    # Edited thresholds in rules.json change the local engine's results, so they're part of the key
+    rules = json.dumps(load_rules(goal_code).definition, sort_keys=True) if use_local else None
+    dataset_version = None
+    if mode == "kaggle" and use_local:
+        # data is None here, so the dataset versions stand in for it. While any source is due
+        # for revalidation there is no key: the job checks the sources first and keys the result then.
+        dataset_version = get_dataset_cache().validators()
+        if dataset_version is None:
+            return None
+    elif mode == "kaggle":
+        # n8n downloads the datasets itself; reuse its result for one revalidation window at most
+        dataset_version = int(time.time() // int(st.secrets.get("KAGGLE_REVALIDATE", 3600)))
+    return content_key("local" if use_local else "n8n", mode, goal_code, budget, data,
+                       st.secrets.get("RESPONSE_FORMAT", "rows"), st.secrets.get("INSIGHT_MODE", "llm"),
+                       matcher.config() if matcher else None, rules, dataset_version)
+
+def run_analysis(mode, goal, budget, data=None, timer=None):
+    goal_code = GOALS.get(goal, "roas")
+    timer = timer or new_stage_timer()
 
     if mode == "synthetic":
-        status_text.text("⚡ Loading synthetic demo data...")
-        progress_bar.progress(10)
-        synthetic_data = load_synthetic_data()
+        with timer.stage("load_data"):
+            synthetic_data = load_synthetic_data()
         if synthetic_data is None:
             st.error("Failed to load synthetic data")
             return
         data = synthetic_data
-        progress_bar.progress(30)
-
-    status_text.text("🔄 Connecting to Spendsignal.ai engine...")
-    progress_bar.progress(40)
-    status_text.text("🧠 Running AI analysis (this may take 30-60 seconds)...")
-    progress_bar.progress(50)
-
-    results = call_n8n_webhook(mode, data, goal_code, budget)
-
-    if results:
-        progress_bar.progress(90)
-        status_text.text("✅ Analysis complete!")
-        time.sleep(0.5)
-        progress_bar.progress(100)
-        status_text.empty()
-        progress_bar.empty()
-        st.session_state.analysis_results = results
-        st.session_state.active_tab = "results"
-        st.session_state.show_results_inline = True
+
+    use_local = st.secrets.get("ANALYSIS_ENGINE", "n8n") == "local"
+    matcher = new_keyword_matcher() if use_local else None
+    result_cache = get_result_cache()
+    with timer.stage("cache_lookup"):
+        cache_key = analysis_cache_key(mode, goal_code, budget, data, use_local, matcher)
+        results = result_cache.get(cache_key) if cache_key else None
+    if results is not None:
+        show_analysis_results(dict(results, timings=dict(timer.as_dict(), cached=True)), cache_key)
         st.rerun()
+
+    job_id = get_job_manager().submit(_analysis_job, mode, goal_code, budget, data, use_local, result_cache, cache_key, timer,
+                                      matcher)
+    st.session_state.job_id = job_id
+    st.session_state.poll_delay = 0.5
+    # Lets a reloaded page pick the same job back up
+    st.query_params["job"] = job_id
+    st.rerun()
+
+def show_analysis_results(results, cache_key):
+    st.session_state.analysis_results = results
+    st.session_state.results_key = cache_key
+    st.session_state.active_tab = "results"
+    st.session_state.show_results_inline = True
+
+def _clear_job():
+    st.session_state.job_id = None
+    if "job" in st.query_params:
+        del st.query_params["job"]
+
+def poll_analysis_job():
+    """Show the running job's progress. Returns True while the page should keep polling."""
+    job_id = st.session_state.get("job_id") or st.query_params.get("job")
+    if not job_id:
+        return False
+    job = get_job_manager().get(job_id)
+    if job is None:
+        _clear_job()
+        return False
+    if job.active and job.partial is not None:
+        # The recommendations are in; render_pending_insight() waits for the summary
+        if st.session_state.get("partial_shown") != job_id:
+            st.session_state.partial_shown = job_id
+            show_analysis_results(*job.partial)
+        return False
+    if job.active:
+        st.progress(job.progress, text=job.message)
+        return True
+    _clear_job()
+    if job.status == DONE:
+        results, cache_key = job.result
+        show_analysis_results(results, cache_key)
+    elif job.partial is not None:
+        # Failed after the recommendations were shown: they still stand, with the template summary
+        results, cache_key = job.partial
+        show_analysis_results(dict(results, ai_insight_source="template"), cache_key)
     else:
-        progress_bar.empty()
-        status_text.empty()
-        st.error("Analysis failed. Please try again.")
+        st.error(job.error)
+    return False
+
+def wait_for_next_poll():
+    # Back off from 0.5 s to 4 s between polls so long analyses don't spin the script
+    delay = st.session_state.get("poll_delay", 0.5)
+    st.session_state.poll_delay = min(delay * 1.5, 4.0)
+    time.sleep(delay)
+    st.rerun()
 
 # ===== MAIN =====
 
@@ -951,8 +929,11 @@ def main():
         st.session_state.active_tab = "demo"
     if 'show_results_inline' not in st.session_state:
         st.session_state.show_results_inline = False
+    if 'job_id' not in st.session_state:
+        st.session_state.job_id = None
 
     render_hero()
+    job_running = poll_analysis_job()
 
     # If we just completed an analysis, show results directly
     if st.session_state.show_results_inline and st.session_state.analysis_results:
@@ -974,5 +955,8 @@ def main():
     with tab_results: render_results_tab()
     with tab_about: render_about_tab()
 
+    if job_running:
+        wait_for_next_poll()
+
 if __name__ == "__main__":
     main()
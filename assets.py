@@ -0,0 +1,69 @@
+"""
+Spendsignal.ai - Static assets
+The theme stylesheet and logo data URI, bundled ahead of time into static/bundle.json.
+
+    python assets.py
+
+rebuilds the bundle after static/theme.css or the logo changes. The app reads it once per
+process; if the bundle is missing or older than its sources, it is built in memory instead.
+"""
+
+import base64
+import json
+import os
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+THEME_PATH = os.path.join(ROOT, 'static', 'theme.css')
+BUNDLE_PATH = os.path.join(ROOT, 'static', 'bundle.json')
+LOGO_NAMES = ('spendsignal-logo.png', 'spendsignal-logo.jpg', 'spendsignal-logo.svg')
+
+
+def _logo_path():
+    for name in LOGO_NAMES:
+        path = os.path.join(ROOT, name)
+        if os.path.exists(path):
+            return path
+    return None
+
+def logo_data_uri(path):
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if path.endswith('.svg'):
+        mime = 'image/svg+xml'
+    # Sniffed rather than trusted: the committed spendsignal-logo.png is actually a JPEG
+    elif raw[:3] == b'\xff\xd8\xff':
+        mime = 'image/jpeg'
+    else:
+        mime = 'image/png'
+    return f"data:{mime};base64,{base64.b64encode(raw).decode('ascii')}"
+
+def build_bundle():
+    with open(THEME_PATH, encoding='utf-8') as f:
+        css = f.read()
+    logo = _logo_path()
+    return {'style': f'<style>\n{css}</style>', 'logo_uri': logo_data_uri(logo) if logo else None}
+
+def write_bundle(path=BUNDLE_PATH):
+    bundle = build_bundle()
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(bundle, f)
+    return bundle
+
+def load_bundle(path=BUNDLE_PATH):
+    sources = [THEME_PATH] + [p for p in [_logo_path()] if p]
+    try:
+        if os.path.getmtime(path) >= max(os.path.getmtime(source) for source in sources):
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+    return build_bundle()
+
+# Module state survives Streamlit reruns, so the bundle is read once per process
+BUNDLE = load_bundle()
+THEME_STYLE = BUNDLE['style']
+LOGO_URI = BUNDLE['logo_uri']
+
+if __name__ == '__main__':
+    bundle = write_bundle()
+    print(f"{os.path.relpath(BUNDLE_PATH)}: {len(bundle['style']):,} chars of CSS, logo {'embedded' if bundle['logo_uri'] else 'missing'}")
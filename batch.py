@@ -0,0 +1,163 @@
+"""
+Spendsignal.ai - Batch analysis
+Headless, multi-account entry point: one process per core, each account's ads/seo/crm CSVs
+mapped and scored exactly as an upload is.
+
+    python batch.py ACCOUNTS_DIR_OR_MANIFEST.csv --out results/ [--workers N] [--no-pdf]
+                    [--insight llm|template] [--ai-concurrency N] [--matching fuzzy --aliases aliases.json]
+                    [--goal cpa] [--rules rules.json]
+
+A directory holds one sub-directory per account with CSVs whose names contain ads / seo / crm.
+A manifest is a CSV with account,ads,seo,crm columns (paths relative to the manifest; blank
+cells for missing sources).
+
+With OPENAI_API_KEY set, each account's executive summary comes from the model, with at most
+--ai-concurrency requests in flight across all workers and identical prompts answered from
+the shared insight cache.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from cache import DEFAULT_CACHE_DIR, DiskCache
+from engine import run_local_analysis
+from ingest import read_csv_source
+from insights import generate_insight
+from matching import MODES, KeywordMatcher
+from rules import load_rules
+
+SOURCES = ('ads', 'seo', 'crm')
+INSIGHT_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, 'insights')
+
+# Set in each worker by _init_worker: bounds model requests across the whole pool
+_llm_limit = None
+
+
+def _init_worker(limit):
+    global _llm_limit
+    _llm_limit = limit
+
+
+def discover_accounts(path):
+    """Return [{'account': name, 'ads': path or None, 'seo': ..., 'crm': ...}]."""
+    if os.path.isfile(path):
+        base = os.path.dirname(os.path.abspath(path))
+        manifest = pd.read_csv(path, dtype=str, keep_default_na=False)
+        return [{'account': row['account'],
+                 **{source: os.path.join(base, row[source]) if row.get(source) else None for source in SOURCES}}
+                for row in manifest.to_dict('records')]
+    accounts = []
+    for name in sorted(os.listdir(path)):
+        directory = os.path.join(path, name)
+        if not os.path.isdir(directory):
+            continue
+        files = sorted(f for f in os.listdir(directory) if f.lower().endswith('.csv'))
+        account = {'account': name}
+        for source in SOURCES:
+            match = next((f for f in files if source in f.lower()), None)
+            account[source] = os.path.join(directory, match) if match else None
+        if any(account[source] for source in SOURCES):
+            accounts.append(account)
+    return accounts
+
+def analyze_account(account, out_dir, goal='roas', budget=10000, response_format='rows', pdf=True,
+                    insight='llm', insight_timeout=20, insight_cache=INSIGHT_CACHE_DIR, matching='off', aliases=None,
+                    rules=None):
+    """Worker: map, score and write one account. Returns a stats dict (never raises)."""
+    started = time.perf_counter()
+    stats = {'account': account['account'], 'ok': False}
+    try:
+        data = {source: read_csv_source(account[source], source) for source in SOURCES if account[source]}
+        stats['rows'] = {source: len(frame) for source, frame in data.items()}
+        matcher = KeywordMatcher(matching, aliases) if matching != 'off' else None
+        results = run_local_analysis(data, 'upload', goal, budget, response_format=response_format, matcher=matcher,
+                                     rules=load_rules(goal, rules))
+        results['ai_insight'], results['ai_insight_source'] = generate_insight(
+            results, api_key=os.environ.get('OPENAI_API_KEY'), cache=DiskCache(insight_cache, max_entries=1000),
+            timeout=insight_timeout, mode=insight, limit=_llm_limit)
+        target = os.path.join(out_dir, account['account'])
+        os.makedirs(target, exist_ok=True)
+        with open(os.path.join(target, 'results.json'), 'w', encoding='utf-8') as f:
+            json.dump(results, f)
+        if pdf:
+            from report import generate_pdf_report
+            with open(os.path.join(target, 'report.pdf'), 'wb') as f:
+                f.write(generate_pdf_report(results).getvalue())
+        stats.update(ok=True, keywords=results['stats']['total_units'], summary=results['summary'],
+                     insight=results['ai_insight_source'])
+    except Exception as e:
+        stats['error'] = f"{e.__class__.__name__}: {e}"
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+def run_batch(accounts, out_dir, workers=None, progress=print, ai_concurrency=4, **options):
+    """Analyze accounts across a process pool; returns the throughput summary."""
+    os.makedirs(out_dir, exist_ok=True)
+    started = time.perf_counter()
+    done = []
+    limit = multiprocessing.get_context().BoundedSemaphore(ai_concurrency)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker, initargs=(limit,)) as pool:
+        futures = [pool.submit(analyze_account, account, out_dir, **options) for account in accounts]
+        for future in as_completed(futures):
+            stats = future.result()
+            done.append(stats)
+            status = f"{stats['keywords']:,} keywords" if stats['ok'] else stats['error']
+            progress(f"[{len(done)}/{len(accounts)}] {stats['account']}: {status} ({stats['seconds']:.1f}s)")
+    wall = time.perf_counter() - started
+    summary = {
+        'accounts': len(done),
+        'failed': sum(not stats['ok'] for stats in done),
+        'workers': workers or os.cpu_count(),
+        'wall_s': wall,
+        'accounts_per_minute': len(done) / wall * 60 if wall else 0.0,
+        'account_seconds': sum(stats['seconds'] for stats in done),
+        'insights': dict(Counter(stats['insight'] for stats in done if stats['ok'])),
+        'results': sorted(done, key=lambda stats: stats['account']),
+    }
+    with open(os.path.join(out_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze many accounts' ads/seo/crm CSVs in parallel.")
+    parser.add_argument('accounts', help="directory of account folders, or a manifest CSV")
+    parser.add_argument('--out', default='batch_results')
+    parser.add_argument('--workers', type=int, help="processes (default: one per core)")
+    parser.add_argument('--goal', default='roas', help="rule set to classify with (roas, conversions, cpa, traffic)")
+    parser.add_argument('--rules', help="rules JSON to use instead of the bundled rules.json")
+    parser.add_argument('--budget', type=float, default=10000)
+    parser.add_argument('--format', choices=['rows', 'columnar'], default='rows')
+    parser.add_argument('--no-pdf', action='store_true')
+    parser.add_argument('--insight', choices=['llm', 'template'], default='llm',
+                        help="executive summary from the model (needs OPENAI_API_KEY) or the template")
+    parser.add_argument('--insight-timeout', type=float, default=20, help="seconds before falling back to the template")
+    parser.add_argument('--ai-concurrency', type=int, default=4, help="model requests in flight across all workers")
+    parser.add_argument('--matching', choices=['off'] + MODES, default='off',
+                        help="merge keyword variants across sources into one decision unit")
+    parser.add_argument('--aliases', help="JSON file of {alias: keyword} applied before matching")
+    args = parser.parse_args(argv)
+    try:
+        load_rules(args.goal, args.rules)
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f"rules: {e}")
+
+    accounts = discover_accounts(args.accounts)
+    if not accounts:
+        parser.error(f"no accounts found in {args.accounts}")
+    summary = run_batch(accounts, args.out, args.workers, ai_concurrency=args.ai_concurrency, goal=args.goal,
+                        budget=args.budget, response_format=args.format, pdf=not args.no_pdf, insight=args.insight,
+                        insight_timeout=args.insight_timeout, matching=args.matching, aliases=args.aliases,
+                        rules=args.rules)
+    print(f"{summary['accounts']} accounts ({summary['failed']} failed) in {summary['wall_s']:.1f}s "
+          f"with {summary['workers']} workers: {summary['accounts_per_minute']:.1f} accounts/min")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Spendsignal.ai - Synthetic dataset generator
+Seeded ads / SEO / CRM exports at any scale, shaped like data/synthetic_*.json.
+
+    python benchmarks/generate.py 100000 --out bench_data/ [--seo-overlap 0.6] [--crm-overlap 0.3]
+
+Keywords are split into ads-only, shared and SEO/CRM-only sets by the overlap fractions, and
+ads / CRM keywords get several rows each (days, landing pages) so aggregation has work to do.
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+MODIFIERS = ['best', 'cheap', 'buy', 'online', 'near me', 'sale', 'reviews', 'vs', 'for women', 'for men',
+             'discount', 'free shipping', 'how to choose', 'top rated', '2026', 'wholesale']
+PRODUCTS = ['running shoes', 'yoga mat', 'protein powder', 'water bottle', 'fitness tracker', 'hiking boots',
+            'gym bag', 'resistance bands', 'foam roller', 'cycling shorts', 'trail socks', 'sports bra',
+            'jump rope', 'kettlebell', 'rowing machine', 'tennis racket']
+CAMPAIGNS = ['Brand - Footwear', 'Generic - Fitness', 'Shopping - Apparel', 'Search - Equipment', 'Retargeting']
+COMPETITION = np.array(['low', 'medium', 'high'])
+STAGES = np.array(['lead', 'mql', 'sql', 'won', 'lost'])
+
+
+def keyword_names(count, rng):
+    """Distinct, realistic-looking keywords: product + modifier, then a numeric long tail."""
+    base = [f'{m} {p}' for p in PRODUCTS for m in MODIFIERS] + PRODUCTS
+    names = np.array(base[:count] + [f'{base[i % len(base)]} {i // len(base)}' for i in range(len(base), count)],
+                     dtype=object)
+    rng.shuffle(names)
+    return names
+
+def generate(keywords, seed=0, seo_overlap=0.6, crm_overlap=0.3, rows_per_keyword=3):
+    """Return {'ads': DataFrame, 'seo': DataFrame, 'crm': DataFrame}.
+
+    seo_overlap / crm_overlap are the fractions of ads keywords that also appear in SEO / CRM;
+    SEO and CRM also get their own keywords (a third of the ads count each) that ads never sees.
+    """
+    rng = np.random.default_rng(seed)
+    names = keyword_names(int(keywords * (1 + 2 / 3)) + 1, rng)
+    ads_kw = names[:keywords]
+    extra = (len(names) - keywords) // 2
+    seo_kw = np.concatenate([ads_kw[rng.random(keywords) < seo_overlap], names[keywords:keywords + extra]])
+    crm_kw = np.concatenate([ads_kw[rng.random(keywords) < crm_overlap], names[keywords + extra:]])
+
+    # Ads: 1..2*rows_per_keyword daily rows per keyword, heavy-tailed spend, CTR and CVR per keyword
+    repeats = rng.integers(1, 2 * rows_per_keyword, keywords)
+    idx = np.repeat(np.arange(keywords), repeats)
+    n = len(idx)
+    impressions = rng.lognormal(6.5, 1.3, n).astype(np.int64)
+    ctr = rng.beta(2, 60, keywords)[idx]
+    clicks = rng.binomial(impressions, ctr)
+    cpc = rng.lognormal(0, 0.6, keywords)[idx]
+    cvr = rng.beta(1.2, 40, keywords)[idx]
+    conversions = rng.binomial(clicks, cvr)
+    aov = rng.lognormal(4.2, 0.7, keywords)[idx]
+    ads = pd.DataFrame({
+        'keyword': ads_kw[idx],
+        'campaign': np.array(CAMPAIGNS, dtype=object)[rng.integers(0, len(CAMPAIGNS), keywords)][idx],
+        'impressions': impressions,
+        'clicks': clicks,
+        'spend': np.round(clicks * cpc, 2),
+        'conversions': conversions,
+        'revenue': np.round(conversions * aov, 2),
+    })
+
+    # SEO: one row per keyword, Zipf-ish volumes
+    volume = (rng.pareto(1.1, len(seo_kw)) * 800).astype(np.int64)
+    seo = pd.DataFrame({
+        'keyword': seo_kw,
+        'volume': volume,
+        'cpc': np.round(rng.lognormal(0.3, 0.6, len(seo_kw)), 2),
+        'competition': COMPETITION[rng.choice(3, len(seo_kw), p=[0.3, 0.45, 0.25])],
+        'score': rng.integers(10, 100, len(seo_kw)),
+    })
+
+    # CRM: a few landing-page rows per origin
+    repeats = rng.integers(1, rows_per_keyword + 1, len(crm_kw))
+    idx = np.repeat(np.arange(len(crm_kw)), repeats)
+    leads = rng.poisson(rng.gamma(1.5, 3, len(crm_kw))[idx])
+    qualified = rng.binomial(leads, rng.beta(2, 4, len(crm_kw))[idx])
+    crm = pd.DataFrame({
+        'origin': crm_kw[idx],
+        'landing_page': '/' + pd.Series(crm_kw[idx]).str.replace(' ', '-').to_numpy(dtype=object),
+        'leads': leads,
+        'qualified_leads': qualified,
+        'revenue': np.round(qualified * rng.lognormal(6, 0.8, len(idx)), 2),
+        'stage': STAGES[rng.integers(0, len(STAGES), len(idx))],
+    })
+    return {'ads': ads, 'seo': seo, 'crm': crm}
+
+def write(datasets, directory, fmt='csv'):
+    """Write each source as <directory>/<source>.csv (or .json records); returns the paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for source, frame in datasets.items():
+        path = os.path.join(directory, f'{source}.{fmt}')
+        if fmt == 'json':
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(frame.to_dict('records'), f, default=lambda v: v.item())
+        else:
+            frame.to_csv(path, index=False)
+        paths[source] = path
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate seeded ads/seo/crm datasets.")
+    parser.add_argument('keywords', type=int, help="distinct ads keywords")
+    parser.add_argument('--out', default='bench_data')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--seo-overlap', type=float, default=0.6)
+    parser.add_argument('--crm-overlap', type=float, default=0.3)
+    parser.add_argument('--rows-per-keyword', type=int, default=3)
+    parser.add_argument('--format', choices=['csv', 'json'], default='csv')
+    args = parser.parse_args(argv)
+    datasets = generate(args.keywords, args.seed, args.seo_overlap, args.crm_overlap, args.rows_per_keyword)
+    for source, path in write(datasets, args.out, args.format).items():
+        print(f"{path}: {len(datasets[source]):,} rows")
+
+if __name__ == '__main__':
+    main()
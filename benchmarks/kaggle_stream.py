@@ -0,0 +1,54 @@
+"""
+Spendsignal.ai - Kaggle streaming benchmark
+Rows, rows/s and peak memory of kaggle.stream_source on a downloaded dataset zip.
+
+    python benchmarks/kaggle_stream.py crm marketing-funnel-olist.zip [--chunk-rows 50000]
+
+Download the zip from Kaggle first (kaggle datasets download olistbr/marketing-funnel-olist).
+Each run is a fresh process, so peak RSS is the parse's own and not left over from earlier runs.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = f"""
+import json, resource, sys, time
+sys.path.insert(0, {ROOT!r})
+from kaggle import stream_source
+source, path, chunk_rows = sys.argv[1], sys.argv[2], int(sys.argv[3])
+before_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+started = time.perf_counter()
+frame, rows = stream_source(source, path, chunk_rows)
+seconds = time.perf_counter() - started
+print(json.dumps({{'rows': rows, 'keywords': len(frame), 'seconds': seconds, 'baseline_mb': before_mb,
+                  'peak_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+
+def run(source, path, chunk_rows):
+    output = subprocess.run([sys.executable, '-c', CHILD, source, path, str(chunk_rows)],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+def main(argv=None):
+    from kaggle import CHUNK_ROWS, DATASETS
+
+    parser = argparse.ArgumentParser(description="Time kaggle.stream_source on a dataset zip.")
+    parser.add_argument('source', choices=list(DATASETS))
+    parser.add_argument('zip', help="the dataset zip as downloaded from Kaggle")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    row = run(args.source, os.path.abspath(args.zip), args.chunk_rows)
+    print(f"{row['rows']:,} rows → {row['keywords']:,} keywords in {row['seconds']:.2f}s "
+          f"({row['rows'] / row['seconds']:,.0f} rows/s), peak RSS {row['peak_mb']:.0f} MB "
+          f"({row['baseline_mb']:.0f} MB after imports)")
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    main()
@@ -0,0 +1,60 @@
+"""
+Spendsignal.ai - Keyword matching benchmark
+Fuzzy matching time and recall as the keyword count grows.
+
+    python benchmarks/keyword_matching.py [keywords ...]
+
+Generated keywords get misspelled copies (one doubled letter in a 4+ letter word) for 5% of
+them; recall is the share of copies folded back onto their original.
+"""
+
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate import keyword_names  # noqa: E402
+from matching import KeywordMatcher  # noqa: E402
+
+
+def misspell(keyword, rng):
+    words = keyword.split()
+    long_words = [i for i, word in enumerate(words) if len(word) > 3 and word.isalpha()]
+    if not long_words:
+        return None
+    i = rng.choice(long_words)
+    j = rng.randrange(len(words[i]))
+    words[i] = words[i][:j] + words[i][j] + words[i][j:]
+    return ' '.join(words)
+
+def run(keywords, seed=0):
+    names = list(keyword_names(keywords, np.random.default_rng(seed)))
+    rng = random.Random(seed)
+    copies = {}
+    for name in rng.sample(names, keywords // 20):
+        copy = misspell(name, rng)
+        if copy and copy not in copies and copy not in names:
+            copies[copy] = name
+    started = time.perf_counter()
+    mapping, counts = KeywordMatcher('fuzzy').match(names + list(copies))
+    seconds = time.perf_counter() - started
+    originals = set(names)
+    return {
+        'keywords': counts['keywords'],
+        'seconds': seconds,
+        'recall': sum(mapping.get(copy) == name for copy, name in copies.items()) / max(len(copies), 1),
+        'false_merges': sum(keyword in originals for keyword in mapping),
+    }
+
+def main(argv):
+    print(f"{'keywords':>10}{'time':>10}{'recall':>10}{'false merges':>15}")
+    for keywords in [int(arg) for arg in argv] or [1_000, 10_000, 100_000]:
+        row = run(keywords)
+        print(f"{row['keywords']:>10,}{row['seconds']:>9.2f}s{row['recall']:>10.0%}{row['false_merges']:>15,}")
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
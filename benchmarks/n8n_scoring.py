@@ -0,0 +1,105 @@
+"""
+Spendsignal.ai - n8n scoring benchmark
+Runs the workflow's scoring nodes (everything between Aggregate Data and AI: Check Cache) under
+Node.js on generated data, and times each node's code and the JSON hop into it.
+
+    python benchmarks/n8n_scoring.py 10000 100000 [--baseline old_workflow.json]
+
+n8n serializes a node's output items before the next node sees them, so every extra node
+re-encodes the whole decision_units array. To compare against an earlier workflow, export it
+first (git show <commit>:n8n/workflow_webhook.json > old_workflow.json); both then run on the
+same input and their responses must be identical apart from timestamps and timings.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from generate import generate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKFLOW = os.path.join(ROOT, 'n8n', 'workflow_webhook.json')
+
+# Runs Parse Input → Parse Uploaded Data → Aggregate Data, then each scoring node with its input
+# round-tripped through JSON the way n8n hands items between nodes
+DRIVER = r"""
+const fs = require('fs');
+const [, bodyPath, workflowPath] = process.argv;
+const body = JSON.parse(fs.readFileSync(bodyPath));
+const seconds = since => Number(process.hrtime.bigint() - since) / 1e9;
+const result = (() => {
+  const wf = JSON.parse(fs.readFileSync(workflowPath));
+  const code = name => wf.nodes.find(n => n.name === name).parameters.jsCode;
+  const next = name => wf.connections[name].main[0][0].node;
+  const outputs = {};
+  const run = (name, items) => {
+    const $ = n => ({ first: () => outputs[n][0], all: () => outputs[n] });
+    const $input = { all: () => items, first: () => items[0] };
+    outputs[name] = new Function('$input', '$', '$getWorkflowStaticData', code(name))($input, $, () => ({}));
+    return outputs[name];
+  };
+  let items = run('Parse Uploaded Data', run('Parse Input', [{ json: { body } }]));
+  items = run('Aggregate Data', items);
+  const nodes = [];
+  for (let name = next('Aggregate Data'); ; name = next(name)) {
+    let started = process.hrtime.bigint();
+    const encoded = JSON.stringify(items);
+    items = JSON.parse(encoded);
+    const hop_s = seconds(started);
+    if (name === 'AI: Check Cache') {
+      nodes.push({ node: '(hop to AI: Check Cache)', hop_s, hop_mb: encoded.length / 1e6, code_s: 0 });
+      break;
+    }
+    started = process.hrtime.bigint();
+    items = run(name, items);
+    nodes.push({ node: name, hop_s, hop_mb: encoded.length / 1e6, code_s: seconds(started) });
+  }
+  // context and timings carry this run's clock
+  const { context, timings, ...response } = items[0].json;
+  return { nodes, response };
+})();
+process.stdout.write(JSON.stringify(result));
+"""
+
+
+def run_workflows(keywords, workflows, seed=0):
+    datasets = generate(keywords, seed)
+    body = {'mode': 'upload', 'data': {source: frame.to_dict('records') for source, frame in datasets.items()}}
+    with tempfile.TemporaryDirectory() as tmp:
+        body_path = os.path.join(tmp, 'body.json')
+        with open(body_path, 'w', encoding='utf-8') as f:
+            json.dump(body, f)
+        # A fresh process per workflow, so neither inherits the other's heap or JIT state
+        return [json.loads(subprocess.run(['node', '--max-old-space-size=8192', '-e', DRIVER, '--', body_path, workflow],
+                                          capture_output=True, text=True, check=True).stdout)
+                for workflow in workflows]
+
+def print_nodes(label, nodes):
+    print(f"  {label}")
+    for row in nodes:
+        print(f"    {row['node']:<34}{row['hop_mb']:>9.1f} MB{row['hop_s']:>9.2f}s hop{row['code_s']:>9.2f}s code")
+    print(f"    {'total':<34}{sum(r['hop_mb'] for r in nodes):>9.1f} MB"
+          f"{sum(r['hop_s'] for r in nodes):>9.2f}s hop{sum(r['code_s'] for r in nodes):>9.2f}s code")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the n8n scoring nodes and the JSON hops between them.")
+    parser.add_argument('keywords', nargs='*', type=int, default=[10_000, 100_000])
+    parser.add_argument('--baseline', help="an earlier workflow export to compare against")
+    args = parser.parse_args(argv)
+
+    workflows = [WORKFLOW] + ([args.baseline] if args.baseline else [])
+    for keywords in args.keywords:
+        results = run_workflows(keywords, workflows)
+        print(f"{keywords:,} keywords")
+        print_nodes('current', results[0]['nodes'])
+        if args.baseline:
+            print_nodes('baseline', results[1]['nodes'])
+            if results[0]['response'] != results[1]['response']:
+                sys.exit("The current workflow's response differs from the baseline's")
+            print("  responses identical")
+
+if __name__ == '__main__':
+    main()
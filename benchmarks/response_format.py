@@ -0,0 +1,80 @@
+"""
+Spendsignal.ai - Response format benchmark
+Size and decode time of the analysis response as nested rows, columnar JSON and Arrow IPC.
+
+    python benchmarks/response_format.py [keywords ...]
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import run_local_analysis  # noqa: E402
+from frames import recommendations_frame  # noqa: E402
+from generate import generate  # noqa: E402
+
+
+def to_arrow(recommendations):
+    # One IPC stream per bucket, written back to back
+    sink = pa.BufferOutputStream()
+    for bucket in recommendations.values():
+        table = pa.table(bucket) if bucket else pa.table({})
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def from_arrow(payload, names):
+    reader = pa.BufferReader(payload)
+    buckets = {}
+    for name in names:
+        table = pa.ipc.open_stream(reader).read_all()
+        buckets[name] = table.to_pydict()
+    return buckets
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, value
+
+def run(keywords):
+    data = generate(keywords)
+    rows = run_local_analysis(data)['recommendations']
+    columns = run_local_analysis(data, response_format='columnar')['recommendations']
+    names = list(rows)
+
+    results = []
+    for label, payload, decode in [
+        ('rows (json)', json.dumps(rows).encode('utf-8'), lambda p: json.loads(p)),
+        ('columnar (json)', json.dumps(columns).encode('utf-8'), lambda p: json.loads(p)),
+        ('columnar (arrow ipc)', to_arrow(columns), lambda p: from_arrow(p, names)),
+    ]:
+        decode_s, decoded = timed(lambda: decode(payload))
+        frame_s, _ = timed(lambda: [recommendations_frame(bucket) for bucket in decoded.values()])
+        results.append({
+            'format': label,
+            'bytes': len(payload),
+            'gzip_bytes': len(gzip.compress(payload, 6)),
+            'decode_s': decode_s,
+            'table_s': frame_s,
+        })
+    return results
+
+def main(argv):
+    for keywords in [int(arg) for arg in argv] or [10_000, 100_000]:
+        print(f"\n{keywords:,} keywords")
+        print(f"{'format':<22}{'size':>10}{'gzip':>10}{'decode':>10}{'tables':>10}")
+        for row in run(keywords):
+            print(f"{row['format']:<22}{row['bytes'] / 1e6:>8.1f}MB{row['gzip_bytes'] / 1e6:>8.1f}MB"
+                  f"{row['decode_s'] * 1000:>8.0f}ms{row['table_s'] * 1000:>8.0f}ms")
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,72 @@
+"""
+Spendsignal.ai - Rule engine benchmark
+Compile time and vectorized evaluation time of each goal's rule set over generated keywords.
+
+    python benchmarks/rule_engine.py [keywords ...] [--goal cpa ...]
+
+'masks' is evaluating the score rules and the first-match action rules over whole columns;
+'score' and 'classify' are the engine stages around them, which also fill the units frame
+and format each row's reason text.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine import (RuleColumns, build_decision_units, calculate_confidence, classify_actions,  # noqa: E402
+                    normalize_ads, normalize_crm, normalize_seo, score_units)
+from generate import generate  # noqa: E402
+from rules import RULES_PATH, RuleSet  # noqa: E402
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    value = fn(*args)
+    return value, time.perf_counter() - started
+
+def run(keywords, goals, seed=0):
+    datasets = generate(keywords, seed)
+    units = build_decision_units(normalize_ads(datasets['ads']), normalize_seo(datasets['seo']),
+                                 normalize_crm(datasets['crm']))
+    with open(RULES_PATH, encoding='utf-8') as f:
+        spec = json.load(f)
+    rows = []
+    for goal in goals:
+        rules, compile_s = timed(RuleSet, spec, goal)
+        scored, score_s = timed(score_units, units.copy(), rules)
+        scored = calculate_confidence(scored)
+        columns = RuleColumns(scored)
+        # Column conversion is a one-off per frame; time the masks alone
+        for name in ('spend', 'cpa', 'competition', 'confidence'):
+            columns[name]
+        started = time.perf_counter()
+        rules.score(columns)
+        rules.match(columns)
+        masks_s = time.perf_counter() - started
+        classified, classify_s = timed(classify_actions, scored, rules)
+        rows.append({'goal': goal, 'keywords': len(classified), 'rules': len(rules.ids), 'compile_s': compile_s,
+                     'masks_s': masks_s, 'score_s': score_s, 'classify_s': classify_s})
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time rule compilation and evaluation per goal.")
+    parser.add_argument('keywords', nargs='*', type=int, default=[100_000, 1_000_000])
+    parser.add_argument('--goal', action='append', help="goals to time (default: all in rules.json)")
+    args = parser.parse_args(argv)
+    if not args.goal:
+        with open(RULES_PATH, encoding='utf-8') as f:
+            args.goal = list(json.load(f)['goals'])
+
+    print(f"{'keywords':>10}{'goal':>13}{'rules':>7}{'compile':>10}{'masks':>10}{'score':>10}{'classify':>10}")
+    for keywords in args.keywords:
+        for row in run(keywords, args.goal):
+            print(f"{row['keywords']:>10,}{row['goal']:>13}{row['rules']:>7}{row['compile_s'] * 1000:>8.1f}ms"
+                  f"{row['masks_s'] * 1000:>8.0f}ms{row['score_s'] * 1000:>8.0f}ms{row['classify_s'] * 1000:>8.0f}ms")
+
+if __name__ == '__main__':
+    main()
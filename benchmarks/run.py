@@ -0,0 +1,138 @@
+"""
+Spendsignal.ai - Pipeline benchmark
+Times each stage from CSV parsing to PDF on generated data and writes the results as JSON.
+
+    python benchmarks/run.py 10000 100000 --out bench.json [--baseline old.json --tolerance 0.25]
+
+With --baseline, stages slower than baseline * (1 + tolerance) at the same scale are listed
+and the exit status is 1, so the script can gate CI.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine import (build_decision_units, build_response, calculate_confidence, classify_actions,  # noqa: E402
+                    normalize_ads, normalize_crm, normalize_seo, score_units)
+from frames import page_frame, recommendations_frame  # noqa: E402
+from generate import generate, write  # noqa: E402
+from ingest import read_csv_source  # noqa: E402
+from report import generate_pdf_report  # noqa: E402
+
+# Below this, a stage's change is timer noise rather than a regression
+MIN_REGRESSION_S = 0.02
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def metadata():
+    return {
+        'generated_at': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+def run_pipeline(paths):
+    """One pass over every stage; returns ({stage: seconds}, row counts)."""
+    stages = {}
+
+    def timed(name, fn, *args):
+        started = time.perf_counter()
+        value = fn(*args)
+        stages[name] = time.perf_counter() - started
+        return value
+
+    frames = timed('csv_parse', lambda: {source: read_csv_source(path, source) for source, path in paths.items()})
+    ads, seo, crm = timed('normalize', lambda: (normalize_ads(frames['ads']), normalize_seo(frames['seo']),
+                                                normalize_crm(frames['crm'])))
+    units = timed('aggregate', build_decision_units, ads, seo, crm)
+    units = timed('score', score_units, units)
+    units = timed('confidence', calculate_confidence, units)
+    units = timed('classify', classify_actions, units)
+    results = timed('response_rows', build_response, units)
+    timed('response_columnar', build_response, units, 'upload', 'roas', 10000, 'columnar')
+    timed('table_prep', lambda: [page_frame(recommendations_frame(bucket), 'Spend', True)
+                                 for bucket in results['recommendations'].values()])
+    timed('pdf', lambda: generate_pdf_report(results).getvalue())
+    rows = {source: len(frame) for source, frame in frames.items()}
+    rows['keywords'] = len(units)
+    return stages, rows
+
+def benchmark(keywords, seed=0, repeat=1, **options):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write(generate(keywords, seed, **options), directory)
+        best, rows = None, None
+        for _ in range(repeat):
+            stages, rows = run_pipeline(paths)
+            best = stages if best is None else {name: min(best[name], stages[name]) for name in stages}
+    return {'keywords': keywords, 'seed': seed, 'rows': rows, 'stages': best, 'total_s': sum(best.values())}
+
+def regressions(current, baseline, tolerance):
+    """[(keywords, stage, baseline_s, current_s)] for stages slower than the allowed margin."""
+    previous = {run['keywords']: run['stages'] for run in baseline.get('runs', [])}
+    slower = []
+    for run in current['runs']:
+        for stage, seconds in run['stages'].items():
+            before = previous.get(run['keywords'], {}).get(stage)
+            if before is not None and seconds > before * (1 + tolerance) and seconds - before > MIN_REGRESSION_S:
+                slower.append((run['keywords'], stage, before, seconds))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline at several scales.")
+    parser.add_argument('keywords', type=int, nargs='*', default=[10_000, 100_000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help="keep the best of N passes per stage")
+    parser.add_argument('--seo-overlap', type=float, default=0.6)
+    parser.add_argument('--crm-overlap', type=float, default=0.3)
+    parser.add_argument('--out', default='bench.json')
+    parser.add_argument('--baseline', help="earlier results JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = {'meta': metadata(), 'runs': []}
+    for keywords in args.keywords:
+        run = benchmark(keywords, args.seed, args.repeat, seo_overlap=args.seo_overlap, crm_overlap=args.crm_overlap)
+        results['runs'].append(run)
+        print(f"\n{keywords:,} keywords ({run['rows']['ads']:,} ads / {run['rows']['seo']:,} seo / "
+              f"{run['rows']['crm']:,} crm rows → {run['rows']['keywords']:,} units)")
+        for stage, seconds in run['stages'].items():
+            print(f"  {stage:<18}{seconds * 1000:>10.0f} ms")
+        print(f"  {'total':<18}{run['total_s'] * 1000:>10.0f} ms")
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            slower = regressions(results, json.load(f), args.tolerance)
+        for keywords, stage, before, seconds in slower:
+            print(f"REGRESSION {keywords:,} keywords / {stage}: {before * 1000:.0f} ms → {seconds * 1000:.0f} ms")
+        if slower:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} of {args.baseline}")
+
+if __name__ == '__main__':
+    main()
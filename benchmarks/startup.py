@@ -0,0 +1,64 @@
+"""
+Spendsignal.ai - Cold start benchmark
+Time to first paint of the app in a fresh interpreter, and which heavy modules that loaded.
+
+    python benchmarks/startup.py [--runs 5] [--out startup.json]
+
+Each run starts a new Python process, like a cold Streamlit Cloud container, and renders the
+landing page once with Streamlit's AppTest; a second render shows the cost of a rerun.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ['pandas', 'numpy', 'pyarrow', 'requests', 'reportlab']
+
+CHILD = f"""
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+streamlit_s = time.perf_counter() - started
+app = AppTest.from_file({os.path.join(ROOT, 'app.py')!r}, default_timeout=120)
+started = time.perf_counter()
+app.run()
+first_s = time.perf_counter() - started
+started = time.perf_counter()
+app.run()
+rerun_s = time.perf_counter() - started
+print(json.dumps({{'streamlit_s': streamlit_s, 'first_paint_s': first_s, 'rerun_s': rerun_s,
+                  'exception': bool(app.exception),
+                  'loaded': [m for m in {HEAVY!r} if m in sys.modules]}}))
+"""
+
+
+def cold_start():
+    output = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the app's cold start.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--out', help="write the runs and medians as JSON")
+    args = parser.parse_args(argv)
+
+    runs = [cold_start() for _ in range(args.runs)]
+    if any(run['exception'] for run in runs):
+        sys.exit("The app raised an exception on the landing page")
+    medians = {field: statistics.median(run[field] for run in runs)
+               for field in ('streamlit_s', 'first_paint_s', 'rerun_s')}
+    print(f"{args.runs} cold starts (median)")
+    print(f"  import streamlit   {medians['streamlit_s'] * 1000:>8.0f} ms")
+    print(f"  first paint        {medians['first_paint_s'] * 1000:>8.0f} ms")
+    print(f"  rerun              {medians['rerun_s'] * 1000:>8.0f} ms")
+    print(f"  heavy modules loaded: {', '.join(runs[-1]['loaded']) or 'none'}")
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({'runs': runs, 'median': medians}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
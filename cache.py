@@ -0,0 +1,144 @@
+"""
+Spendsignal.ai - On-disk caches
+Content-addressed, size-bounded pickle/Parquet caches with TTL expiry and LRU eviction.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+
+def _feed(digest, value):
+    if isinstance(value, pd.DataFrame):
+        frame = value[sorted(value.columns, key=str)]
+        digest.update(json.dumps([str(c) for c in frame.columns]).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value, key=str):
+            digest.update(b'\x00' + str(key).encode('utf-8') + b'\x01')
+            _feed(digest, value[key])
+    elif isinstance(value, (list, tuple)) and value and all(isinstance(v, dict) for v in value):
+        # Row lists hash the same as the equivalent DataFrame
+        _feed(digest, pd.DataFrame(list(value)))
+    else:
+        digest.update(json.dumps(value, sort_keys=True, default=str).encode('utf-8'))
+
+def content_key(*parts):
+    """Stable SHA-256 over scalars, dicts, row lists and DataFrames."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(b'\x02')
+        _feed(digest, part)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """One pickle file per key. mtime marks the write (TTL), atime the last read (LRU)."""
+
+    suffix = '.pkl'
+
+    def __init__(self, directory, max_entries=64, max_bytes=256 * 1024 * 1024, ttl_seconds=24 * 3600):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}{self.suffix}')
+
+    def _read(self, path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def _write(self, value, path):
+        with open(path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+            if self.ttl_seconds and time.time() - stat.st_mtime > self.ttl_seconds:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            value = self._read(path)
+            os.utime(path, (time.time(), stat.st_mtime))
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+            with self._lock:
+                self.misses += 1
+            return default
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        self._write(value, tmp_path)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def entries(self):
+        result = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(self.suffix):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            result.append((name, stat))
+        return result
+
+    def evict(self):
+        now = time.time()
+        entries = []
+        for name, stat in self.entries():
+            if self.ttl_seconds and now - stat.st_mtime > self.ttl_seconds:
+                self._remove(name)
+            else:
+                entries.append((name, stat))
+        entries.sort(key=lambda entry: entry[1].st_atime)
+        total = sum(stat.st_size for _, stat in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            name, stat = entries.pop(0)
+            self._remove(name)
+            total -= stat.st_size
+
+    def _remove(self, name):
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'bytes': sum(stat.st_size for _, stat in entries),
+        }
+
+
+class ParquetCache(DiskCache):
+    """DataFrames stored as Parquet files; same TTL/LRU rules as DiskCache."""
+
+    suffix = '.parquet'
+
+    def _read(self, path):
+        return pd.read_parquet(path)
+
+    def _write(self, value, path):
+        value.to_parquet(path, index=False)
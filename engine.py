@@ -0,0 +1,661 @@
+"""
+Spendsignal.ai - Local analysis engine
+Column-wise port of the n8n scoring pipeline (Parse Uploaded Data → Aggregate Data →
+Score & Classify → Build Response).
+"""
+
+import gc
+from datetime import datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+import pandas as pd
+
+from frames import CONFIDENCE_FLAGS
+from insights import prompt_inputs, template_insight
+from instrument import StageTimer
+from rules import load_rules
+
+ACTIONS = ['STOP', 'FIX', 'INVEST', 'OBSERVE']
+
+# confidence.flags bit per confidence tier (see frames.CONFIDENCE_FLAGS)
+FLAG = {text: 1 << bit for bit, (_, text) in enumerate(CONFIDENCE_FLAGS)}
+CONVERSION_FLAGS = np.array([FLAG['Strong conversion data'], FLAG['Good conversion data'],
+                             FLAG['Limited conversion data'], FLAG['No conversion data']])
+CRM_FLAGS = np.array([FLAG['CRM with qualification'], FLAG['Basic CRM data'], FLAG['No CRM data']])
+SPEND_FLAGS = np.array([FLAG['Significant spend data'], FLAG['Moderate spend data'], FLAG['Low spend data'], 0])
+CLICK_FLAGS = np.array([FLAG['Strong click volume'], FLAG['Moderate clicks'], 0, 0])
+
+
+# ===== JS COMPATIBILITY HELPERS =====
+
+def _js_round(values):
+    # Math.round: halves round towards +infinity
+    return np.floor(np.asarray(values, dtype=float) + 0.5)
+
+def _truthy(series):
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.notna() & (series != 0)
+    if isinstance(series.dtype, pd.StringDtype):
+        return series.notna() & (series != '')
+    return series.notna() & (series != '') & (series != 0) & (series != False)  # noqa: E712
+
+def _coalesce(df, names):
+    # `r.a || r.b || ...` evaluated over whole columns
+    result = pd.Series(np.nan, index=df.index, dtype=object)
+    for name in reversed(names):
+        if name in df.columns:
+            column = df[name]
+            result = column.where(_truthy(column), result)
+    return result
+
+def _number(series, default=0):
+    # `Number(x) || default`
+    values = pd.to_numeric(series, errors='coerce')
+    return values.where(values.notna() & (values != 0), default).astype(float)
+
+def _text(series):
+    # `String(x || '').trim().toLowerCase()`
+    return series.where(_truthy(series), '').astype(str).str.strip().str.lower()
+
+def _to_fixed(values, digits):
+    # Number.prototype.toFixed: exact decimal value, ties away from zero
+    values = np.asarray(values, dtype=float)
+    scale = 10 ** digits
+    scaled = np.abs(values) * scale
+    units = np.floor(scaled + 0.5)
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-9
+    for i in np.flatnonzero(ties):
+        exact = Decimal(float(abs(values[i]))).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP)
+        units[i] = float(exact * scale)
+    units = units.astype(np.int64)
+    sign = np.where((values < 0) & (units > 0), '-', '')
+    whole = pd.Series(units // scale).astype(str)
+    if digits == 0:
+        return pd.Series(sign) + whole
+    frac = pd.Series(units % scale).astype(str).str.zfill(digits)
+    return pd.Series(sign) + whole + '.' + frac
+
+def _js_str(values):
+    # `${x}` for numbers: integral floats print without a decimal point
+    values = np.asarray(values, dtype=float)
+    integral = np.isfinite(values) & (np.floor(values) == values)
+    out = pd.Series(np.where(integral, values, 0).astype(np.int64)).astype(str)
+    for i in np.flatnonzero(~integral):
+        out.iat[i] = repr(float(values[i]))
+    return out
+
+
+# ===== NORMALIZE (Parse Uploaded Data) =====
+
+def _frame(records):
+    if records is None:
+        return pd.DataFrame()
+    if isinstance(records, pd.DataFrame):
+        return records.reset_index(drop=True)
+    return pd.DataFrame(list(records))
+
+def normalize_ads(records):
+    df = _frame(records)
+    out = pd.DataFrame({
+        'keyword': _text(_coalesce(df, ['keyword'])),
+        'campaign': _coalesce(df, ['campaign']),
+        'impressions': _number(_coalesce(df, ['impressions'])),
+        'clicks': _number(_coalesce(df, ['clicks'])),
+        'spend': _number(_coalesce(df, ['spend', 'cost'])),
+        'conversions': _number(_coalesce(df, ['conversions'])),
+        'revenue': _number(_coalesce(df, ['revenue'])),
+        'leads': _number(_coalesce(df, ['leads'])),
+    }, index=df.index)
+    return out[out['keyword'] != ''].reset_index(drop=True)
+
+def normalize_seo(records):
+    df = _frame(records)
+    out = pd.DataFrame({
+        'keyword': _text(_coalesce(df, ['keyword', 'text'])),
+        'volume': _number(_coalesce(df, ['volume', 'vol'])),
+        'cpc': _number(_coalesce(df, ['cpc'])),
+        'competition': _coalesce(df, ['competition']).fillna('medium'),
+        'score': _number(_coalesce(df, ['score'])),
+    }, index=df.index)
+    return out[out['keyword'] != ''].reset_index(drop=True)
+
+def normalize_crm(records):
+    df = _frame(records)
+    out = pd.DataFrame({
+        'keyword': _text(_coalesce(df, ['origin', 'source', 'keyword'])),
+        'landing_page': _coalesce(df, ['landing_page']),
+        'leads': _number(_coalesce(df, ['leads']), default=1),
+        'qualified_leads': _number(_coalesce(df, ['qualified_leads'])),
+        'revenue': _number(_coalesce(df, ['revenue'])),
+        'stage': _coalesce(df, ['stage']).fillna('mql'),
+    }, index=df.index)
+    return out[out['keyword'] != ''].reset_index(drop=True)
+
+
+# ===== NORMALIZE (Kaggle) =====
+# Ports of the "Ads/SEO/CRM: Normalize (Kaggle)" nodes; chunks are read with dtype=str.
+
+def _stripped_number(series, pattern):
+    # `Number(String(x || 0).replace(pattern, '')) || 0`
+    text = series.where(_truthy(series), '0').astype(str).str.replace(pattern, '', regex=True)
+    return _number(text)
+
+def _column_or_empty(df, name):
+    return df[name] if name in df.columns else pd.Series('', index=df.index, dtype=object)
+
+def normalize_kaggle_ads(df):
+    out = pd.DataFrame({
+        'keyword': _text(_coalesce(df, ['Keyword'])),
+        'campaign': _coalesce(df, ['Campaign_Name']),
+        'impressions': _stripped_number(_column_or_empty(df, 'Impressions'), r'[^0-9.]'),
+        'clicks': _stripped_number(_column_or_empty(df, 'Clicks'), r'[^0-9.]'),
+        'spend': _stripped_number(_column_or_empty(df, 'Cost'), r'[$,]'),
+        'conversions': _number(_coalesce(df, ['Conversions'])),
+        'revenue': _stripped_number(_column_or_empty(df, 'Sale_Amount'), r'[$,]'),
+        'leads': _number(_coalesce(df, ['Leads'])),
+    }, index=df.index)
+    return out[out['keyword'] != ''].reset_index(drop=True)
+
+def normalize_kaggle_seo(df):
+    out = pd.DataFrame({
+        'keyword': _text(_coalesce(df, ['text', 'keyword'])),
+        'volume': _number(_coalesce(df, ['vol', 'volume'])),
+        'cpc': _number(_coalesce(df, ['cpc'])),
+        'competition': _coalesce(df, ['competition']).fillna('medium'),
+        'score': _number(_coalesce(df, ['score'])),
+    }, index=df.index)
+    return out[out['keyword'] != ''].reset_index(drop=True)
+
+def normalize_kaggle_crm(df):
+    won = (_column_or_empty(df, 'is_won') == 'True') | _truthy(_coalesce(df, ['won_date']))
+    out = pd.DataFrame({
+        'keyword': _text(_coalesce(df, ['origin', 'source'])).str.replace('_', ' ', regex=False),
+        'landing_page': _coalesce(df, ['landing_page_id']),
+        'leads': 1.0,
+        'qualified_leads': won.astype(float),
+        'revenue': _number(_coalesce(df, ['declared_monthly_revenue'])),
+        'stage': _coalesce(df, ['lead_behaviour_profile']).fillna('mql'),
+    }, index=df.index)
+    return out[out['keyword'] != ''].reset_index(drop=True)
+
+
+# ===== AGGREGATE DATA =====
+
+def _last_truthy(df, column):
+    return df[column].where(_truthy(df[column]))
+
+def _row_order_sums(frame, columns):
+    # `unit.x += r.x || 0` one row at a time: bincount adds its weights in row order, where
+    # groupby.sum may pair the additions differently and move the last digit
+    # (41.63 vs 41.629999999999995), which then flips toFixed ties
+    codes, keywords = pd.factorize(frame['keyword'])
+    sums = {}
+    for column in columns:
+        values = frame[column].to_numpy(dtype=float)
+        sums[column] = np.bincount(codes, weights=np.where(np.isnan(values), 0.0, values), minlength=len(keywords))
+    return pd.DataFrame(sums, columns=columns, index=pd.Index(keywords, name='keyword'))
+
+def aggregate_source(frame, source):
+    """Reduce normalized rows (or earlier partials) of one source to one row per keyword.
+
+    Sums are added in row order, as the JS loop does. Aggregating a partial followed by the
+    raw rows that come after it therefore gives exactly the sums of aggregating all the raw
+    rows, so sources can be folded chunk by chunk; re-aggregating two partials is only exact
+    up to float rounding.
+    """
+    if frame is None or len(frame) == 0:
+        columns = {'ads': ['spend', 'impressions', 'clicks', 'conversions', 'revenue', 'campaign'],
+                   'seo': ['volume', 'cpc', 'competition', 'score'],
+                   'crm': ['leads', 'qualified_leads', 'revenue']}[source]
+        return pd.DataFrame(columns=columns, index=pd.Index([], name='keyword', dtype=object))
+    if source == 'ads':
+        grouped = frame.assign(campaign=_last_truthy(frame, 'campaign')).groupby('keyword', sort=False)
+        out = _row_order_sums(frame, ['spend', 'impressions', 'clicks', 'conversions', 'revenue'])
+        out['campaign'] = grouped['campaign'].last()
+    elif source == 'seo':
+        frame = frame.assign(cpc=_last_truthy(frame, 'cpc'), competition=_last_truthy(frame, 'competition'),
+                             score=_last_truthy(frame, 'score'))
+        grouped = frame.groupby('keyword', sort=False)
+        out = grouped[['volume']].max().clip(lower=0)
+        out[['cpc', 'competition', 'score']] = grouped[['cpc', 'competition', 'score']].last()
+    else:
+        out = _row_order_sums(frame, ['leads', 'qualified_leads', 'revenue'])
+    return out
+
+def match_keywords(aggs, matcher):
+    """Re-key (source, aggregate) pairs onto matcher's canonical keywords, folding merged variants.
+
+    Returns the re-keyed pairs and the matcher's counts.
+    """
+    keywords = pd.unique(np.concatenate([agg.index.to_numpy(dtype=object) for _, agg in aggs]))
+    mapping, counts = matcher.match(keywords)
+    if not mapping:
+        return aggs, counts
+    rekeyed = []
+    for source, agg in aggs:
+        if agg.index.isin(list(mapping)).any():
+            # Aggregates re-aggregate like raw rows, so variants fold with the source's own rules
+            agg = aggregate_source(agg.rename(index=mapping).rename_axis('keyword').reset_index(), source)
+        rekeyed.append((source, agg))
+    return tuple(rekeyed), counts
+
+def build_decision_units(ads, seo, crm, matcher=None):
+    """Merge per-source aggregates into one decision unit per keyword (flat columns).
+
+    matcher, if given, is a matching.KeywordMatcher whose match groups become one unit each;
+    its counts are left in units.attrs['matching'].
+    """
+    ads_agg = aggregate_source(ads, 'ads')
+    seo_agg = aggregate_source(seo, 'seo')
+    crm_agg = aggregate_source(crm, 'crm')
+    aggs = (('ads', ads_agg), ('seo', seo_agg), ('crm', crm_agg))
+    counts = None
+    if matcher is not None:
+        aggs, counts = match_keywords(aggs, matcher)
+    # Keyword order = first appearance across ads, seo, crm (the keywordMap insertion order)
+    codes, keywords = pd.factorize(pd.Index(np.concatenate([agg.index.to_numpy(dtype=object) for _, agg in aggs])))
+
+    units = pd.DataFrame({'keyword': np.asarray(keywords, dtype=object)})
+    offset = 0
+    for prefix, agg in aggs:
+        rows = np.full(len(keywords), -1, dtype=np.int64)
+        rows[codes[offset:offset + len(agg)]] = np.arange(len(agg))
+        offset += len(agg)
+        present = rows >= 0
+        units[f'has_{prefix}'] = present
+        for column in agg.columns:
+            values = agg[column].to_numpy(dtype=object if column in ('campaign', 'competition') else float)
+            if column in ('campaign', 'competition'):
+                aligned = np.full(len(keywords), None, dtype=object)
+                aligned[present] = values[rows[present]]
+                aligned[pd.isna(aligned)] = None
+                aligned = pd.Series(aligned, dtype=object)
+            else:
+                aligned = np.zeros(len(keywords))
+                aligned[present] = values[rows[present]]
+                aligned[np.isnan(aligned)] = 0.0
+            units[f'{prefix}_{column}'] = aligned
+    units = add_derived_metrics(units)
+    if counts is not None:
+        units.attrs['matching'] = counts
+    return units
+
+def add_derived_metrics(units):
+    spend = units['ads_spend'].to_numpy()
+    impressions = units['ads_impressions'].to_numpy()
+    clicks = units['ads_clicks'].to_numpy()
+    leads = units['crm_leads'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = {
+            'ctr': np.where(impressions > 0, clicks / impressions * 100, np.nan),
+            'cpl': np.where(leads > 0, spend / leads, np.nan),
+            'conversion_rate': np.where(clicks > 0, units['ads_conversions'].to_numpy() / clicks * 100, np.nan),
+            'qualification_rate': np.where(leads > 0, units['crm_qualified_leads'].to_numpy() / leads * 100, np.nan),
+            'roi': np.where(spend > 0, (units['crm_revenue'].to_numpy() + units['ads_revenue'].to_numpy()) / spend, np.nan),
+        }
+    for name, values in ratios.items():
+        # `x ? Math.round(x * 100) / 100 : null` — zero collapses to null as well
+        units[name] = np.where((values != 0) & ~np.isnan(values), _js_round(values * 100) / 100, np.nan)
+    return units.sort_values('ads_spend', ascending=False, kind='stable').reset_index(drop=True)
+
+
+# ===== SCORE SIGNALS =====
+
+def score_units(units, rules=None):
+    """Efficiency / opportunity / quality / composite from the rule set's score rules (rules.json)."""
+    rules = rules or load_rules()
+    scores = rules.score(RuleColumns(units))
+    for name, values in scores.items():
+        units[name] = values.astype(np.int64)
+    units['composite'] = _js_round(rules.composite(scores)).astype(np.int64)
+    return units
+
+
+# ===== CALCULATE CONFIDENCE =====
+
+def calculate_confidence(units):
+    conversions = units['ads_conversions'].to_numpy()
+    leads = units['crm_leads'].to_numpy()
+    qualified = units['crm_qualified_leads'].to_numpy()
+    volume = units['seo_volume'].to_numpy()
+    spend = units['ads_spend'].to_numpy()
+    clicks = units['ads_clicks'].to_numpy()
+
+    conversion_tier = np.select([conversions >= 10, conversions >= 5, conversions >= 1], [0, 1, 2], 3)
+    crm_tier = np.select([qualified > 0, leads > 0], [0, 1], 2)
+    spend_tier = np.select([spend >= 200, spend >= 50, spend > 0], [0, 1, 2], 3)
+    click_tier = np.select([clicks >= 100, clicks >= 30, clicks > 0], [0, 1, 2], 3)
+
+    score = (np.array([25, 18, 8, 0])[conversion_tier]
+             + np.array([20, 10, 0])[crm_tier]
+             + np.where(volume > 0, 15, 0)
+             + np.array([15, 10, 5, 0])[spend_tier]
+             + np.array([15, 10, 5, 0])[click_tier]
+             + 10)
+    units['confidence'] = _js_round(score / 100 * 100).astype(np.int64)
+    units['confidence_level'] = np.select(
+        [units['confidence'] >= 80, units['confidence'] >= 60, units['confidence'] >= 40],
+        ['HIGH', 'MEDIUM', 'LOW'], 'INSUFFICIENT')
+    units['confidence_flags'] = (CONVERSION_FLAGS[conversion_tier] | CRM_FLAGS[crm_tier]
+                                 | np.where(volume > 0, FLAG['SEO data available'], FLAG['No SEO data'])
+                                 | SPEND_FLAGS[spend_tier] | CLICK_FLAGS[click_tier] | FLAG['Current data'])
+    return units
+
+
+# ===== CLASSIFY ACTIONS =====
+
+def classify_actions(units, rules=None):
+    """Action, priority, savings, potential and reason from the first matching rule (rules.json)."""
+    rules = rules or load_rules()
+    columns = RuleColumns(units)
+    # Rules are evaluated over every row, so cpa and the like divide by zero where they don't apply
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rule_index = rules.match(columns)
+        savings = np.zeros(len(units))
+        potential = np.zeros(len(units))
+        reasons = np.empty(len(units), dtype=object)
+        for i, parts in enumerate(rules.reasons):
+            mask = rule_index == i
+            if not mask.any():
+                continue
+            if i < len(rules.ids):
+                savings[mask] = np.broadcast_to(rules.savings[i](columns), mask.shape)[mask]
+                potential[mask] = np.broadcast_to(rules.potential[i](columns), mask.shape)[mask]
+            reasons[mask] = _reason(parts, columns, mask)
+    units['rule'] = rule_index.astype(np.int16)
+    units['action'] = np.array(rules.actions, dtype=object)[rule_index]
+    units['priority'] = np.array(rules.priorities, dtype=np.int64)[rule_index]
+    units['savings'] = _js_round(savings).astype(np.int64)
+    units['potential'] = _js_round(potential).astype(np.int64)
+    units['reason'] = reasons
+    return units
+
+def _reason(parts, columns, mask):
+    # Template fields are computed over whole columns, but only the matching rows are formatted
+    text = pd.Series(np.full(int(mask.sum()), '', dtype=object))
+    for literal, expression, digits in parts:
+        text = text + literal
+        if expression is not None:
+            values = np.broadcast_to(expression(columns), mask.shape)[mask]
+            text = text + (_js_str(values) if digits is None else _to_fixed(values, digits)).to_numpy()
+    return text.to_numpy()
+
+
+class RuleColumns:
+    """Rule names (rules.NAMES) → decision-unit column arrays, converted on first use."""
+
+    COLUMNS = {'spend': 'ads_spend', 'impressions': 'ads_impressions', 'clicks': 'ads_clicks',
+               'conversions': 'ads_conversions', 'leads': 'crm_leads', 'qualified_leads': 'crm_qualified_leads',
+               'volume': 'seo_volume', 'roi': 'roi', 'ctr': 'ctr', 'conversion_rate': 'conversion_rate',
+               'qualification_rate': 'qualification_rate', 'cpl': 'cpl', 'efficiency': 'efficiency',
+               'opportunity': 'opportunity', 'quality': 'quality', 'confidence': 'confidence'}
+
+    def __init__(self, units):
+        self.units = units
+        self.arrays = {}
+
+    def __len__(self):
+        return len(self.units)
+
+    def __getitem__(self, name):
+        if name not in self.arrays:
+            self.arrays[name] = self._column(name)
+        return self.arrays[name]
+
+    def _column(self, name):
+        if name == 'competition':
+            # Categorical, so `competition == 'low'` compares integer codes rather than strings
+            return pd.Categorical(self.units['seo_competition'].fillna('').astype(str).str.lower())
+        if name == 'cpa':
+            spend, conversions = self['spend'], self['conversions']
+            return np.divide(spend, conversions, out=np.zeros(len(self)), where=conversions > 0)
+        # `x || 0`: derived rates are null when their denominator is 0
+        return self.units[self.COLUMNS[name]].fillna(0).to_numpy(dtype=float)
+
+
+# ===== WHAT-IF SWEEP =====
+
+# Cap on values x rows evaluated at once, which bounds the sweep's working set to ~100 MB
+SWEEP_CELLS = 1 << 22
+
+def sweep_thresholds(units, param, values, rules=None):
+    """Bucket counts, savings and potential for each value of one rules param.
+
+    The param becomes a (values, 1) column that every score and action rule broadcasts
+    against, so the whole grid is one pass over the units (in row chunks of SWEEP_CELLS
+    cells) rather than one analysis per value. units needs the columns RuleColumns reads,
+    as analyze() or frames.units_frame() return them.
+    """
+    rules = rules or load_rules()
+    values = np.asarray(values, dtype=float)
+    swept = rules.with_params(**{param: values[:, None]})
+    codes = np.array([ACTIONS.index(action) for action in swept.actions])
+    counts = np.zeros((len(values), len(ACTIONS)), dtype=np.int64)
+    savings = np.zeros(len(values))
+    potential = np.zeros(len(values))
+    step = max(1, SWEEP_CELLS // max(len(values), 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for start in range(0, len(units), step):
+            columns = RuleColumns(units.iloc[start:start + step])
+            # The action rules read the scores, which the param may also move
+            columns.arrays.update(swept.score(columns))
+            rule_index = np.broadcast_to(swept.match(columns), (len(values), len(columns)))
+            action = codes[rule_index]
+            for i in range(len(ACTIONS)):
+                counts[:, i] += (action == i).sum(axis=1)
+            for i in range(len(swept.ids)):
+                mask = rule_index == i
+                if not mask.any():
+                    continue
+                # Totals count STOP savings and FIX/INVEST potential, as summarize() does
+                if swept.actions[i] == 'STOP':
+                    savings += np.where(mask, _js_round(np.broadcast_to(swept.savings[i](columns), mask.shape)), 0).sum(axis=1)
+                if swept.actions[i] in ('FIX', 'INVEST'):
+                    potential += np.where(mask, _js_round(np.broadcast_to(swept.potential[i](columns), mask.shape)), 0).sum(axis=1)
+    sweep = pd.DataFrame(counts, columns=[action.lower() for action in ACTIONS])
+    sweep.insert(0, param, values)
+    sweep['total_savings'] = savings.astype(np.int64)
+    sweep['total_potential'] = potential.astype(np.int64)
+    return sweep
+
+
+# ===== BUILD RESPONSE =====
+
+def summarize(units):
+    savings = units['savings'].to_numpy()
+    potential = units['potential'].to_numpy()
+    action = units['action'].to_numpy()
+    total_savings = int(savings[action == 'STOP'].sum())
+    total_potential = int(potential[(action == 'INVEST') | (action == 'FIX')].sum())
+    avg_confidence = int(_js_round(units['confidence'].mean())) if len(units) else 0
+    stats = {
+        'total_units': int(len(units)),
+        'total_spend': float(units['ads_spend'].sum()),
+        'total_leads': float(units['crm_leads'].sum()),
+        'total_revenue': float(units['crm_revenue'].sum() + units['ads_revenue'].sum()),
+        'avg_confidence': avg_confidence,
+        'total_savings': total_savings,
+        'total_potential': total_potential,
+        'annual_savings': total_savings * 12,
+    }
+    summary = {action.lower(): int((units['action'] == action).sum()) for action in ACTIONS}
+    summary['total_savings'] = total_savings
+    summary['avg_confidence'] = avg_confidence
+    return stats, summary
+
+def _none_if_nan(values):
+    return [None if v != v else v for v in values]
+
+def _without_gc(build, units):
+    # Millions of small dicts and lists: cyclic GC passes over them dominate otherwise
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return build(units)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def recommendation_records(units):
+    """Nested per-keyword dicts, in the shape Score & Classify emits."""
+    if len(units) == 0:
+        return []
+    return _without_gc(_recommendation_records, units)
+
+SOURCE_LISTS = [['ads', 'seo', 'crm'], ['ads', 'seo'], ['ads', 'crm'], ['seo', 'crm'], ['ads'], ['seo'], ['crm']]
+
+# (response field, units column); dotted fields are nested objects in the row format
+RECORD_FIELDS = [
+    ('keyword', 'keyword'),
+    ('ads.spend', 'ads_spend'), ('ads.impressions', 'ads_impressions'), ('ads.clicks', 'ads_clicks'),
+    ('ads.conversions', 'ads_conversions'), ('ads.revenue', 'ads_revenue'), ('ads.campaign', 'ads_campaign'),
+    ('seo.volume', 'seo_volume'), ('seo.cpc', 'seo_cpc'), ('seo.competition', 'seo_competition'), ('seo.score', 'seo_score'),
+    ('crm.leads', 'crm_leads'), ('crm.qualified_leads', 'crm_qualified_leads'), ('crm.revenue', 'crm_revenue'),
+    ('derived.ctr', 'ctr'), ('derived.cpl', 'cpl'), ('derived.conversion_rate', 'conversion_rate'),
+    ('derived.qualification_rate', 'qualification_rate'), ('derived.roi', 'roi'),
+    ('sources', None),
+    ('scores.efficiency', 'efficiency'), ('scores.opportunity', 'opportunity'), ('scores.quality', 'quality'),
+    ('scores.composite', 'composite'),
+    ('confidence.score', 'confidence'), ('confidence.level', 'confidence_level'),
+    ('confidence.flags', 'confidence_flags'),
+    ('classification.action', 'action'), ('classification.priority', 'priority'), ('classification.reason', 'reason'),
+    ('classification.savings', 'savings'), ('classification.potential', 'potential'),
+]
+NULLABLE_COLUMNS = {'ctr', 'cpl', 'conversion_rate', 'qualification_rate', 'roi'}
+
+def _source_indexes(units):
+    return np.select(
+        [units['has_ads'] & units['has_seo'] & units['has_crm'], units['has_ads'] & units['has_seo'],
+         units['has_ads'] & units['has_crm'], units['has_seo'] & units['has_crm'],
+         units['has_ads'], units['has_seo']],
+        [0, 1, 2, 3, 4, 5], 6)
+
+def _recommendation_records(units):
+    col = lambda name: units[name].tolist()
+    sources = _source_indexes(units)
+
+    records = []
+    for i, (keyword, spend, impressions, clicks, conversions, ads_revenue, campaign,
+            volume, cpc, competition, seo_score, leads, qualified, crm_revenue,
+            ctr, cpl, conv_rate, qual_rate, roi,
+            efficiency, opportunity, quality, composite,
+            confidence, level, flags, action, priority, reason, savings, potential) in enumerate(zip(
+            col('keyword'), col('ads_spend'), col('ads_impressions'), col('ads_clicks'), col('ads_conversions'),
+            col('ads_revenue'), col('ads_campaign'),
+            col('seo_volume'), col('seo_cpc'), col('seo_competition'), col('seo_score'),
+            col('crm_leads'), col('crm_qualified_leads'), col('crm_revenue'),
+            _none_if_nan(col('ctr')), _none_if_nan(col('cpl')), _none_if_nan(col('conversion_rate')),
+            _none_if_nan(col('qualification_rate')), _none_if_nan(col('roi')),
+            col('efficiency'), col('opportunity'), col('quality'), col('composite'),
+            col('confidence'), col('confidence_level'), col('confidence_flags'),
+            col('action'), col('priority'), col('reason'), col('savings'), col('potential'))):
+        records.append({
+            'keyword': keyword,
+            'ads': {'spend': spend, 'impressions': impressions, 'clicks': clicks, 'conversions': conversions,
+                    'revenue': ads_revenue, 'campaign': campaign},
+            'seo': {'volume': volume, 'cpc': cpc, 'competition': competition, 'score': seo_score},
+            'crm': {'leads': leads, 'qualified_leads': qualified, 'revenue': crm_revenue},
+            'derived': {'ctr': ctr, 'cpl': cpl, 'conversion_rate': conv_rate, 'qualification_rate': qual_rate, 'roi': roi},
+            'sources': list(SOURCE_LISTS[sources[i]]),
+            'scores': {'efficiency': efficiency, 'opportunity': opportunity, 'quality': quality, 'composite': composite},
+            'confidence': {'score': confidence, 'level': level, 'flags': flags},
+            'classification': {'action': action, 'priority': priority, 'reason': reason,
+                               'savings': savings, 'potential': potential},
+        })
+    return records
+
+def recommendation_columns(units):
+    """The same records as {field: [values]}, one list per dotted RECORD_FIELDS name."""
+    if len(units) == 0:
+        return {}
+    return _without_gc(_recommendation_columns, units)
+
+def _recommendation_columns(units):
+    sources = _source_indexes(units)
+    columns = {}
+    for field, column in RECORD_FIELDS:
+        if column is None:
+            continue
+        values = units[column].tolist()
+        columns[field] = _none_if_nan(values) if column in NULLABLE_COLUMNS else values
+    columns['sources'] = [list(SOURCE_LISTS[i]) for i in sources.tolist()]
+    return {field: columns[field] for field, _ in RECORD_FIELDS}
+
+def bucket_units(units):
+    """Split classified units into per-action frames, stably sorted by priority."""
+    return {
+        action.lower(): units[units['action'] == action].sort_values('priority', kind='stable')
+        for action in ACTIONS
+    }
+
+def analyze(ads, seo, crm, rules=None):
+    """Normalized source frames → classified decision units."""
+    units = build_decision_units(ads, seo, crm)
+    units = score_units(units, rules)
+    units = calculate_confidence(units)
+    return classify_actions(units, rules)
+
+def run_local_analysis(data, mode='upload', goal='roas', budget=10000, progress=None, sources=None,
+                       response_format='rows', timer=None, matcher=None, rules=None):
+    """Drop-in replacement for the n8n webhook response, computed in-process.
+
+    progress, if given, is called as progress(percent, message) when each stage starts.
+    sources, if given, is an already-normalized (ads, seo, crm) tuple and data is ignored.
+    response_format 'columnar' returns each recommendations bucket as recommendation_columns().
+    timer, if given, is an instrument.StageTimer the engine's stages are appended to; the
+    response's 'timings' is its as_dict().
+    matcher, if given, is a matching.KeywordMatcher; the response's 'matching' then holds its counts.
+    rules, if given, is a rules.RuleSet; otherwise the goal's rule set from rules.json.
+    """
+    report = progress or (lambda percent, message: None)
+    timer = timer or StageTimer()
+    rules = rules or load_rules(goal)
+    if sources is None:
+        data = data or {}
+        report(20, '🧹 Normalizing Ads, SEO and CRM rows...')
+        with timer.stage('normalize', 'engine'):
+            sources = normalize_ads(data.get('ads')), normalize_seo(data.get('seo')), normalize_crm(data.get('crm'))
+    ads, seo, crm = sources
+    report(35, '🔗 Merging sources into decision units...')
+    with timer.stage('aggregate', 'engine'):
+        units = build_decision_units(ads, seo, crm, matcher)
+    matching = units.attrs.get('matching')
+    report(50, '📐 Scoring efficiency, opportunity and quality...')
+    with timer.stage('score', 'engine'):
+        units = score_units(units, rules)
+    report(60, '🎯 Calculating confidence...')
+    with timer.stage('confidence', 'engine'):
+        units = calculate_confidence(units)
+    report(70, '🚦 Classifying STOP / FIX / INVEST / OBSERVE...')
+    with timer.stage('classify', 'engine'):
+        units = classify_actions(units, rules)
+    report(85, '📦 Building report...')
+    with timer.stage('response', 'engine'):
+        results = build_response(units, mode, goal, budget, response_format)
+    if matching is not None:
+        results['matching'] = matching
+    results['timings'] = timer.as_dict()
+    return results
+
+def build_response(units, mode='upload', goal='roas', budget=10000, response_format='rows'):
+    """Build Response's JSON from classified units (in spend-descending order)."""
+    stats, summary = summarize(units)
+    to_response = recommendation_columns if response_format == 'columnar' else recommendation_records
+    response = {
+        'success': True,
+        'generated_at': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+        'mode': mode,
+        'goal': goal,
+        'budget': budget,
+        'stats': stats,
+        'summary': summary,
+        'ai_insight': None,
+        'ai_insight_source': 'template',
+        'recommendations': {name: to_response(frame) for name, frame in bucket_units(units).items()},
+        'recommendations_format': 'columnar' if response_format == 'columnar' else 'rows',
+        'confidence_flags': CONFIDENCE_FLAGS,
+    }
+    # The template stands in until (unless) the caller asks the model; see insights.generate_insight
+    response['ai_insight'] = template_insight(prompt_inputs(response))
+    return response
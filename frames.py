@@ -0,0 +1,122 @@
+"""
+Spendsignal.ai - Result tables
+Columnar views of recommendation buckets, plus the filter/sort/page step run on every rerun.
+"""
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ['Priority', 'Keyword', 'Spend', 'Conversions', 'Reason', 'Confidence', 'Impact']
+SORTABLE = ['Priority', 'Keyword', 'Spend', 'Conversions', 'Confidence', 'Impact']
+PAGE_SIZES = [50, 100, 250, 500]
+
+# Confidence factors and warnings travel as confidence.flags, bit i meaning entry i here (in the
+# order Score & Classify pushes them); responses carry this table as 'confidence_flags'
+CONFIDENCE_FLAGS = [
+    ['factor', 'Strong conversion data'], ['factor', 'Good conversion data'], ['factor', 'Limited conversion data'],
+    ['warning', 'No conversion data'],
+    ['factor', 'CRM with qualification'], ['factor', 'Basic CRM data'], ['warning', 'No CRM data'],
+    ['factor', 'SEO data available'], ['warning', 'No SEO data'],
+    ['factor', 'Significant spend data'], ['factor', 'Moderate spend data'], ['factor', 'Low spend data'],
+    ['factor', 'Strong click volume'], ['factor', 'Moderate clicks'],
+    ['factor', 'Current data'],
+]
+
+
+def bucket_length(bucket):
+    """Keyword count of a recommendations bucket in either response format."""
+    if isinstance(bucket, dict):
+        return len(bucket.get('keyword', []))
+    return len(bucket or [])
+
+def bucket_rows(bucket, limit=None):
+    """Nested per-keyword dicts from either format; columnar buckets only expand `limit` rows."""
+    if not isinstance(bucket, dict):
+        return (bucket or [])[:limit]
+    count = bucket_length(bucket) if limit is None else min(limit, bucket_length(bucket))
+    rows = [{} for _ in range(count)]
+    for field, values in bucket.items():
+        *parents, leaf = field.split('.')
+        for row, value in zip(rows, values[:count]):
+            for parent in parents:
+                row = row.setdefault(parent, {})
+            row[leaf] = value
+    return rows
+
+def confidence_notes(confidence, table=None):
+    """(factors, warnings) text for one row's confidence object."""
+    confidence = confidence or {}
+    if 'flags' not in confidence:
+        # Responses from before flags spelled the text out
+        return list(confidence.get('factors') or []), list(confidence.get('warnings') or [])
+    flags = int(confidence['flags'] or 0)
+    notes = {'factor': [], 'warning': []}
+    for bit, (kind, text) in enumerate(table or CONFIDENCE_FLAGS):
+        if flags >> bit & 1:
+            notes[kind].append(text)
+    return notes['factor'], notes['warning']
+
+def row_confidence(bucket, index):
+    """The confidence object of one row of a bucket in either format."""
+    if isinstance(bucket, dict):
+        return {field.split('.', 1)[1]: values[index] for field, values in bucket.items()
+                if field.startswith('confidence.')}
+    return bucket[index].get('confidence') or {}
+
+def _field(bucket, field):
+    # Columnar buckets already hold the list; row buckets are walked once per field
+    if isinstance(bucket, dict):
+        return bucket.get(field) or [None] * bucket_length(bucket)
+    parent, _, leaf = field.rpartition('.')
+    return [((item.get(parent) or {}) if parent else item).get(leaf) for item in bucket]
+
+def _numbers(values):
+    return np.nan_to_num(np.array(values, dtype=float))
+
+def recommendations_frame(bucket):
+    """One DataFrame per bucket, built column by column; numbers stay numeric for sorting."""
+    savings = _numbers(_field(bucket, 'classification.savings'))
+    potential = _numbers(_field(bucket, 'classification.potential'))
+    return pd.DataFrame({
+        'Priority': pd.array(_field(bucket, 'classification.priority'), dtype='Int64'),
+        'Keyword': [keyword or '' for keyword in _field(bucket, 'keyword')],
+        'Spend': _numbers(_field(bucket, 'ads.spend')),
+        'Conversions': _numbers(_field(bucket, 'ads.conversions')),
+        'Reason': [reason or '' for reason in _field(bucket, 'classification.reason')],
+        'Confidence': _numbers(_field(bucket, 'confidence.score')),
+        'Impact': np.where(savings != 0, savings, potential),
+    }, columns=COLUMNS)
+
+# engine.RuleColumns' unit columns → response fields
+UNIT_FIELDS = {
+    'ads_spend': 'ads.spend', 'ads_impressions': 'ads.impressions', 'ads_clicks': 'ads.clicks',
+    'ads_conversions': 'ads.conversions', 'crm_leads': 'crm.leads', 'crm_qualified_leads': 'crm.qualified_leads',
+    'seo_volume': 'seo.volume', 'roi': 'derived.roi', 'ctr': 'derived.ctr', 'conversion_rate': 'derived.conversion_rate',
+    'qualification_rate': 'derived.qualification_rate', 'cpl': 'derived.cpl', 'efficiency': 'scores.efficiency',
+    'opportunity': 'scores.opportunity', 'quality': 'scores.quality', 'confidence': 'confidence.score',
+    'savings': 'classification.savings', 'potential': 'classification.potential',
+}
+
+def units_frame(recommendations):
+    """Every bucket's units with the engine's column names, for engine.sweep_thresholds and
+    allocation.allocate_budget."""
+    actions = ['STOP', 'FIX', 'INVEST', 'OBSERVE']
+    buckets = [recommendations.get(action.lower()) or [] for action in actions]
+    frame = pd.DataFrame({column: np.concatenate([_numbers(_field(bucket, field)) for bucket in buckets])
+                          for column, field in UNIT_FIELDS.items()})
+    frame['keyword'] = [keyword or '' for bucket in buckets for keyword in _field(bucket, 'keyword')]
+    frame['action'] = np.repeat(actions, [bucket_length(bucket) for bucket in buckets])
+    frame['seo_competition'] = [competition or '' for bucket in buckets for competition in _field(bucket, 'seo.competition')]
+    return frame
+
+def filter_frame(frame, query=''):
+    if not query:
+        return frame
+    return frame[frame['Keyword'].str.contains(query, case=False, regex=False, na=False)]
+
+def page_frame(frame, sort_by=None, descending=False, page=1, page_size=PAGE_SIZES[0]):
+    """Sort (None keeps the engine's priority order) and slice out one page."""
+    if sort_by in SORTABLE:
+        frame = frame.sort_values(sort_by, ascending=not descending, kind='stable', na_position='last')
+    start = (max(page, 1) - 1) * page_size
+    return frame.iloc[start:start + page_size]
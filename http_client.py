@@ -0,0 +1,147 @@
+"""
+Spendsignal.ai - Shared HTTP client
+Pooled keep-alive session with exponential backoff + jitter and a circuit breaker.
+"""
+
+import random
+import statistics
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+
+RETRY_STATUSES = {502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures; lets one trial call through after `reset_seconds`."""
+
+    def __init__(self, failure_threshold=5, reset_seconds=60):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.reset_seconds else 'open'
+
+    def before_call(self):
+        if not self.failure_threshold:
+            return
+        with self._lock:
+            state = self.state
+            if state == 'half-open' and not self.trial:
+                # This caller is the trial; everyone else waits for its outcome
+                self.trial = True
+                return
+            if state != 'closed':
+                wait = max(self.reset_seconds - (time.monotonic() - self.opened_at), 0)
+                raise CircuitOpenError(f"Analysis engine unavailable after {self.failures} failures; retrying in {wait:.0f}s")
+
+    def release(self):
+        """End a call without an outcome (it failed before reaching the server)."""
+        with self._lock:
+            self.trial = False
+
+    def record(self, ok):
+        with self._lock:
+            self.trial = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if self.failure_threshold and self.failures >= self.failure_threshold:
+                    self.opened_at = time.monotonic()
+
+
+def _never_sent(error):
+    # Connect timeouts and refused / unresolvable connections fail before any byte of the request
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(error, requests.exceptions.ConnectTimeout) or isinstance(reason, ConnectTimeoutError)
+
+
+class HttpClient:
+    def __init__(self, pool_size=10, retries=3, backoff_base=0.5, backoff_max=8.0, breaker=None):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = deque(maxlen=200)
+
+    def _backoff(self, attempt):
+        # Full jitter: uniform(0, min(max, base * 2^attempt))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request(self, method, url, body_factory=None, idempotent=False, retry_statuses=None, **kwargs):
+        """Send a request, retrying transient failures.
+
+        body_factory() returns fresh body kwargs (json=/data=) per attempt so streamed bodies
+        can be replayed. Failures to connect are always retried. Read timeouts, dropped
+        connections and 502/503/504 are retried only when the call is idempotent, since the
+        server may have done the work; retry_statuses overrides which statuses are retried.
+        """
+        if retry_statuses is None:
+            retry_statuses = RETRY_STATUSES if idempotent else ()
+        for attempt in range(self.retries + 1):
+            self.breaker.before_call()
+            started = time.perf_counter()
+            try:
+                body = body_factory() if body_factory else {}
+                response = self.session.request(method, url, **body, **kwargs)
+            except requests.exceptions.ConnectionError as e:
+                error, retryable = e, idempotent or _never_sent(e)
+            except requests.exceptions.RequestException as e:
+                error, retryable = e, idempotent and isinstance(e, requests.exceptions.Timeout)
+            except Exception:
+                # Not the server's fault: leave the failure count alone, but end a trial call
+                self.breaker.release()
+                raise
+            else:
+                self._record(url, started, attempt, response.status_code)
+                if response.status_code in retry_statuses and attempt < self.retries:
+                    self.breaker.record(False)
+                    time.sleep(self._backoff(attempt))
+                    continue
+                self.breaker.record(response.status_code < 500)
+                return response
+            self._record(url, started, attempt, None)
+            self.breaker.record(False)
+            if not retryable or attempt >= self.retries:
+                raise error
+            time.sleep(self._backoff(attempt))
+
+    def post(self, url, body_factory=None, idempotent=False, retry_statuses=None, **kwargs):
+        return self.request('POST', url, body_factory=body_factory, idempotent=idempotent,
+                            retry_statuses=retry_statuses, **kwargs)
+
+    def _record(self, url, started, attempt, status):
+        self.latencies.append({'url': url, 'seconds': time.perf_counter() - started, 'attempt': attempt, 'status': status})
+
+    def latency_stats(self):
+        seconds = [entry['seconds'] for entry in self.latencies if entry['status'] is not None]
+        if not seconds:
+            return {'calls': 0}
+        return {
+            'calls': len(seconds),
+            'first': seconds[0],
+            'median': statistics.median(seconds),
+            'last': seconds[-1],
+            'breaker': self.breaker.state,
+        }
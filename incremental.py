@@ -0,0 +1,189 @@
+"""
+Spendsignal.ai - Incremental re-analysis
+Persisted per-keyword aggregates that appended rows are merged into; only the keywords a
+delta touches are re-scored and re-classified.
+
+    python incremental.py STATE --ads new_ads.csv [--seo ...] [--crm ...] [--out result.json]
+"""
+
+import argparse
+import json
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from engine import (aggregate_source, analyze, build_decision_units, build_response, calculate_confidence,
+                    classify_actions, normalize_ads, normalize_crm, normalize_seo, score_units)
+from rules import load_rules
+
+SOURCES = ('ads', 'seo', 'crm')
+NORMALIZERS = {'ads': normalize_ads, 'seo': normalize_seo, 'crm': normalize_crm}
+# first_seen = source rank * POSITION_SPAN + position in that source's aggregate
+POSITION_SPAN = 1 << 40
+
+
+class AggregateState:
+    """Aggregate Data's keywordMap kept between runs, plus each keyword's last classification.
+
+    Aggregates are append-ordered per source, so a keyword's position (and therefore the
+    response order) comes out the same as re-aggregating the whole history at once.
+    """
+
+    def __init__(self):
+        self.partials = {source: aggregate_source(None, source) for source in SOURCES}
+        for partial in self.partials.values():
+            partial.index = _keyword_index(partial.index)
+        self.units = None
+        self.rows = {source: 0 for source in SOURCES}
+        self.goal = 'roas'
+        # The rule set the units were last classified with (RuleSet.definition)
+        self.definition = None
+
+    @classmethod
+    def load(cls, path):
+        """Return the saved state, or an empty one if `path` doesn't exist yet."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def save(self, path):
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @property
+    def keywords(self):
+        return 0 if self.units is None else len(self.units)
+
+    def merge(self, data=None, sources=None, goal=None):
+        """Fold new rows into the aggregates and re-classify the keywords they touch.
+
+        data is {'ads': rows, 'seo': rows, 'crm': rows} in any form the normalizers accept;
+        sources is an already-normalized {source: frame} (as kaggle.stream_source returns).
+        goal, if given, switches rule sets. Every keyword is re-classified when the rules differ
+        from the ones last used (another goal, or an edited rules.json). Returns the changed keywords.
+        """
+        # States saved before goals were tracked were classified with the roas rules
+        self.goal = goal or getattr(self, 'goal', 'roas')
+        rules = load_rules(self.goal)
+        if sources is None:
+            sources = {source: NORMALIZERS[source]((data or {}).get(source)) for source in SOURCES}
+        changed = _keyword_index([])
+        for source in SOURCES:
+            frame = sources.get(source)
+            if frame is None or len(frame) == 0:
+                continue
+            self.rows[source] += len(frame)
+            self.partials[source], touched = self._fold(self.partials[source], frame, source)
+            changed = changed.union(touched, sort=False)
+        if self.units is not None and rules.definition != getattr(self, 'definition', None):
+            changed = self.units.index.union(changed, sort=False)
+        if len(changed):
+            self._reclassify(changed, rules)
+        return changed
+
+    def _fold(self, existing, frame, source):
+        """(aggregates with `frame`'s normalized rows folded in, the keywords they touch)."""
+        delta = aggregate_source(frame, source)
+        delta.index = _keyword_index(delta.index)
+        positions = existing.index.get_indexer(delta.index)
+        overlap = positions >= 0
+        if overlap.any():
+            # The existing partial, then the new raw rows in order: each sum carries on from the
+            # stored total exactly as the full history's row-by-row sum would, and max /
+            # last-truthy come out the same. Adding two partials would round differently.
+            keywords = delta.index[overlap]
+            rows = frame[frame['keyword'].isin(keywords)]
+            merged = aggregate_source(pd.concat([existing.iloc[positions[overlap]].rename_axis('keyword').reset_index(), rows],
+                                                ignore_index=True), source)
+            _replace_rows(existing, positions[overlap], merged.loc[keywords])
+        if overlap.all():
+            return existing, delta.index
+        return (pd.concat([existing, delta[~overlap]]) if len(existing) else delta), delta.index
+
+    def _reclassify(self, changed, rules):
+        parts = []
+        for source in SOURCES:
+            partial = self.partials[source]
+            positions = partial.index.get_indexer(changed)
+            parts.append(partial.iloc[positions[positions >= 0]].rename_axis('keyword').reset_index())
+        units = classify_actions(calculate_confidence(score_units(build_decision_units(*parts), rules)), rules)
+        self.definition = rules.definition
+        # Object columns take in-place row writes; Arrow-backed strings rebuild the whole array
+        units = units.astype({column: object for column in units.columns if isinstance(units[column].dtype, pd.StringDtype)})
+        units.index = _keyword_index(units['keyword'])
+        units['first_seen'] = self._first_seen(units.index)
+        if self.units is None:
+            self.units = units
+            return
+        positions = self.units.index.get_indexer(units.index)
+        existing = positions >= 0
+        _replace_rows(self.units, positions[existing], units[existing])
+        if not existing.all():
+            self.units = pd.concat([self.units, units[~existing]])
+
+    def _first_seen(self, keywords):
+        # Position in the first of ads / seo / crm that has the keyword — the factorize order
+        # build_decision_units uses over the full history
+        first_seen = np.full(len(keywords), -1, dtype=np.int64)
+        for rank, source in enumerate(SOURCES):
+            positions = self.partials[source].index.get_indexer(keywords)
+            fill = (first_seen < 0) & (positions >= 0)
+            first_seen[fill] = rank * POSITION_SPAN + positions[fill]
+        return first_seen
+
+    def ordered_units(self):
+        """All classified units in the order a full re-analysis would produce them."""
+        if self.units is None:
+            return analyze(None, None, None)
+        order = np.lexsort((self.units['first_seen'].to_numpy(), -self.units['ads_spend'].to_numpy()))
+        return self.units.iloc[order].reset_index(drop=True)
+
+    def response(self, mode='upload', goal=None, budget=10000, response_format='rows'):
+        # Labelled with the goal the units were classified under unless told otherwise
+        return build_response(self.ordered_units(), mode, goal or getattr(self, 'goal', 'roas'), budget, response_format)
+
+
+def _keyword_index(keywords):
+    # Object dtype: its hash table is built once and reused by every get_indexer on the same
+    # index, where an Arrow-backed string index converts on each lookup
+    return pd.Index(np.asarray(keywords, dtype=object), name='keyword')
+
+def _replace_rows(frame, positions, rows):
+    """Overwrite frame rows at `positions` in place, column by column."""
+    for i, column in enumerate(frame.columns):
+        frame.iloc[positions, i] = rows[column].to_numpy()
+
+def main(argv=None):
+    from ingest import read_csv_source
+
+    parser = argparse.ArgumentParser(description="Merge new CSV rows into a saved analysis state.")
+    parser.add_argument('state', help="state file (created if missing)")
+    for source in SOURCES:
+        parser.add_argument(f'--{source}', help=f"{source.upper()} CSV with only the new rows")
+    parser.add_argument('--goal', help="rule set to classify with (default: the state's, roas for a new state)")
+    parser.add_argument('--budget', type=float, default=10000)
+    parser.add_argument('--format', choices=['rows', 'columnar'], default='rows')
+    parser.add_argument('--out', help="write the full analysis JSON here")
+    args = parser.parse_args(argv)
+
+    state = AggregateState.load(args.state)
+    started = time.perf_counter()
+    data = {source: read_csv_source(getattr(args, source), source) for source in SOURCES if getattr(args, source)}
+    changed = state.merge(data, goal=args.goal)
+    merged = time.perf_counter()
+    state.save(args.state)
+    print(f"{len(changed):,} keywords changed of {state.keywords:,} ({merged - started:.2f}s)")
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(state.response('upload', budget=args.budget, response_format=args.format), f)
+        print(f"Analysis written to {args.out} ({time.perf_counter() - merged:.2f}s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Spendsignal.ai - CSV ingestion
+Maps Ads / SEO / CRM exports onto the column names the analysis pipeline expects.
+"""
+
+import pandas as pd
+
+COLUMN_MAPS = {
+    'ads': {'keyword': ['keyword','keywords','search_term','query'], 'spend': ['spend','cost','amount','ad_spend'], 'clicks': ['clicks','click'], 'impressions': ['impressions','impr'], 'conversions': ['conversions','conv','conversion'], 'revenue': ['revenue','value','sale_amount']},
+    'seo': {'keyword': ['keyword','keywords','text','query'], 'volume': ['volume','vol','search_volume','searches'], 'cpc': ['cpc','cost_per_click'], 'competition': ['competition','comp','difficulty']},
+    'crm': {'origin': ['origin','source','keyword','utm_source'], 'leads': ['leads','lead_count'], 'qualified_leads': ['qualified_leads','qualified','sql'], 'revenue': ['revenue','value','deal_value']}
+}
+
+TEXT_COLUMNS = {'keyword', 'origin', 'competition'}
+
+CHUNK_ROWS = 200_000
+
+
+def resolve_columns(columns, data_type):
+    """Return {source column: target column} for one file header; first matching alias wins."""
+    normalized = {}
+    for column in columns:
+        normalized.setdefault(str(column).strip().lower(), column)
+    mapping = {}
+    for target, aliases in COLUMN_MAPS.get(data_type, {}).items():
+        for alias in aliases:
+            if alias in normalized and normalized[alias] not in mapping:
+                mapping[normalized[alias]] = target
+                break
+    return mapping
+
+def _rewind(source):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+def read_csv_source(source, data_type, chunk_rows=CHUNK_ROWS):
+    """Read one export into a DataFrame holding only the mapped columns, renamed to their targets.
+
+    The header is resolved once, only mapped columns are parsed, and the body is read in
+    chunks so peak memory stays near one chunk plus the (downcast) output columns.
+    """
+    _rewind(source)
+    header = pd.read_csv(source, nrows=0).columns
+    mapping = resolve_columns(header, data_type)
+    if not mapping:
+        return pd.DataFrame()
+
+    _rewind(source)
+    dtypes = {src: 'string' for src, target in mapping.items() if target in TEXT_COLUMNS}
+    chunks = []
+    for chunk in pd.read_csv(source, usecols=list(mapping), dtype=dtypes, chunksize=chunk_rows):
+        chunk = chunk.rename(columns=mapping)
+        for target in chunk.columns:
+            if target not in TEXT_COLUMNS:
+                chunk[target] = _downcast(chunk[target])
+        chunks.append(chunk)
+    if not chunks:
+        return pd.DataFrame(columns=[mapping[src] for src in mapping])
+    frame = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    # Keep the order COLUMN_MAPS declares, regardless of the export's column order
+    return frame[[target for target in COLUMN_MAPS[data_type] if target in frame.columns]]
+
+def _downcast(series):
+    values = pd.to_numeric(series, errors='coerce')
+    if values.notna().all() and (values % 1 == 0).all():
+        return pd.to_numeric(values, downcast='integer')
+    return values.astype('float64')
+
+def to_records(frame):
+    """Row dicts with missing cells as None, for transports that still expect JSON rows."""
+    if not isinstance(frame, pd.DataFrame):
+        return frame or []
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
@@ -0,0 +1,122 @@
+"""
+Spendsignal.ai - Executive summary
+The AI: Generate Insights prompt, cached by its inputs, with a deterministic template used
+whenever the model is skipped, slow or unavailable.
+"""
+
+import math
+from contextlib import nullcontext
+
+import requests
+
+from cache import content_key
+from frames import bucket_rows
+
+OPENAI_URL = 'https://api.openai.com/v1/chat/completions'
+MODEL = 'gpt-4o-mini'
+MAX_TOKENS = 500
+SYSTEM_PROMPT = ('You are a marketing analytics expert. Analyze the data and provide a concise executive summary '
+                 '(3-4 sentences) highlighting the most important findings and recommended actions. Be specific '
+                 'with numbers. Focus on: 1) Biggest waste of money, 2) Best opportunity, 3) Quick wins.')
+
+
+def _js_number(value):
+    # `${x}`: integral numbers print without a decimal point
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+def _rounded(value):
+    # Math.round(x).toLocaleString('en-US')
+    return f"{int(math.floor(float(value) + 0.5)):,}"
+
+def prompt_inputs(results):
+    """Everything the prompt (and the template) reads from an analysis response, in either format."""
+    stats = results.get('stats', {})
+    summary = results.get('summary', {})
+    recommendations = results.get('recommendations', {})
+    return {
+        'summary': {action: summary.get(action, 0) for action in ('stop', 'fix', 'invest', 'observe')},
+        'total_savings': stats.get('total_savings', 0),
+        'total_spend': stats.get('total_spend', 0),
+        'avg_confidence': stats.get('avg_confidence', 0),
+        'top_stop': [[row['keyword'], row['ads']['spend']] for row in bucket_rows(recommendations.get('stop'), 3)],
+        'top_invest': [[row['keyword'], (row.get('derived') or {}).get('roi') or 0]
+                       for row in bucket_rows(recommendations.get('invest'), 3)],
+    }
+
+def user_prompt(inputs):
+    summary = inputs['summary']
+    top_stop = ', '.join(f"{keyword} (${_js_number(spend)})" for keyword, spend in inputs['top_stop'])
+    top_invest = ', '.join(f"{keyword} (ROI: {_js_number(roi)}x)" for keyword, roi in inputs['top_invest'])
+    return (f"Marketing Analysis Summary:\n\n"
+            f"STOP (pause these): {summary['stop']} keywords wasting ${_js_number(inputs['total_savings'])}/month\n"
+            f"FIX (optimize): {summary['fix']} keywords\n"
+            f"INVEST (scale): {summary['invest']} keywords\n"
+            f"OBSERVE: {summary['observe']} keywords\n\n"
+            f"Top STOP keywords: {top_stop}\n"
+            f"Top INVEST keywords: {top_invest}\n\n"
+            f"Total spend analyzed: ${_js_number(inputs['total_spend'])}\n"
+            f"Average confidence: {_js_number(inputs['avg_confidence'])}%\n\n"
+            f"Provide a brief executive summary.")
+
+def template_insight(inputs):
+    """A deterministic summary from the same inputs; Build Response's templateInsight() says the same."""
+    summary = inputs['summary']
+    sentences = []
+    if summary['stop']:
+        worst = ', '.join(f"{keyword} (${_rounded(spend)})" for keyword, spend in inputs['top_stop'])
+        sentences.append(f"{summary['stop']} keywords are costing ${_rounded(inputs['total_savings'])}/month "
+                         f"without enough return; pause them first, starting with {worst}.")
+    else:
+        sentences.append("No keywords need pausing right now.")
+    if summary['invest']:
+        best = ', '.join(f"{keyword} ({_js_number(math.floor(float(roi) * 10 + 0.5) / 10)}x ROI)"
+                         for keyword, roi in inputs['top_invest'])
+        sentences.append(f"{summary['invest']} keywords are ready to scale, led by {best}.")
+    if summary['fix']:
+        sentences.append(f"{summary['fix']} keywords have traction but need optimization.")
+    sentences.append(f"{summary['observe']} keywords need more data; average confidence is "
+                     f"{_js_number(inputs['avg_confidence'])}% across ${_rounded(inputs['total_spend'])} of spend.")
+    return ' '.join(sentences)
+
+def insight_key(inputs):
+    return content_key(MODEL, SYSTEM_PROMPT, user_prompt(inputs))
+
+def cached_insight(results, cache):
+    """The cached model answer for these results, or None."""
+    return cache.get(insight_key(prompt_inputs(results))) if cache is not None else None
+
+def _complete(prompt, api_key, client, timeout):
+    payload = {'model': MODEL, 'max_tokens': MAX_TOKENS,
+               'messages': [{'role': 'system', 'content': SYSTEM_PROMPT}, {'role': 'user', 'content': prompt}]}
+    headers = {'Authorization': f'Bearer {api_key}'}
+    if client is None:
+        response = requests.post(OPENAI_URL, json=payload, headers=headers, timeout=timeout)
+    else:
+        response = client.post(OPENAI_URL, body_factory=lambda: {'json': payload}, headers=headers, timeout=timeout)
+    response.raise_for_status()
+    return response.json()['choices'][0]['message']['content']
+
+def generate_insight(results, api_key=None, cache=None, client=None, timeout=20, mode='llm', limit=None):
+    """Return (insight, source) with source 'cache', 'llm' or 'template'; never raises.
+
+    The model is asked only in 'llm' mode with an api_key, and only on a cache miss; any
+    failure or a timeout (seconds) falls back to the template. limit, if given, is a
+    semaphore held around the call so a batch keeps a bounded number of requests in flight.
+    """
+    inputs = prompt_inputs(results)
+    if mode != 'llm' or not api_key:
+        return template_insight(inputs), 'template'
+    prompt = user_prompt(inputs)
+    key = insight_key(inputs)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        return cached, 'cache'
+    try:
+        with limit or nullcontext():
+            insight = _complete(prompt, api_key, client, timeout)
+    except (requests.exceptions.RequestException, KeyError, IndexError, TypeError, ValueError):
+        return template_insight(inputs), 'template'
+    if cache is not None:
+        cache.set(key, insight)
+    return insight, 'llm'
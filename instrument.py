@@ -0,0 +1,139 @@
+"""
+Spendsignal.ai - Stage instrumentation
+Wall time and memory per analysis stage, exportable as JSON log lines or Prometheus text.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MB = 1024 * 1024
+
+_tracing_lock = threading.Lock()
+_tracing_stages = 0
+_tracing_owned = False
+
+
+class StageTimer:
+    """Records one dict per stage, in the order the stages ran:
+
+        {'stage', 'component', 'seconds', 'peak_mb', 'rss_mb'}
+
+    component says where the stage ran ('app', 'engine' or 'n8n'). rss_mb is the process's
+    peak resident memory so far — cheap, but process-wide. peak_mb is the most Python memory
+    the stage itself allocated at once, from tracemalloc; tracing slows allocation-heavy
+    stages several-fold, so it is only recorded with trace_memory=True.
+    Stages should not nest: a nested traced stage resets the outer one's peak.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, component='app'):
+        base = _start_tracing() if self.trace_memory else None
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            peak = _stop_tracing(base) if self.trace_memory else None
+            self.add(name, seconds, component, peak, peak_rss_mb())
+
+    def add(self, name, seconds, component='app', peak_mb=None, rss_mb=None):
+        self.stages.append({'stage': name, 'component': component, 'seconds': seconds,
+                            'peak_mb': peak_mb, 'rss_mb': rss_mb})
+
+    def extend(self, stages):
+        """Append stages measured elsewhere (e.g. the n8n workflow's timings)."""
+        self.stages.extend(dict(stage) for stage in stages or [])
+
+    def as_dict(self):
+        return {'stages': list(self.stages), 'total_s': time.perf_counter() - self.started,
+                'memory_traced': self.trace_memory}
+
+
+def _start_tracing():
+    # Refcounted so concurrent jobs share one tracemalloc session; returns the baseline
+    global _tracing_stages, _tracing_owned
+    with _tracing_lock:
+        if _tracing_stages == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_stages += 1
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+def _stop_tracing(base):
+    global _tracing_stages, _tracing_owned
+    with _tracing_lock:
+        peak = max(tracemalloc.get_traced_memory()[1] - base, 0) / MB
+        _tracing_stages -= 1
+        if _tracing_stages == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+        return peak
+
+def peak_rss_mb():
+    """The process's peak resident set size so far, or None where it can't be read."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / MB if sys.platform == 'darwin' else peak / 1024
+
+# ===== EXPORT =====
+
+def log_record(timings, **labels):
+    """One JSON line for a structured log: timestamp, labels, then the timings."""
+    record = {'ts': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'), **labels, **timings}
+    return json.dumps(record, default=str)
+
+def append_log(path, timings, **labels):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(log_record(timings, **labels) + '\n')
+
+def _label_set(labels):
+    escaped = {key: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for key, value in labels.items()}
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped.items()) + '}'
+
+def prometheus_text(timings, **labels):
+    """Prometheus text exposition of one run's timings (gauges, base units)."""
+    metrics = [
+        ('spendsignal_stage_seconds', 'Wall time of an analysis stage.', 'seconds', 1),
+        ('spendsignal_stage_peak_bytes', 'Peak Python memory allocated during an analysis stage.', 'peak_mb', MB),
+        ('spendsignal_stage_rss_bytes', 'Process peak resident memory when an analysis stage finished.', 'rss_mb', MB),
+    ]
+    lines = []
+    for name, help_text, field, scale in metrics:
+        samples = [(stage, stage[field]) for stage in timings.get('stages', []) if stage.get(field) is not None]
+        if not samples:
+            continue
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+        for stage, value in samples:
+            label_set = _label_set({**labels, 'stage': stage['stage'], 'component': stage['component']})
+            lines.append(f'{name}{label_set} {value * scale:.6g}')
+    lines += ['# HELP spendsignal_analysis_seconds Wall time of the whole analysis.',
+              '# TYPE spendsignal_analysis_seconds gauge',
+              f"spendsignal_analysis_seconds{_label_set(labels)} {timings.get('total_s', 0):.6g}"]
+    return '\n'.join(lines) + '\n'
+
+def write_prometheus(path, timings, **labels):
+    # Written whole then renamed, so a textfile collector never reads half a file
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(prometheus_text(timings, **labels))
+    os.replace(tmp_path, path)
@@ -0,0 +1,81 @@
+"""
+Spendsignal.ai - Background analysis jobs
+Submit work to a thread pool, get a job id back immediately, and poll its progress.
+"""
+
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class Job:
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = QUEUED
+        self.progress = 0
+        self.message = 'Queued...'
+        self.result = None
+        self.partial = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def update(self, progress, message):
+        """Called from the worker as each pipeline stage starts."""
+        self.progress = int(progress)
+        self.message = message
+
+    def publish(self, partial):
+        """Called from the worker to let pollers show a usable result before the job finishes."""
+        self.partial = partial
+
+
+class JobManager:
+    def __init__(self, max_workers=4, retain_seconds=3600):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='spendsignal-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.retain_seconds = retain_seconds
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn(job, *args, **kwargs) in the background; its return value becomes job.result."""
+        job = Job(uuid.uuid4().hex[:12])
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.update(100, 'Analysis complete!')
+            job.status = DONE
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e) or e.__class__.__name__
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        cutoff = time.time() - self.retain_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at and job.finished_at < cutoff:
+                del self._jobs[job_id]
@@ -0,0 +1,235 @@
+"""
+Spendsignal.ai - Kaggle Live Demo sources
+Streaming port of the n8n "Download → Unzip → Parse CSV → Normalize (Kaggle)" chains.
+"""
+
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from cache import ParquetCache, content_key
+from engine import aggregate_source, normalize_kaggle_ads, normalize_kaggle_crm, normalize_kaggle_seo
+
+DOWNLOAD_URL = 'https://www.kaggle.com/api/v1/datasets/download/{slug}'
+
+# member = index of the CSV inside the zip, as the n8n Parse CSV nodes read file_0 / file_1.
+# version = a pinned datasetVersionNumber, or None for the latest.
+DATASETS = {
+    'ads': {'slug': 'nayakganesh007/google-ads-sales-dataset', 'version': None, 'member': 0, 'normalize': normalize_kaggle_ads},
+    'seo': {'slug': 'sheryshisingh/seo-keyword-research', 'version': None, 'member': 0, 'normalize': normalize_kaggle_seo},
+    'crm': {'slug': 'olistbr/marketing-funnel-olist', 'version': None, 'member': 1, 'normalize': normalize_kaggle_crm},
+}
+
+# Bump when the normalizers or aggregate columns change so stale Parquet files are ignored
+# (2: sums added in row order)
+FORMAT_VERSION = 2
+
+CHUNK_ROWS = 50_000
+DOWNLOAD_BLOCK_BYTES = 1024 * 1024
+# Below this a zip parses faster in the download thread than a worker process can start
+PROCESS_PARSE_MIN_BYTES = 8 * 1024 * 1024
+
+
+class DatasetCache(ParquetCache):
+    """Aggregated Kaggle sources as Parquet, with a JSON sidecar holding the download validators.
+
+    Within `revalidate_seconds` of the last check a cached source is used without touching the
+    network; after that the download is re-requested with If-None-Match / If-Modified-Since and
+    a 304 keeps the cached copy. Entries never expire on age alone, only by LRU over max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, revalidate_seconds=3600):
+        super().__init__(directory, max_entries=len(DATASETS) * 4, max_bytes=max_bytes, ttl_seconds=0)
+        self.revalidate_seconds = revalidate_seconds
+
+    def key(self, source):
+        dataset = DATASETS[source]
+        return f"{source}-{content_key(dataset['slug'], dataset['version'], dataset['member'], FORMAT_VERSION)[:16]}"
+
+    def _meta_path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def meta(self, key):
+        try:
+            with open(self._meta_path(key), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set_meta(self, key, meta):
+        path = self._meta_path(key)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    def validators(self):
+        """{source: [etag, last_modified]} while every cached source is current, else None.
+
+        Results computed from the cached sources can be reused under these validators; None
+        means some source is due for a conditional request, so the sources must be loaded first.
+        """
+        validators = {}
+        for source in DATASETS:
+            meta = self.meta(self.key(source))
+            if meta is None or time.time() - meta['checked_at'] >= self.revalidate_seconds:
+                return None
+            validators[source] = [meta.get('etag'), meta.get('last_modified')]
+        return validators
+
+    def _remove(self, name):
+        super()._remove(name)
+        super()._remove(name[:-len(self.suffix)] + '.json')
+
+
+def download_url(dataset):
+    url = DOWNLOAD_URL.format(slug=dataset['slug'])
+    return url if dataset['version'] is None else f"{url}?datasetVersionNumber={dataset['version']}"
+
+def save_download(response, directory=None):
+    """Stream a dataset zip response to a temporary file and return its path."""
+    fd, path = tempfile.mkstemp(suffix='.zip', dir=directory)
+    with os.fdopen(fd, 'wb') as f:
+        for block in response.iter_content(DOWNLOAD_BLOCK_BYTES):
+            f.write(block)
+    return path
+
+def iter_csv_chunks(zip_path, member, chunk_rows=CHUNK_ROWS):
+    with zipfile.ZipFile(zip_path) as archive:
+        names = [name for name in archive.namelist() if not name.endswith('/')]
+        with archive.open(names[member]) as f:
+            # Strings throughout, empty cells as '' — what the Normalize nodes see
+            yield from pd.read_csv(f, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+
+def stream_source(source, zip_path, chunk_rows=CHUNK_ROWS):
+    """Normalize a dataset chunk by chunk, folding each chunk into per-keyword aggregates.
+
+    Peak memory is one raw chunk plus one row per distinct keyword, whatever the file size.
+    Returns (aggregates with a keyword column, rows read).
+    """
+    normalize = DATASETS[source]['normalize']
+    folded = None
+    rows = 0
+    for chunk in iter_csv_chunks(zip_path, DATASETS[source]['member'], chunk_rows):
+        rows += len(chunk)
+        normalized = normalize(chunk)
+        # The running aggregates first, then this chunk's raw rows, so sums continue in row order
+        folded = aggregate_source(normalized if folded is None else pd.concat([folded, normalized], ignore_index=True),
+                                  source).reset_index()
+    if folded is None:
+        folded = aggregate_source(None, source).reset_index()
+    return folded, rows
+
+def load_source(client, auth, source, store=None, parse_pool=None):
+    """Return (aggregates, stats) for one dataset, from `store` when it is still current.
+
+    Large zips are parsed in `parse_pool` (a process pool) so branches don't contend for the GIL.
+    """
+    key = store.key(source) if store else None
+    meta = store.meta(key) if store else None
+    cached = store.get(key) if meta else None
+    if cached is not None and time.time() - meta['checked_at'] < store.revalidate_seconds:
+        return cached, {'rows': meta['rows'], 'cache': 'fresh', 'download_s': 0.0, 'parse_s': 0.0}
+
+    headers = {}
+    if cached is not None:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    started = time.perf_counter()
+    response = client.request('GET', download_url(DATASETS[source]), idempotent=True,
+                              auth=auth, headers=headers, stream=True, timeout=120)
+    if response.status_code == 304 and cached is not None:
+        response.close()
+        store.set_meta(key, {**meta, 'checked_at': time.time()})
+        return cached, {'rows': meta['rows'], 'cache': 'revalidated',
+                        'download_s': time.perf_counter() - started, 'parse_s': 0.0}
+
+    response.raise_for_status()
+    path = save_download(response)
+    try:
+        downloaded = time.perf_counter()
+        if parse_pool and os.path.getsize(path) >= PROCESS_PARSE_MIN_BYTES:
+            frame, rows = parse_pool.submit(stream_source, source, path).result()
+        else:
+            frame, rows = stream_source(source, path)
+    finally:
+        os.remove(path)
+    finished = time.perf_counter()
+    if store:
+        store.set(key, frame)
+        store.set_meta(key, {'slug': DATASETS[source]['slug'], 'version': DATASETS[source]['version'],
+                             'etag': response.headers.get('ETag'),
+                             'last_modified': response.headers.get('Last-Modified'),
+                             'rows': rows, 'checked_at': time.time()})
+    return frame, {'rows': rows, 'cache': 'miss', 'download_s': downloaded - started, 'parse_s': finished - downloaded}
+
+def _fallback_source(source, store, error):
+    """The last cached copy of a source that failed to load, else its empty aggregate."""
+    key = store.key(source) if store else None
+    meta = store.meta(key) if store else None
+    cached = store.get(key) if meta else None
+    if cached is not None:
+        return cached, {'rows': meta['rows'], 'cache': 'stale', 'download_s': 0.0, 'parse_s': 0.0, 'error': error}
+    return aggregate_source(None, source).reset_index(), {'rows': 0, 'cache': 'failed', 'download_s': 0.0,
+                                                          'parse_s': 0.0, 'error': error}
+
+def _timed_branch(client, auth, source, store, parse_pool, origin):
+    started = time.perf_counter()
+    try:
+        frame, stats = load_source(client, auth, source, store, parse_pool)
+    except Exception as e:
+        # One unavailable dataset shouldn't sink the other two
+        frame, stats = _fallback_source(source, store, f"{type(e).__name__}: {e}")
+    finished = time.perf_counter()
+    return frame, {**stats, 'start_s': started - origin, 'end_s': finished - origin, 'total_s': finished - started}
+
+def load_kaggle_sources(client, auth, progress=None, store=None):
+    """Load the three Live Demo datasets concurrently, one download thread per source.
+
+    Returns ({source: aggregates}, timings) where timings holds per-branch stats, the wall time,
+    the sum of branch times and the branch on the critical path. A branch that fails falls back
+    to its last cached copy, or to no rows, with the failure under branches[source]['error'];
+    only when every branch fails with nothing cached is the error raised.
+    """
+    report = progress or (lambda percent, message: None)
+    report(10, "🌐 Loading Ads, SEO and CRM datasets from Kaggle...")
+    origin = time.perf_counter()
+    sources, branches = {}, {}
+    # Worker processes only pay off with a core per parse; spawn because forking a process
+    # that is already running threads can deadlock
+    workers = min(len(DATASETS), os.cpu_count() or 1)
+    parse_pool = (ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+                  if workers > 1 else None)
+    try:
+        with ThreadPoolExecutor(max_workers=len(DATASETS), thread_name_prefix='kaggle-io') as io_pool:
+            futures = {io_pool.submit(_timed_branch, client, auth, source, store, parse_pool, origin): source
+                       for source in DATASETS}
+            for done, future in enumerate(as_completed(futures), 1):
+                source = futures[future]
+                sources[source], branches[source] = future.result()
+                if 'error' in branches[source]:
+                    report(10 + done * 8, f"⚠️ {source.upper()} dataset unavailable, using {branches[source]['cache']} data")
+                else:
+                    report(10 + done * 8, f"✅ {source.upper()} dataset ready ({branches[source]['rows']:,} rows)")
+    finally:
+        if parse_pool:
+            parse_pool.shutdown()
+    if all(branch['cache'] == 'failed' for branch in branches.values()):
+        raise RuntimeError("Couldn't load any Kaggle dataset: " +
+                           "; ".join(f"{source}: {branch['error']}" for source, branch in branches.items()))
+    critical = max(branches, key=lambda source: branches[source]['total_s'])
+    return sources, {
+        'branches': branches,
+        'wall_s': time.perf_counter() - origin,
+        'sum_s': sum(branch['total_s'] for branch in branches.values()),
+        'critical_path': critical,
+    }
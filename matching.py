@@ -0,0 +1,251 @@
+"""
+Spendsignal.ai - Keyword matching
+Folds keyword variants from every source onto one canonical keyword: token normalization,
+alias maps, and MinHash-blocked fuzzy matching that stays near-linear in keyword count.
+"""
+
+import json
+import re
+import unicodedata
+import zlib
+
+import numpy as np
+
+MODES = ['exact', 'normalized', 'fuzzy']
+
+_TOKEN = re.compile(r'[^\W_]+')
+# Words whose trailing s is not a plural
+_UNSTEMMED = {'news', 'series', 'species', 'lens', 'gas', 'yes', 'this', 'always', 'perhaps', 'canvas', 'chaos'}
+_MIX = np.uint64(0xFF51AFD7ED558CCD)
+
+
+# ===== NORMALIZATION =====
+
+def _stem(token):
+    # Plural folding only; anything cleverer merges keywords that mean different things
+    if token in _UNSTEMMED:
+        return token
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 4 and token.endswith(('sses', 'xes', 'zes', 'ches', 'shes')):
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')) and not token.isdigit():
+        return token[:-1]
+    return token
+
+def normalize_keyword(keyword):
+    """'Running-Shoes ' / 'running shoes' / 'running  shoe' → 'running shoe'."""
+    text = str(keyword).lower()
+    if not text.isascii():
+        text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    return ' '.join(_stem(token) for token in _TOKEN.findall(text))
+
+def load_aliases(source):
+    """{alias: keyword} from a dict, a JSON file path, or None."""
+    if not source:
+        return {}
+    if isinstance(source, str):
+        with open(source, encoding='utf-8') as f:
+            source = json.load(f)
+    return {str(alias): str(keyword) for alias, keyword in dict(source).items()}
+
+# ===== FUZZY MATCHING =====
+
+def _shingles(key, size=3):
+    padded = f' {key} '
+    return {padded[i:i + size] for i in range(max(len(padded) - size + 1, 1))}
+
+def minhash_signatures(shingle_sets, num_perm=64, seed=0):
+    """(len(shingle_sets), num_perm) MinHash signatures, one hash permutation at a time."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+    # Each distinct shingle is hashed and permuted once; keywords gather from that table
+    vocabulary = {}
+    lengths = np.fromiter((len(s) for s in shingle_sets), dtype=np.int64, count=len(shingle_sets))
+    ids = np.fromiter((vocabulary.setdefault(shingle, len(vocabulary)) for s in shingle_sets for shingle in s),
+                      dtype=np.int64, count=int(lengths.sum()))
+    hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in vocabulary), dtype=np.uint64,
+                         count=len(vocabulary))
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    signatures = np.empty((len(shingle_sets), num_perm), dtype=np.uint64)
+    for i in range(num_perm):
+        # Odd multiplier mod 2^64, then the murmur3 finalizer so the low hash bits mix into the high
+        # ones; without it every permutation would keep roughly the same smallest shingle
+        permuted = a[i] * hashes + b[i]
+        permuted ^= permuted >> np.uint64(33)
+        permuted *= _MIX
+        permuted ^= permuted >> np.uint64(33)
+        signatures[:, i] = np.minimum.reduceat(permuted[ids], starts)
+    return signatures
+
+def candidate_pairs(signatures, bands=16, salt=None, max_bucket=16):
+    """Index pairs (i < j) that share at least one LSH band.
+
+    salt, one uint64 per row, is mixed into every band so rows with different salts never
+    pair. Buckets of up to max_bucket rows pair all their members; larger ones (many near
+    copies) only pair neighbours, so each band adds at most max_bucket pairs per row and
+    union-find still connects the bucket.
+    """
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    salt = np.zeros(n, dtype=np.uint64) if salt is None else salt
+    pairs = []
+    for band in range(bands):
+        # FNV-style mix of the band's rows; a collision only adds a candidate to verify
+        mixed = salt.copy()
+        for row in signatures[:, band * rows:(band + 1) * rows].T:
+            mixed = (mixed ^ row) * np.uint64(0x100000001B3)
+        order = np.argsort(mixed, kind='stable')
+        sorted_mixed = mixed[order]
+        starts = np.r_[True, sorted_mixed[1:] != sorted_mixed[:-1]]
+        sizes = np.diff(np.r_[np.flatnonzero(starts), n])
+        small = np.repeat(sizes <= max_bucket, sizes)
+        for offset in range(1, max_bucket):
+            same = sorted_mixed[offset:] == sorted_mixed[:-offset]
+            if offset > 1:
+                same &= small[offset:]
+            if not same.any():
+                break
+            pairs.append(np.stack([order[:-offset][same], order[offset:][same]], axis=1))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = np.concatenate(pairs)
+    codes = np.unique(np.minimum(pairs[:, 0], pairs[:, 1]) * n + np.maximum(pairs[:, 0], pairs[:, 1]))
+    return np.stack([codes // n, codes % n], axis=1)
+
+def _edits_within(a, b, limit):
+    """True if the Levenshtein distance between a and b is at most limit."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+def same_keyword(a, b):
+    """Whether two normalized keywords differ only by typos: same token count, numbers equal,
+    and each differing token within one edit (two for tokens of 8+ characters).
+
+    Shingle overlap alone would merge 'shoes for men' with 'shoes for women'.
+    """
+    left, right = a.split(), b.split()
+    if len(left) != len(right):
+        return False
+    common = set(left) & set(right)
+    left = sorted(token for token in left if token not in common)
+    right = sorted(token for token in right if token not in common)
+    if len(left) != len(right) or any(token.isdigit() for token in left + right):
+        return False
+    unmatched = list(right)
+    for token in left:
+        limit = 2 if len(token) >= 8 else 1
+        # Short tokens are where one edit changes the meaning ('men' / 'man')
+        match = next((other for other in unmatched if min(len(token), len(other)) > 3
+                      and _edits_within(token, other, limit)), None)
+        if match is None:
+            return False
+        unmatched.remove(match)
+    return True
+
+
+class _UnionFind:
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        # The smaller index (earlier keyword) stays the root, so clusters keep first appearance
+        i, j = self.find(i), self.find(j)
+        if i != j:
+            self.parent[max(i, j)] = min(i, j)
+
+
+class KeywordMatcher:
+    """Maps each keyword onto the canonical keyword of its match group.
+
+    mode 'exact' only applies aliases; 'normalized' also folds case, accents, punctuation and
+    plurals; 'fuzzy' also merges typo variants found through MinHash/LSH blocking, verified by
+    shingle Jaccard >= threshold and same_keyword(). The canonical keyword of a group is the
+    member seen first, so pass keywords in appearance order.
+    """
+
+    def __init__(self, mode='fuzzy', aliases=None, threshold=0.7, num_perm=64, bands=16, seed=0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown matching mode: {mode!r} (expected one of {', '.join(MODES)})")
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.mode = mode
+        self.aliases = load_aliases(aliases)
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.seed = seed
+
+    def config(self):
+        """Everything that changes the mapping, for cache keys."""
+        return {'mode': self.mode, 'aliases': self.aliases, 'threshold': self.threshold,
+                'num_perm': self.num_perm, 'bands': self.bands, 'seed': self.seed}
+
+    def _key(self, keyword):
+        return normalize_keyword(keyword) if self.mode != 'exact' else str(keyword).strip().lower()
+
+    def match(self, keywords):
+        """Return ({keyword: canonical} for keywords that change, counts by reason)."""
+        keywords = list(dict.fromkeys(keywords))
+        aliases = {self._key(alias): self._key(target) for alias, target in self.aliases.items()}
+        keys, aliased = [], 0
+        for keyword in keywords:
+            key = self._key(keyword)
+            if key in aliases:
+                key, aliased = aliases[key], aliased + 1
+            keys.append(key)
+
+        # Group by key; the first keyword seen with a key stands for it
+        first = {}
+        for keyword, key in zip(keywords, keys):
+            first.setdefault(key, keyword)
+        # An alias target that is itself a keyword takes that keyword's spelling
+        for alias, target in self.aliases.items():
+            first.setdefault(aliases[self._key(alias)], target.strip().lower())
+        unique = list(dict.fromkeys(keys))
+        root = {key: key for key in unique}
+        fuzzy = 0
+        if self.mode == 'fuzzy' and len(unique) > 1:
+            shingles = [_shingles(key) for key in unique]
+            signatures = minhash_signatures(shingles, self.num_perm, self.seed)
+            # Keywords only match when their numbers agree, so the numbers salt the blocking
+            numbers = np.fromiter((zlib.crc32(' '.join(t for t in key.split() if t.isdigit()).encode('utf-8'))
+                                   for key in unique), dtype=np.uint64, count=len(unique))
+            tokens = np.fromiter((key.count(' ') for key in unique), dtype=np.int64, count=len(unique))
+            pairs = candidate_pairs(signatures, self.bands, salt=numbers)
+            pairs = pairs[tokens[pairs[:, 0]] == tokens[pairs[:, 1]]]
+            # The share of equal signature slots estimates Jaccard; only plausible pairs reach Python
+            estimate = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+            groups = _UnionFind(len(unique))
+            for i, j in pairs[estimate >= self.threshold - 0.05].tolist():
+                a, b = shingles[i], shingles[j]
+                if same_keyword(unique[i], unique[j]) and len(a & b) >= self.threshold * len(a | b):
+                    groups.union(i, j)
+            for i, key in enumerate(unique):
+                root[key] = unique[groups.find(i)]
+            fuzzy = sum(1 for key in unique if root[key] != key)
+
+        mapping = {}
+        for keyword, key in zip(keywords, keys):
+            canonical = first[root[key]]
+            if canonical != keyword:
+                mapping[keyword] = canonical
+        counts = {'keywords': len(keywords), 'canonical': len(set(first[root[key]] for key in keys)),
+                  'aliased': aliased, 'fuzzy': fuzzy}
+        return mapping, counts
@@ -0,0 +1,118 @@
+"""
+Spendsignal.ai - PDF report
+reportlab is imported and the styles are built once, when this module is first imported.
+"""
+
+from datetime import datetime
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from frames import bucket_rows, confidence_notes
+
+# ===== STYLES =====
+
+STYLES = getSampleStyleSheet()
+TITLE_STYLE = ParagraphStyle('CustomTitle', parent=STYLES['Heading1'], fontSize=24, textColor=colors.HexColor('#1e3a5f'), spaceAfter=20)
+HEADING_STYLE = ParagraphStyle('CustomHeading', parent=STYLES['Heading2'], fontSize=14, textColor=colors.HexColor('#1e3a5f'), spaceBefore=20, spaceAfter=10)
+FOOTER_STYLE = ParagraphStyle('Footer', parent=STYLES['Normal'], fontSize=8, textColor=colors.gray)
+
+SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a5f')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f9fafb')),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ('PADDING', (0, 0), (-1, -1), 8),
+])
+
+RECOMMENDATION_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#374151')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e5e7eb')),
+    ('PADDING', (0, 0), (-1, -1), 6),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+SECTIONS = [
+    ('STOP - PAUSE IMMEDIATELY', 'stop'),
+    ('FIX - OPTIMIZE THESE', 'fix'),
+    ('INVEST - SCALE UP', 'invest'),
+]
+
+# ===== BUILD =====
+
+def _reason_cell(item, flag_table):
+    # The reason, then any data the confidence score is missing on a second line
+    reason = item.get('classification', {}).get('reason', '')[:40]
+    _, warnings = confidence_notes(item.get('confidence'), flag_table)
+    return f"{reason}\n{'; '.join(warnings)}" if warnings else reason
+
+def generate_pdf_report(results):
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.75*inch, bottomMargin=0.75*inch)
+
+    story = []
+    story.append(Paragraph("SPENDSIGNAL.AI", TITLE_STYLE))
+    story.append(Paragraph("Marketing Intelligence Report", STYLES['Heading2']))
+    story.append(Spacer(1, 12))
+    story.append(Paragraph(f"Generated: {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", STYLES['Normal']))
+    story.append(Spacer(1, 20))
+    story.append(Paragraph("EXECUTIVE SUMMARY", HEADING_STYLE))
+
+    stats = results.get('stats', {})
+    summary = results.get('summary', {})
+    summary_data = [
+        ['Metric', 'Value'],
+        ['Monthly Savings Identified', f"${stats.get('total_savings', 0):,}"],
+        ['Annual Impact', f"${stats.get('annual_savings', 0):,}"],
+        ['Keywords Analyzed', str(stats.get('total_units', 0))],
+        ['Average Confidence', f"{stats.get('avg_confidence', 0)}%"],
+        ['Actions Required', str(summary.get('stop', 0) + summary.get('fix', 0) + summary.get('invest', 0))]
+    ]
+    summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
+    summary_table.setStyle(SUMMARY_TABLE_STYLE)
+    story.append(summary_table)
+    story.append(Spacer(1, 20))
+
+    ai_insight = results.get('ai_insight', '')
+    if ai_insight:
+        story.append(Paragraph("AI INSIGHT", HEADING_STYLE))
+        story.append(Paragraph(ai_insight, STYLES['Normal']))
+        story.append(Spacer(1, 20))
+
+    recommendations = results.get('recommendations', {})
+    flag_table = results.get('confidence_flags')
+    for title, action in SECTIONS:
+        data_list = bucket_rows(recommendations.get(action, []), limit=10)
+        if data_list:
+            story.append(Paragraph(title, HEADING_STYLE))
+            table_data = [['Keyword', 'Spend', 'Reason', 'Confidence']]
+            for item in data_list:
+                table_data.append([
+                    item.get('keyword', '')[:30],
+                    f"${item.get('ads', {}).get('spend', 0):,.0f}",
+                    _reason_cell(item, flag_table),
+                    f"{item.get('confidence', {}).get('score', 0)}%"
+                ])
+            rec_table = Table(table_data, colWidths=[1.5*inch, 0.8*inch, 2.7*inch, 0.8*inch])
+            rec_table.setStyle(RECOMMENDATION_TABLE_STYLE)
+            story.append(rec_table)
+            story.append(Spacer(1, 15))
+
+    story.append(Spacer(1, 30))
+    story.append(Paragraph("Generated by Spendsignal.ai | spendsignal.ai | Built by Rupam Patra", FOOTER_STYLE))
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
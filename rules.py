@@ -0,0 +1,191 @@
+"""
+Spendsignal.ai - Scoring and classification rules
+Per-goal rule sets from rules.json, compiled once into NumPy expressions over whole columns.
+"""
+
+import ast
+import json
+import operator
+import os
+import string
+from functools import lru_cache, reduce
+
+import numpy as np
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules.json')
+
+# Column names a rule may use; the engine fills derived rates' nulls with 0, as `|| 0` does in n8n
+NAMES = {'spend', 'impressions', 'clicks', 'conversions', 'leads', 'qualified_leads', 'volume', 'competition',
+         'roi', 'ctr', 'conversion_rate', 'qualification_rate', 'cpl', 'cpa',
+         'efficiency', 'opportunity', 'quality', 'confidence'}
+
+_COMPARE = {ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+            ast.Eq: operator.eq, ast.NotEq: operator.ne}
+_BINARY = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+_CALLS = {'min': np.minimum, 'max': np.maximum, 'abs': np.abs}
+
+
+# ===== EXPRESSIONS =====
+
+def compile_expression(text, params, names=NAMES):
+    """'spend > stop_spend and conversions == 0' → function(columns) evaluated over whole arrays.
+
+    Only comparisons, and/or/not, + - * /, min/max/abs, numbers, strings, column names and
+    params are allowed; params are folded in as constants here, once.
+    """
+    def build(node):
+        if isinstance(node, ast.BoolOp):
+            parts = [build(value) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return lambda columns: reduce(combine, (part(columns) for part in parts))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub)):
+            inner = build(node.operand)
+            apply = np.logical_not if isinstance(node.op, ast.Not) else operator.neg
+            return lambda columns: apply(inner(columns))
+        if isinstance(node, ast.Compare) and all(type(op) in _COMPARE for op in node.ops):
+            # a < b < c means a < b and b < c
+            operands = [build(node.left)] + [build(value) for value in node.comparators]
+            pairs = [(_COMPARE[type(op)], operands[i], operands[i + 1]) for i, op in enumerate(node.ops)]
+            return lambda columns: reduce(np.logical_and, (op(left(columns), right(columns))
+                                                           for op, left, right in pairs))
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            op, left, right = _BINARY[type(node.op)], build(node.left), build(node.right)
+            return lambda columns: op(left(columns), right(columns))
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _CALLS
+                and not node.keywords and node.args):
+            call, args = _CALLS[node.func.id], [build(arg) for arg in node.args]
+            if call is np.abs:
+                return lambda columns: call(args[0](columns))
+            return lambda columns: reduce(call, (arg(columns) for arg in args))
+        if isinstance(node, ast.Name):
+            if node.id in params:
+                value = params[node.id]
+                return lambda columns: value
+            if node.id in names:
+                return lambda columns: columns[node.id]
+            raise ValueError(f"Unknown name {node.id!r} in rule expression {text!r}")
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)) and not isinstance(node.value, bool):
+            value = node.value
+            return lambda columns: value
+        raise ValueError(f"Unsupported syntax {ast.unparse(node)!r} in rule expression {text!r}")
+
+    try:
+        tree = ast.parse(str(text).strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Invalid rule expression {text!r}: {e.msg}") from None
+    return build(tree.body)
+
+def compile_template(text, params, names=NAMES):
+    """'High spend (${spend:.0f})' → [(literal, expression or None, decimals or None), ...].
+
+    A field without a format spec prints like JavaScript's `${x}`; '.Nf' prints like toFixed(N).
+    """
+    parts = []
+    for literal, field, spec, conversion in string.Formatter().parse(text):
+        if field is None:
+            parts.append((literal, None, None))
+            continue
+        if conversion or (spec and not (spec.startswith('.') and spec.endswith('f') and spec[1:-1].isdigit())):
+            raise ValueError(f"Unsupported format {{{field}:{spec}}} in reason {text!r} (use {{x}} or {{x:.Nf}})")
+        parts.append((literal, compile_expression(field, params, names), int(spec[1:-1]) if spec else None))
+    return parts
+
+
+# ===== RULE SETS =====
+
+class RuleSet:
+    """One goal's scoring and classification rules, compiled.
+
+    scores: [(name, base, [[(condition, points), ...], ...])] — each inner list is first-match
+    and adds its points; composite is an expression over the scores. actions: first-match
+    rules, in file order, with the goal's params folded in; default applies when none match.
+
+    A param may be an array shaped (k, 1) instead of a number: every rule then evaluates to
+    (k, rows), one row of results per value (see with_params).
+    """
+
+    def __init__(self, spec, goal='roas', params=None):
+        if goal not in spec.get('goals', {}):
+            raise ValueError(f"Unknown goal: {goal!r} (expected one of {', '.join(spec.get('goals', {}))})")
+        overrides = spec['goals'][goal] or {}
+        params = {**spec.get('params', {}), **overrides.get('params', {}), **(params or {})}
+        actions = [rule for rule in spec['actions'] if goal in rule.get('goals', [goal])]
+        self.spec = spec
+        self.goal = goal
+        self.params = params
+        # Everything that decides the output, for cache keys
+        self.definition = {'goal': goal, 'params': params, 'scores': spec['scores'], 'actions': actions,
+                           'default': spec['default']}
+
+        scores = spec['scores']
+        self.scores = [(name, scores[name]['base'],
+                        [[(compile_expression(when, params), points) for when, points in group]
+                         for group in scores[name]['adjust']])
+                       for name in ('efficiency', 'opportunity', 'quality')]
+        self.composite = compile_expression(scores['composite'], params)
+
+        self.ids = [rule['id'] for rule in actions]
+        self.conditions = [compile_expression(rule['when'], params) for rule in actions]
+        self.actions = [rule['action'] for rule in actions] + [spec['default']['action']]
+        self.priorities = [rule['priority'] for rule in actions] + [spec['default']['priority']]
+        self.savings = [compile_expression(rule.get('savings', 0), params) for rule in actions]
+        self.potential = [compile_expression(rule.get('potential', 0), params) for rule in actions]
+        self.reasons = [compile_template(rule['reason'], params) for rule in actions] + \
+                       [compile_template(spec['default']['reason'], params)]
+        for rule in actions:
+            if rule['action'] not in ('STOP', 'FIX', 'INVEST', 'OBSERVE'):
+                raise ValueError(f"Rule {rule['id']!r} has unknown action {rule['action']!r}")
+
+        # Params some score or action rule compares against (what a what-if sweep can move)
+        texts = [when for name in ('efficiency', 'opportunity', 'quality') for group in scores[name]['adjust']
+                 for when, _ in group]
+        texts += [rule.get(key, 0) for rule in actions for key in ('when', 'savings', 'potential')]
+        used = set().union(*(_names(text) for text in texts))
+        self.thresholds = [name for name in params if name in used]
+
+    def with_params(self, **params):
+        """This rule set recompiled with some params replaced, e.g. stop_spend=np.array([[50], [100]])."""
+        unknown = set(params) - set(self.params)
+        if unknown:
+            raise ValueError(f"Unknown rule params: {', '.join(sorted(unknown))}")
+        return RuleSet(self.spec, self.goal, {**self.params, **params})
+
+    def score(self, columns):
+        """{'efficiency': ..., 'opportunity': ..., 'quality': ...} as float arrays clipped to 0-100."""
+        scores = {}
+        for name, base, groups in self.scores:
+            total = np.full(len(columns), float(base))
+            for group in groups:
+                conditions = _broadcast([when(columns) for when, _ in group], total.shape)
+                total = total + np.select(conditions, [points for _, points in group], 0)
+            scores[name] = np.clip(total, 0, 100)
+        return scores
+
+    def match(self, columns):
+        """Index of the first rule each row matches; len(self.ids) means the default."""
+        conditions = _broadcast([when(columns) for when in self.conditions], (len(columns),))
+        return np.select(conditions, np.arange(len(conditions)), len(conditions))
+
+
+def _names(text):
+    # Only called on expressions that already compiled
+    return {node.id for node in ast.walk(ast.parse(str(text).strip(), mode='eval')) if isinstance(node, ast.Name)}
+
+def _broadcast(values, shape):
+    # Conditions may be scalars, (rows,) or, with array params, (k, rows)
+    shape = np.broadcast_shapes(shape, *(np.shape(value) for value in values))
+    return [np.broadcast_to(value, shape) for value in values]
+
+
+def _load_spec(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+@lru_cache(maxsize=32)
+def _cached_rules(path, mtime, goal):
+    return RuleSet(_load_spec(path), goal)
+
+def load_rules(goal='roas', path=None):
+    """The compiled RuleSet for a goal; recompiled only when the rules file changes."""
+    path = os.path.abspath(path or RULES_PATH)
+    return _cached_rules(path, os.path.getmtime(path), goal)
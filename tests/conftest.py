@@ -0,0 +1,11 @@
+"""
+Spendsignal.ai - Test setup
+Puts the app's top-level modules (engine, rules, ...) and the benchmark data generator on the path.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(1, os.path.join(ROOT, 'benchmarks'))
@@ -0,0 +1,102 @@
+"""
+Spendsignal.ai - Engine parity fixtures
+Runs the n8n workflow's code nodes (Parse Uploaded Data → Score & Classify) under Node.js and
+stores their response next to the input, for tests/test_engine.py to compare the engine with.
+
+    python tests/fixtures/make_fixtures.py
+
+Re-run after changing the scoring nodes in n8n/workflow_webhook.json; needs `node` on the PATH.
+"""
+
+import gzip
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+WORKFLOW = os.path.join(ROOT, 'n8n', 'workflow_webhook.json')
+# benchmarks/generate.py output at this size has thousands of multi-row sums, enough to catch
+# float sums that differ from the JS loop's in the last digit
+GENERATED_KEYWORDS = 3000
+# The parts of the response that don't depend on the clock or the model
+COMPARED = ['stats', 'summary', 'recommendations', 'confidence_flags']
+
+DRIVER = r"""
+const fs = require('fs');
+const [, inputPath, workflowPath] = process.argv;
+const data = JSON.parse(fs.readFileSync(inputPath));
+const wf = JSON.parse(fs.readFileSync(workflowPath));
+const code = name => wf.nodes.find(n => n.name === name).parameters.jsCode;
+const next = name => wf.connections[name].main[0][0].node;
+const context = { mode: 'upload', goal: 'roas', budget: 10000, generated_at: '', ads_data: data.ads,
+                  seo_data: data.seo, crm_data: data.crm };
+const outputs = { 'Parse Input': [{ json: context }] };
+const run = (name, items) => {
+  const $ = n => ({ first: () => outputs[n][0], all: () => outputs[n] });
+  const $input = { all: () => items, first: () => items[0] };
+  outputs[name] = new Function('$input', '$', '$getWorkflowStaticData', code(name))($input, $, () => ({}));
+  return outputs[name];
+};
+let items = run('Parse Uploaded Data', outputs['Parse Input']);
+for (let name = 'Aggregate Data'; name !== 'AI: Check Cache'; name = next(name)) {
+  items = run(name, JSON.parse(JSON.stringify(items)));
+}
+process.stdout.write(JSON.stringify(items[0].json));
+"""
+
+
+def workflow_response(data):
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, 'input.json')
+        with open(input_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        output = subprocess.run(['node', '-e', DRIVER, '--', input_path, WORKFLOW], capture_output=True, text=True,
+                                check=True).stdout
+    response = json.loads(output)
+    return {key: response[key] for key in COMPARED}
+
+def messy_data(seed=7, n=60):
+    """Rows the way uploads arrive: padded or upper-cased keywords, blanks, nulls, numeric strings."""
+    r = random.Random(seed)
+    keywords = [f'kw {i}' for i in range(n // 2)]
+    keyword = lambda: r.choice(keywords) + r.choice(['', ' ']) if r.random() < .9 else r.choice(keywords).upper()
+    number = lambda high: r.choice([0, r.randint(0, high), round(r.uniform(0, high), 2), None, '', str(r.randint(0, high))])
+    ads = [{'keyword': keyword(), 'campaign': r.choice([None, '', 'A', 'B']), 'impressions': number(20000),
+            'clicks': r.choice([0, None, r.randint(0, 500)]), 'spend': number(800), 'conversions': number(40),
+            'revenue': number(8000)} for _ in range(n)]
+    ads += [{'keyword': keyword(), 'cost': number(300), 'clicks': number(100)} for _ in range(n // 5)]
+    seo = [{r.choice(['keyword', 'text']): keyword(), r.choice(['volume', 'vol']): number(120000), 'cpc': number(5),
+            'competition': r.choice(['low', 'HIGH', 'medium', None, '']), 'score': number(90)} for _ in range(n)]
+    crm = [{r.choice(['origin', 'source', 'keyword']): keyword(), 'leads': r.choice([0, None, r.randint(0, 30)]),
+            'qualified_leads': r.choice([0, r.randint(0, 10)]), 'revenue': number(9000)} for _ in range(n)]
+    return {'ads': ads, 'seo': seo, 'crm': crm}
+
+def generated_data(seed=0):
+    sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+    from generate import generate
+
+    return {source: frame.to_dict('records') for source, frame in generate(GENERATED_KEYWORDS, seed).items()}
+
+def main():
+    synthetic = {}
+    for source in ('ads', 'seo', 'crm'):
+        with open(os.path.join(ROOT, 'data', f'synthetic_{source}.json'), encoding='utf-8') as f:
+            synthetic[source] = json.load(f)
+    # The synthetic input is data/, so only the response is stored for it. The generated input
+    # is stored too: NumPy doesn't promise the same random stream across versions.
+    cases = {'n8n_synthetic.json': (None, synthetic), 'n8n_messy.json': (messy_data(), None),
+             'n8n_generated.json.gz': (generated_data(), None)}
+    for name, (stored_input, data) in cases.items():
+        data = data or stored_input
+        fixture = {'input': stored_input, 'response': workflow_response(data)}
+        path = os.path.join(HERE, name)
+        with (gzip.open(path, 'wt', encoding='utf-8') if name.endswith('.gz') else open(path, 'w', encoding='utf-8')) as f:
+            json.dump(fixture, f, separators=(',', ':'))
+        print(f"Wrote {name}")
+
+if __name__ == '__main__':
+    main()
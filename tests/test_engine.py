@@ -0,0 +1,198 @@
+"""
+Spendsignal.ai - Engine parity tests
+The engine against the n8n workflow's own output, and the incremental, what-if and
+allocation paths against a full re-analysis.
+"""
+
+import gzip
+import json
+import math
+import os
+import random
+
+import numpy as np
+import pytest
+
+import engine
+from allocation import ELASTICITY, allocate_budget
+from engine import analyze, normalize_ads, normalize_crm, normalize_seo, run_local_analysis, summarize, sweep_thresholds
+from frames import units_frame
+from incremental import AggregateState
+from rules import load_rules
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPARED = ['stats', 'summary', 'recommendations']
+GOALS = ['roas', 'conversions', 'cpa', 'traffic']
+
+
+def assert_same(expected, actual, path='response'):
+    if isinstance(expected, dict):
+        assert isinstance(actual, dict) and set(expected) == set(actual), path
+        for key in expected:
+            assert_same(expected[key], actual[key], f'{path}.{key}')
+    elif isinstance(expected, list):
+        assert isinstance(actual, list) and len(expected) == len(actual), path
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            assert_same(a, b, f'{path}[{i}]')
+    elif isinstance(expected, (int, float)) and not isinstance(expected, bool) and isinstance(actual, (int, float)):
+        assert math.isclose(expected, actual, rel_tol=1e-9, abs_tol=1e-9), (path, expected, actual)
+    else:
+        assert expected == actual, (path, expected, actual)
+
+def synthetic_data():
+    data = {}
+    for source in ('ads', 'seo', 'crm'):
+        with open(os.path.join(ROOT, 'data', f'synthetic_{source}.json'), encoding='utf-8') as f:
+            data[source] = json.load(f)
+    return data
+
+def fixture(name):
+    path = os.path.join(FIXTURES, name)
+    with (gzip.open(path, 'rt', encoding='utf-8') if name.endswith('.gz') else open(path, encoding='utf-8')) as f:
+        stored = json.load(f)
+    return stored['input'] or synthetic_data(), stored['response']
+
+def daily_rows(seed, keywords=120, rows=80):
+    r = random.Random(seed)
+    names = [f'kw {i}' for i in range(keywords)]
+    ads = [{'keyword': r.choice(names), 'spend': r.choice([0, 5, 60, 120, 300]), 'impressions': r.choice([0, 500, 2000]),
+            'clicks': r.choice([0, 10, 60, 120]), 'conversions': r.choice([0, 0, 1, 3, 12]),
+            'revenue': r.choice([0, 100, 2000]), 'campaign': r.choice(['', 'A', 'B'])} for _ in range(rows)]
+    seo = [{'keyword': r.choice(names), 'volume': r.choice([0, 2000, 12000, 60000]), 'cpc': r.choice([0, 1.5]),
+            'competition': r.choice(['', 'low', 'high']), 'score': r.choice([0, 40])} for _ in range(rows // 2)]
+    crm = [{'keyword': r.choice(names), 'leads': r.choice([0, 1, 6, 12]), 'qualified_leads': r.choice([0, 1, 4]),
+            'revenue': r.choice([0, 500])} for _ in range(rows // 2)]
+    return {'ads': ads, 'seo': seo, 'crm': crm}
+
+def sources(data):
+    return normalize_ads(data['ads']), normalize_seo(data['seo']), normalize_crm(data['crm'])
+
+
+# ===== ENGINE VS N8N =====
+
+@pytest.mark.parametrize('name', ['n8n_synthetic.json', 'n8n_messy.json', 'n8n_generated.json.gz'])
+def test_engine_matches_workflow_output(name):
+    data, expected = fixture(name)
+    results = run_local_analysis(data)
+    for key in COMPARED + ['confidence_flags']:
+        assert_same(expected[key], results[key], key)
+
+def test_columnar_response_holds_the_same_rows():
+    data, expected = fixture('n8n_messy.json')
+    columnar = run_local_analysis(data, response_format='columnar')
+    assert_same(expected['summary'], columnar['summary'])
+    for action, bucket in expected['recommendations'].items():
+        assert len(units_frame({action: columnar['recommendations'][action]})) == len(bucket)
+
+
+# ===== INCREMENTAL =====
+
+def test_merge_matches_full_reanalysis():
+    state = AggregateState()
+    history = {'ads': [], 'seo': [], 'crm': []}
+    for day in range(5):
+        rows = daily_rows(day)
+        # Not every source arrives every day
+        rows = {'ads': rows['ads'], 'seo': rows['seo'] if day % 2 == 0 else [], 'crm': rows['crm'] if day % 3 else []}
+        state.merge(rows)
+        for source in history:
+            history[source] += rows[source]
+        full, merged = run_local_analysis(history), state.response()
+        for key in COMPARED:
+            assert_same(full[key], merged[key], f'day {day} {key}')
+
+@pytest.mark.parametrize('goal', GOALS[1:])
+def test_merge_reclassifies_on_goal_change(goal):
+    days = [daily_rows(day) for day in range(3)]
+    state = AggregateState()
+    for rows in days[:2]:
+        state.merge(rows)
+    state.merge(days[2], goal=goal)
+    history = {source: sum((rows[source] for rows in days), []) for source in ('ads', 'seo', 'crm')}
+    full = run_local_analysis(history, goal=goal)
+    for key in COMPARED:
+        assert_same(full[key], state.response()[key], key)
+
+
+def test_merge_matches_full_reanalysis_on_generated_data():
+    from generate import generate
+
+    # Shuffled, so most keywords' rows are split across the three merges
+    data = {source: frame.sample(frac=1, random_state=1).to_dict('records')
+            for source, frame in generate(5000, 1).items()}
+    state = AggregateState()
+    for part in range(3):
+        state.merge({source: rows[part * len(rows) // 3:(part + 1) * len(rows) // 3] for source, rows in data.items()})
+    full = run_local_analysis(data)
+    for key in COMPARED:
+        assert_same(full[key], state.response()[key], key)
+
+def test_response_is_labelled_with_the_merged_goal():
+    state = AggregateState()
+    state.merge(daily_rows(0), goal='cpa')
+    state.merge(daily_rows(1))
+    assert state.goal == 'cpa'
+    assert state.response()['goal'] == 'cpa'
+    assert state.response(goal='roas')['goal'] == 'roas'
+
+
+# ===== WHAT-IF SWEEP =====
+
+@pytest.mark.parametrize('goal', GOALS)
+@pytest.mark.parametrize('param, values', [('stop_spend', [0, 50, 100, 250, 1000]), ('poor_roi', [0, 0.5, 1, 2]),
+                                           ('max_cpl', [10, 60, 100, 500]), ('min_confidence', [0, 40, 70, 101])])
+def test_sweep_matches_reanalysis(goal, param, values, monkeypatch):
+    # Small chunks, so the row chunking is exercised too
+    monkeypatch.setattr(engine, 'SWEEP_CELLS', 64)
+    ads, seo, crm = sources(fixture('n8n_messy.json')[0])
+    rules = load_rules(goal)
+    sweep = sweep_thresholds(analyze(ads, seo, crm, rules), param, values, rules)
+    for row, value in zip(sweep.itertuples(index=False), values):
+        stats, summary = summarize(analyze(ads, seo, crm, rules.with_params(**{param: value})))
+        assert (row.stop, row.fix, row.invest, row.observe) == (
+            summary['stop'], summary['fix'], summary['invest'], summary['observe']), (param, value)
+        assert (row.total_savings, row.total_potential) == (stats['total_savings'], stats['total_potential'])
+
+def test_sweep_over_response_matches_engine_units():
+    data = synthetic_data()
+    rules = load_rules()
+    values = np.linspace(0, 300, 13)
+    from_units = sweep_thresholds(analyze(*sources(data), rules), 'stop_spend', values, rules)
+    from_response = sweep_thresholds(units_frame(run_local_analysis(data)['recommendations']), 'stop_spend', values, rules)
+    assert from_units.equals(from_response)
+
+
+# ===== BUDGET ALLOCATION =====
+
+@pytest.mark.parametrize('name', ['n8n_synthetic.json', 'n8n_messy.json'])
+@pytest.mark.parametrize('budget', [0, 1000, 25_000, 1e9])
+@pytest.mark.parametrize('max_scale', [1.5, 3.0])
+def test_allocation_stays_within_pool_and_scale(name, budget, max_scale):
+    units = units_frame(run_local_analysis(fixture(name)[0])['recommendations'])
+    allocation, summary = allocate_budget(units, budget, max_scale=max_scale)
+    assert summary['allocated'] <= summary['pool'] * (1 + 1e-9)
+    assert math.isclose(summary['allocated'] + summary['unallocated'], summary['pool'], rel_tol=1e-9)
+    assert (allocation['allocation'] > 0).all()
+    assert (allocation['new_spend'] <= allocation['spend'] * max_scale * (1 + 1e-9)).all()
+    assert set(allocation['action']) <= {'INVEST', 'FIX'}
+    assert (allocation['marginal_return'] >= 1 - 1e-9).all()
+    if budget == 1e9:
+        # More money than every keyword can absorb: each one whose first dollar returns at
+        # least min_return ends at its cap
+        worth_it = units['action'].isin(['INVEST', 'FIX']) & (units['ads_spend'] > 0) & (ELASTICITY * units['roi'] > 1)
+        assert len(allocation) == worth_it.sum() <= summary['candidates']
+        assert np.allclose(allocation['new_spend'], allocation['spend'] * max_scale)
+
+def test_allocation_spends_freed_savings_first():
+    units = units_frame(run_local_analysis(synthetic_data())['recommendations'])
+    stop = units['action'] == 'STOP'
+    _, summary = allocate_budget(units, 0)
+    assert summary['freed_savings'] == pytest.approx(units.loc[stop, 'savings'].sum())
+    assert summary['pool'] == summary['freed_savings']
+
+@pytest.mark.parametrize('kwargs', [{'elasticity': 1.0}, {'elasticity': 0}, {'max_scale': 0.5}])
+def test_allocation_rejects_bad_curves(kwargs):
+    units = units_frame(run_local_analysis(synthetic_data())['recommendations'])
+    with pytest.raises(ValueError):
+        allocate_budget(units, 1000, **kwargs)
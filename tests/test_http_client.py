@@ -0,0 +1,80 @@
+"""
+Spendsignal.ai - HTTP client tests
+Which failures are retried, and the circuit breaker's single half-open trial.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from http_client import RETRY_STATUSES, CircuitBreaker, CircuitOpenError, HttpClient
+
+
+@pytest.fixture
+def server():
+    hits = {'/slow': 0, '/503': 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            hits[self.path] = hits.get(self.path, 0) + 1
+            if self.path == '/slow':
+                time.sleep(1)
+            self.send_response(503 if self.path == '/503' else 200)
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_port}', hits
+    httpd.shutdown()
+
+def test_read_timeout_is_not_retried(server):
+    url, hits = server
+    client = HttpClient(retries=3, backoff_base=0.01)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.post(url + '/slow', body_factory=lambda: {'json': {}}, retry_statuses=RETRY_STATUSES, timeout=(1, 0.3))
+    assert hits['/slow'] == 1
+
+def test_gateway_errors_are_retried(server):
+    url, hits = server
+    response = HttpClient(retries=2, backoff_base=0.01).post(url + '/503', retry_statuses=RETRY_STATUSES, timeout=5)
+    assert response.status_code == 503
+    assert hits['/503'] == 3
+
+def test_refused_connections_are_retried():
+    client = HttpClient(retries=2, backoff_base=0.01)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.post('http://127.0.0.1:9/', timeout=1)
+    assert len(client.latencies) == 3
+
+def test_half_open_breaker_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record(False)
+    time.sleep(0.1)
+    outcomes = []
+
+    def call():
+        try:
+            breaker.before_call()
+            outcomes.append('through')
+        except CircuitOpenError:
+            outcomes.append('rejected')
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert outcomes.count('through') == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(True)
+    breaker.before_call()
+    assert breaker.state == 'closed'
@@ -0,0 +1,61 @@
+"""
+Spendsignal.ai - Kaggle source tests
+Dataset validators for the result-cache key, and one failing branch not sinking the others.
+"""
+
+import os
+import time
+
+import pandas as pd
+import pytest
+import requests
+
+from kaggle import DATASETS, DatasetCache, load_kaggle_sources
+
+
+class FailingClient:
+    def request(self, method, url, **kwargs):
+        raise requests.ConnectionError("kaggle.com unreachable")
+
+
+def fill(store, checked_at, etag='"v1"'):
+    for source in DATASETS:
+        key = store.key(source)
+        store.set(key, pd.DataFrame({'keyword': ['shoes']}))
+        store.set_meta(key, {'etag': etag, 'last_modified': None, 'rows': 1, 'checked_at': checked_at})
+
+def test_validators_while_every_source_is_current(tmp_path):
+    store = DatasetCache(str(tmp_path), revalidate_seconds=60)
+    assert store.validators() is None
+    fill(store, time.time())
+    assert store.validators() == {source: ['"v1"', None] for source in DATASETS}
+    fill(store, time.time(), etag='"v2"')
+    assert store.validators()['ads'] == ['"v2"', None]
+
+def test_no_validators_once_a_source_is_due(tmp_path):
+    store = DatasetCache(str(tmp_path), revalidate_seconds=60)
+    fill(store, time.time())
+    store.set_meta(store.key('crm'), {**store.meta(store.key('crm')), 'checked_at': time.time() - 61})
+    assert store.validators() is None
+
+def test_failed_branch_falls_back_to_empty_aggregate(tmp_path):
+    store = DatasetCache(str(tmp_path), revalidate_seconds=60)
+    fill(store, time.time())
+    os.remove(os.path.join(str(tmp_path), store.key('ads') + '.json'))
+    sources, timings = load_kaggle_sources(FailingClient(), None, store=store)
+    assert len(sources['ads']) == 0 and 'keyword' in sources['ads'].columns
+    assert timings['branches']['ads']['cache'] == 'failed'
+    assert 'unreachable' in timings['branches']['ads']['error']
+    assert timings['branches']['seo']['cache'] == 'fresh' and 'error' not in timings['branches']['seo']
+    assert list(sources['crm']['keyword']) == ['shoes']
+
+def test_failed_branch_falls_back_to_stale_copy(tmp_path):
+    store = DatasetCache(str(tmp_path), revalidate_seconds=60)
+    fill(store, time.time() - 120)
+    sources, timings = load_kaggle_sources(FailingClient(), None, store=store)
+    assert {branch['cache'] for branch in timings['branches'].values()} == {'stale'}
+    assert list(sources['ads']['keyword']) == ['shoes']
+
+def test_every_branch_failing_raises(tmp_path):
+    with pytest.raises(RuntimeError, match="ads: ConnectionError"):
+        load_kaggle_sources(FailingClient(), None, store=DatasetCache(str(tmp_path)))
@@ -0,0 +1,76 @@
+"""
+Spendsignal.ai - Webhook payload encoding
+Row JSON (legacy), columnar JSON, and gzip-streamed columnar JSON bodies.
+"""
+
+import json
+import zlib
+
+import pandas as pd
+
+from ingest import to_records
+
+STREAM_CHUNK_BYTES = 64 * 1024
+ROWS_PER_SLICE = 50_000
+
+
+def _column_values(series):
+    if pd.api.types.is_float_dtype(series.dtype) or not pd.api.types.is_numeric_dtype(series.dtype):
+        series = series.astype(object).where(series.notna(), None)
+    return series.tolist()
+
+def _iter_table(table):
+    # One JSON object of arrays per source, written a slice at a time
+    if not isinstance(table, pd.DataFrame):
+        table = pd.DataFrame(list(table or []))
+    yield '{'
+    for i, column in enumerate(table.columns):
+        yield ('' if i == 0 else ',') + json.dumps(str(column)) + ':['
+        for start in range(0, len(table), ROWS_PER_SLICE):
+            values = _column_values(table[column].iloc[start:start + ROWS_PER_SLICE])
+            yield ('' if start == 0 else ',') + json.dumps(values)[1:-1]
+        yield ']'
+    yield '}'
+
+def iter_columnar_json(mode, goal, budget, data, response_format="rows", insight="llm", insight_timeout=20):
+    """Yield the request body as JSON text fragments, with data sent as {column: [values]}."""
+    head = {"mode": mode, "goal": goal, "budget": budget, "data_format": "columnar", "response_format": response_format,
+            "insight": insight, "insight_timeout": insight_timeout}
+    yield json.dumps(head)[:-1] + ',"data":{'
+    for i, (name, table) in enumerate((data or {}).items()):
+        yield ('' if i == 0 else ',') + json.dumps(name) + ':'
+        yield from _iter_table(table)
+    yield '}}'
+
+def iter_gzip(fragments, chunk_bytes=STREAM_CHUNK_BYTES):
+    """Gzip a stream of text fragments, yielding compressed chunks of roughly chunk_bytes."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    pending = []
+    size = 0
+    for fragment in fragments:
+        block = compressor.compress(fragment.encode('utf-8'))
+        if block:
+            pending.append(block)
+            size += len(block)
+        if size >= chunk_bytes:
+            yield b''.join(pending)
+            pending, size = [], 0
+    pending.append(compressor.flush())
+    yield b''.join(pending)
+
+def build_request(transport, mode, goal, budget, data, response_format="rows", insight="llm", insight_timeout=20):
+    """Return (body kwargs for requests.post, extra headers) for the configured transport.
+
+    response_format asks Build Response for "rows" (nested objects) or "columnar" recommendations.
+    insight is "llm" (OpenAI, cached, given up after insight_timeout seconds), "template", or "deferred"
+    (answer with the template, then serve the model's summary from the insight webhook).
+    """
+    if transport == "gzip":
+        fragments = iter_columnar_json(mode, goal, budget, data, response_format, insight, insight_timeout)
+        return {"data": iter_gzip(fragments)}, {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+    if transport == "columnar":
+        fragments = iter_columnar_json(mode, goal, budget, data, response_format, insight, insight_timeout)
+        return {"data": ''.join(fragments).encode('utf-8')}, {"Content-Type": "application/json"}
+    data = {key: to_records(value) for key, value in (data or {}).items()}
+    return {"json": {"mode": mode, "goal": goal, "budget": budget, "data": data, "response_format": response_format,
+                     "insight": insight, "insight_timeout": insight_timeout}}, {"Content-Type": "application/json"}